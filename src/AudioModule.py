@@ -0,0 +1,182 @@
+import time
+import threading
+import collections
+import ProfilerModule as prof
+
+
+class PlaybackState(collections.namedtuple('PlaybackState', ['serial', 'index', 'pending', 'paused', 'volume',
+                                                             'started', 'pausedAt', 'length'])):
+	"""Snapshot the audio thread publishes after every tick; reading it never touches SDL.
+
+	`serial` counts the commands applied so far, `started`/`pausedAt` are perf_counter() times.
+	"""
+	__slots__ = ()
+
+	def position(self, now=None):
+		"""Seconds into the current track, extrapolated from the snapshot."""
+		if self.length == 0:
+			return 0.0
+		if self.paused or self.pending is not None:
+			now = self.pausedAt  # A pending track's clock is held at its seek target
+		elif now is None:
+			now = time.perf_counter()
+		return min(max(now - self.started, 0.0), self.length)
+
+
+class AudioController():
+	"""Owns a PlayerModule.Player and makes every mixer call on its own thread.
+
+	The video loop only appends commands and reads `state`. Volume changes are coalesced into one target
+	(last write wins), changes below `epsilon` are dropped and, with `ramp` seconds for a full-scale change,
+	applied in small steps to avoid zipper noise. The time from a command to the mixer call plus
+	`outputLatency` (the mixer buffer) is recorded per command kind in `latency`, a StageTimer. With a
+	TraceModule.Tracer, commands submitted while its `current` frame is set are reported to it once applied.
+	A command or tick that raises (e.g. a pygame.error) is reported with a warning and the thread carries on.
+	"""
+
+	def __init__(self, player, tick=0.01, epsilon=0.005, ramp=0.0, outputLatency=0.0, latency=None, tracer=None):
+		self.player = player
+		self.tick = tick
+		self.epsilon = epsilon
+		self.ramp = ramp
+		self.outputLatency = outputLatency
+		self.latency = latency if latency is not None else prof.StageTimer()
+		self.tracer = tracer
+		self.commands = collections.deque()  # (kind, argument, issued, frame id or None)
+		self.targetVolume = None  # Latest requested volume; earlier ones are simply overwritten
+		self.volumeIssued = 0.0
+		self.volumeFrame = None
+		self.volumeFresh = False  # A volume request arrived since the last tick
+		self.serial = 0  # Commands submitted; the state's serial catches up once they are applied
+		self.cond = threading.Condition()
+		self.running = False
+		self.thread = None
+		self.lastWarning = None
+		self.state = PlaybackState(0, player.index, None, False, player.volume, 0.0, 0.0, 0.0)
+
+	def start(self):
+		self.running = True
+		self.thread = threading.Thread(target=self._run, name='AudioController', daemon=True)
+		self.thread.start()
+		return self
+
+	def play(self, index):
+		self._submit('play', index)
+
+	def skip(self, direction=1):
+		self._submit('skip', direction)
+
+	def seek(self, seconds):
+		self._submit('seek', seconds)
+
+	def pause(self):
+		self._submit('pause')
+
+	def resume(self):
+		self._submit('resume')
+
+	def setEq(self, band, value):
+		"""Equalizer band gain in dB or balance, for players that have one (EqualizerModule.EqPlayer)."""
+		self._submit('eq', (band, value))
+
+	def setVolume(self, volume):
+		with self.cond:
+			self.targetVolume = volume
+			self.volumeIssued = time.perf_counter()
+			self.volumeFrame = self._frame()
+			self.volumeFresh = True
+			self.cond.notify_all()
+
+	def close(self):
+		with self.cond:
+			self.running = False
+			self.cond.notify_all()
+		if self.thread is not None:
+			self.thread.join(timeout=1.0)
+		self.player.close()
+
+	##################################################
+
+	def _submit(self, kind, argument=None):
+		with self.cond:
+			self.serial += 1
+			self.commands.append((kind, argument, time.perf_counter(), self._frame()))
+			self.cond.notify_all()
+
+	def _frame(self):
+		return self.tracer.current if self.tracer is not None else None
+
+	def _apply(self, kind, argument):
+		if kind == 'play':
+			self.player.play(argument)
+		elif kind == 'skip':
+			self.player.skip(argument)
+		elif kind == 'seek':
+			self.player.seek(argument)
+		elif kind == 'pause':
+			self.player.pause()
+		elif kind == 'resume':
+			self.player.resume()
+		elif kind == 'eq':
+			self.player.setEq(*argument)
+
+	def _applied(self, kind, issued, frameId):
+		heard = time.perf_counter() + self.outputLatency
+		self.latency.add(kind, heard - issued)
+		if frameId is not None:
+			self.tracer.action(frameId, kind, heard)
+
+	def _volumeStep(self, target):
+		"""Next volume on the way to target, or None when the change is too small to bother SDL with."""
+		current = self.player.volume
+		if abs(target - current) < self.epsilon:
+			return None
+		if self.ramp > 0:
+			step = self.tick / self.ramp
+			return min(max(target, current - step), current + step)
+		return target
+
+	def _publish(self, serial):
+		player = self.player
+		clock = player.clock
+		self.state = PlaybackState(serial, player.index, player.pending, player.paused, player.volume,
+		                           clock.origin, clock.pausedAt or 0.0, player.length)
+
+	def _warn(self, message):
+		"""Print a warning, once while the same error repeats (update() runs every tick)."""
+		if message != self.lastWarning:
+			self.lastWarning = message
+			print(f"Warning: {message}")
+
+	def _run(self):
+		applied = 0
+		while True:
+			with self.cond:
+				if self.running and not self.commands and not self.volumeFresh:
+					self.cond.wait(self.tick)
+				if not self.running:
+					break
+				commands = list(self.commands)
+				self.commands.clear()
+				target, volumeIssued, fresh = self.targetVolume, self.volumeIssued, self.volumeFresh
+				volumeFrame = self.volumeFrame
+				self.volumeFresh = False
+
+			for kind, argument, issued, frameId in commands:
+				try:
+					self._apply(kind, argument)
+					self._applied(kind, issued, frameId)
+				except Exception as e:  # A failed command must not stop the thread, or nothing else would play
+					self._warn(f"audio command {kind} {argument!r} failed: {e}")
+				applied += 1  # Counted either way, so waiters on the state's serial move on
+			try:
+				if target is not None:
+					volume = self._volumeStep(target)  # Ramps keep stepping on every tick until they reach the target
+					if volume is not None:
+						self.player.setVolume(volume)
+						if fresh:  # First audible step of this request
+							self._applied('volume', volumeIssued, volumeFrame)
+				self.player.update()
+			except Exception as e:
+				self._warn(f"audio update failed: {e}")
+			self._publish(applied)
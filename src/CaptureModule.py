@@ -0,0 +1,188 @@
+import cv2
+import time
+import threading
+import collections
+import numpy as np
+
+
+CAPTURE_LATEST = 'latest'
+CAPTURE_EVERY = 'every'
+
+
+class FrameGrabber():
+	"""Reads frames on a background thread into a small ring of preallocated buffers.
+
+	Works as a drop-in replacement for cv2.VideoCapture in the main loop. `source` can be a
+	cv2.VideoCapture (camera or video file) or any object with a read() -> (success, img) method.
+	In 'latest' mode read() hands out the newest frame and counts the skipped ones as dropped,
+	in 'every' mode the capture thread waits until each frame has been consumed.
+	"""
+
+	def __init__(self, source, mode=CAPTURE_LATEST, ringSize=3):
+		if mode not in (CAPTURE_LATEST, CAPTURE_EVERY):
+			raise ValueError(f"Unknown capture mode: {mode}")
+		if ringSize < 3:
+			raise ValueError("ringSize must be at least 3 (reading, newest and writing buffers)")
+		self.source = source
+		self.mode = mode
+		self.ringSize = ringSize
+		self.buffers = [None] * ringSize  # Allocated from the first frame's shape
+		self.frameIds = [-1] * ringSize
+		self.stamps = [0.0] * ringSize
+		self.grabbed = [0.0] * ringSize  # perf_counter() when each frame arrived, whatever clock stamps use
+		self.readable = collections.deque()  # Written but not yet consumed slots, oldest first
+		self.held = -1  # Slot lent to the consumer until its next read()
+		self.cond = threading.Condition()
+		self.thread = None
+		self.running = False
+		self.finished = False
+		self.captured = 0
+		self.consumed = 0
+		self.dropped = 0
+		self.frameId = -1  # Id and capture time of the frame returned by the last read()
+		self.timestamp = 0.0
+		self.grabTime = 0.0
+
+	def start(self):
+		self.running = True
+		self.thread = threading.Thread(target=self._run, name='FrameGrabber', daemon=True)
+		self.thread.start()
+		return self
+
+	def read(self, timeout=None):
+		"""Return (success, img) like cv2.VideoCapture.read().
+
+		img is a ring buffer owned by the grabber and stays valid until the next read().
+		"""
+		with self.cond:
+			self._release()
+			while not self.readable and not self.finished:
+				if not self.cond.wait(timeout):
+					return False, None
+			if not self.readable:
+				return False, None
+
+			if self.mode == CAPTURE_LATEST:
+				while len(self.readable) > 1:  # Skip everything older than the newest frame
+					self.readable.popleft()
+					self.dropped += 1
+			slot = self.readable.popleft()
+			self.held = slot
+			self.consumed += 1
+			self.frameId = self.frameIds[slot]
+			self.timestamp = self.stamps[slot]
+			self.grabTime = self.grabbed[slot]
+			self.cond.notify_all()
+			return True, self.buffers[slot]
+
+	def stop(self):
+		with self.cond:
+			self.running = False
+			self.cond.notify_all()
+		if self.thread is not None and self.thread is not threading.current_thread():
+			self.thread.join(timeout=1.0)
+
+	def release(self):
+		self.stop()
+		if hasattr(self.source, 'release'):
+			self.source.release()
+
+	def set(self, propId, value):
+		return self.source.set(propId, value)
+
+	def get(self, propId):
+		return self.source.get(propId)
+
+	##################################################
+
+	def _release(self):
+		if self.held >= 0:
+			self.held = -1
+			self.cond.notify_all()
+
+	def _freeSlot(self):
+		for slot in range(self.ringSize):
+			if slot != self.held and slot not in self.readable:
+				return slot
+		if self.mode == CAPTURE_LATEST and self.readable:
+			self.dropped += 1  # Consumer is behind: recycle the oldest unread frame
+			return self.readable.popleft()
+		return None
+
+	def _grab(self, slot):
+		buf = self.buffers[slot]
+		if buf is not None and isinstance(self.source, cv2.VideoCapture):
+			success, img = self.source.read(buf)  # Decodes straight into the ring buffer
+		else:
+			success, img = self.source.read()
+		if not success or img is None:
+			return False
+
+		if img is not buf:
+			if buf is None or buf.shape != img.shape or buf.dtype != img.dtype:
+				self.buffers[slot] = buf = np.empty_like(img)
+			np.copyto(buf, img)
+		return True
+
+	def _run(self):
+		while True:
+			with self.cond:
+				slot = self._freeSlot() if self.running else None
+				while slot is None and self.running:
+					self.cond.wait()
+					slot = self._freeSlot()
+				if not self.running:
+					break
+
+			success = self._grab(slot)  # Blocking camera read happens outside the lock
+			grabbed = time.perf_counter()
+			stamp = getattr(self.source, 'timestamp', None)  # Replay sources carry their recorded capture time
+			if stamp is None:
+				stamp = grabbed
+
+			with self.cond:
+				if not success:
+					break
+				self.frameIds[slot] = self.captured
+				self.stamps[slot] = stamp
+				self.grabbed[slot] = grabbed
+				self.captured += 1
+				self.readable.append(slot)
+				self.cond.notify_all()
+
+		with self.cond:
+			self.finished = True
+			self.cond.notify_all()
+
+
+####################################################################################################
+
+class SyntheticSource():
+	"""Frame source for tests and benchmarks: a moving gradient, optionally paced to a frame rate."""
+
+	def __init__(self, width=1080, height=720, count=None, fps=None, period=8):
+		self.width = width
+		self.height = height
+		self.count = count
+		self.fps = fps
+		self.index = 0
+		# A few pre-rendered frames, cycled, so reading costs about as much as a camera copy
+		ramp = np.tile(np.arange(width, dtype=np.uint16), (height, 1))
+		self.frames = [np.repeat(((ramp + i * 32) % 256).astype(np.uint8)[:, :, None], 3, axis=2) for i in range(period)]
+		self.nextTime = time.perf_counter()
+
+	def read(self):
+		if self.count is not None and self.index >= self.count:
+			return False, None
+		if self.fps:
+			delay = self.nextTime - time.perf_counter()
+			if delay > 0:
+				time.sleep(delay)
+			self.nextTime = max(self.nextTime, time.perf_counter()) + 1 / self.fps
+
+		img = self.frames[self.index % len(self.frames)].copy()
+		self.index += 1
+		return True, img
+
+	def release(self):
+		pass
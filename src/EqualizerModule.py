@@ -0,0 +1,327 @@
+import collections
+import numpy as np
+import pygame
+import PlayerModule as pm
+
+
+# Band name -> (filter kind, center/corner frequency in Hz, Q)
+BANDS = collections.OrderedDict([('bass', ('lowshelf', 200.0, 0.707)),
+                                 ('mid', ('peaking', 1000.0, 0.9)),
+                                 ('treble', ('highshelf', 4000.0, 0.707))])
+
+
+def biquad_coefficients(kind, freq, gainDb, q, rate):
+	"""(b, a) of an RBJ cookbook 'peaking', 'lowshelf' or 'highshelf' biquad, normalized so a[0] = 1."""
+	A = 10 ** (gainDb / 40)
+	w0 = 2 * np.pi * freq / rate
+	cos, alpha = np.cos(w0), np.sin(w0) / (2 * q)
+	if kind == 'peaking':
+		b = [1 + alpha * A, -2 * cos, 1 - alpha * A]
+		a = [1 + alpha / A, -2 * cos, 1 - alpha / A]
+	else:
+		sign = 1 if kind == 'lowshelf' else -1  # The high shelf mirrors the low one
+		root = 2 * np.sqrt(A) * alpha
+		b = [A * ((A + 1) - sign * (A - 1) * cos + root), sign * 2 * A * ((A - 1) - sign * (A + 1) * cos),
+		     A * ((A + 1) - sign * (A - 1) * cos - root)]
+		a = [(A + 1) + sign * (A - 1) * cos + root, -sign * 2 * ((A - 1) + sign * (A + 1) * cos),
+		     (A + 1) + sign * (A - 1) * cos - root]
+	b, a = np.array(b), np.array(a)
+	return b / a[0], a / a[0]
+
+
+def biquad_response(b, a, bins):
+	"""Complex response of (..., 3) biquad coefficient arrays at `bins` normalized frequencies (cycles per sample)."""
+	z = np.exp(-2j * np.pi * np.asarray(bins))[..., None] ** np.arange(3)  # 1, z^-1, z^-2
+	return (z @ b[..., None])[..., 0] / (z @ a[..., None])[..., 0]
+
+####################################################################################################
+
+class Equalizer():
+	"""Bass/mid/treble and balance on fixed-size blocks of PCM, with NumPy only.
+
+	The biquads are not run sample by sample (a Python loop over 44100 samples a second is too slow, and NumPy
+	has no IIR filter): their combined response is sampled at `taps` frequencies, which gives the impulse response
+	of the cascade, truncated to `taps` samples, and blocks are convolved with it by FFT overlap-add. The
+	filters are minimum phase, so this adds no delay. When a setting changes, the block is filtered with both
+	the old and new response and crossfaded, and the balance ramps across the block, so changes do not click.
+	Redesigning the filter only happens on changes and costs about as much as one block.
+	"""
+
+	def __init__(self, rate=44100, channels=2, block=1024, taps=2048, bands=BANDS, crossfade=True):
+		self.rate = rate
+		self.channels = channels
+		self.block = block
+		self.taps = taps
+		self.bands = bands
+		self.crossfade = crossfade
+		self.nfft = 1 << (block + taps - 2).bit_length()  # Room for a block's full convolution
+		self.gains = dict.fromkeys(bands, 0.0)  # dB
+		self.balance = 0.0  # -1 left only .. 1 right only
+		self.window = np.ones(taps)
+		self.window[-taps // 4:] = np.hanning(taps // 2)[-taps // 4:]  # Fade the truncated tail out
+		self.ramp = (0.5 - 0.5 * np.cos(np.linspace(0, np.pi, block, endpoint=False)))[:, None]  # Flat at both ends
+		self.designed = self._settings()
+		self.response = self._design(self.gains)
+		self.channelGains = self._channelGains(self.balance)
+		self.tail = np.zeros((self.nfft - block, channels))  # Convolution overlap carried into later blocks
+
+	def set(self, band, value):
+		"""Gain of a band in dB, or 'balance' from -1 (left) to 1 (right); takes effect on the next block."""
+		if band == 'balance':
+			self.balance = min(max(value, -1.0), 1.0)
+		else:
+			self.gains[band] = value
+
+	def reset(self):
+		"""Forget the overlap, e.g. after a seek, so the old position does not ring into the new one."""
+		self.tail[:] = 0
+
+	def process(self, samples):
+		"""Filter one block of (frames, channels) samples (up to `block` frames); returns float64 samples."""
+		n = len(samples)
+		x = np.zeros((self.nfft, self.channels))
+		x[:n] = samples
+		spectrum = np.fft.rfft(x, axis=0)
+		out = np.fft.irfft(spectrum * self.response[:, None], self.nfft, axis=0)
+		settings = self._settings()
+		gains = self.channelGains
+		if settings != self.designed:
+			self.designed = settings
+			self.response = self._design(self.gains)
+			new = np.fft.irfft(spectrum * self.response[:, None], self.nfft, axis=0)
+			if self.crossfade:
+				ramp = self.ramp[:n]
+				new[:n] = out[:n] + ramp * (new[:n] - out[:n])  # Old response fading into the new one
+			out = new
+			self.channelGains = self._channelGains(self.balance)
+			gains = gains + self.ramp[:n] * (self.channelGains - gains) if self.crossfade else self.channelGains
+		out[:len(self.tail)] += self.tail
+		self.tail = out[self.block:]
+		return out[:n] * gains
+
+	##################################################
+
+	def _settings(self):
+		return tuple(self.gains.values()) + (self.balance,)
+
+	def _channelGains(self, balance):
+		gains = np.ones(self.channels)
+		if self.channels == 2:
+			gains[:] = min(1.0, 1.0 - balance), min(1.0, 1.0 + balance)  # Turn the other side down
+		return gains
+
+	def _design(self, gains):
+		"""rfft of the cascade's truncated impulse response, zero-padded to nfft."""
+		coefficients = [biquad_coefficients(kind, freq, gains[name], q, self.rate)
+		                for name, (kind, freq, q) in self.bands.items() if gains[name] != 0]
+		if not coefficients:
+			return np.ones(self.nfft // 2 + 1, complex)  # Flat
+		b, a = np.array([c[0] for c in coefficients]), np.array([c[1] for c in coefficients])
+		response = biquad_response(b, a, np.fft.rfftfreq(self.taps)).prod(axis=0)
+		impulse = np.fft.irfft(response, self.taps) * self.window
+		return np.fft.rfft(impulse, self.nfft)
+
+####################################################################################################
+
+class EqPlayer():
+	"""Plays a PlaylistModule.Playlist through an Equalizer, a drop-in for PlayerModule.Player.
+
+	pygame.mixer.music and whole-track Sounds cannot be filtered while they play, so tracks are decoded to PCM
+	(by a PlayerModule.Preloader, like Player, in chunks given a SeekModule.FrameIndex as `frames`) and sent to
+	one reserved channel in `block`-frame Sounds, with one playing and one queued: an EQ change is heard within
+	about two blocks (46 ms at 1024 frames). update() must run more often than a block lasts (AudioController
+	ticks every 10 ms). Tracks follow each other inside a block, so natural ends are gapless. `underruns` counts
+	the times the channel ran dry.
+	"""
+
+	def __init__(self, playlist, equalizer=None, block=1024, taps=2048, budgetMB=256, preloadAround=1,
+	             onTrackEnd=None, frames=None):
+		pygame.mixer.set_reserved(1)
+		self.channel = pygame.mixer.Channel(0)
+		self.rate, _, self.numChannels = pygame.mixer.get_init()
+		self.eq = equalizer or Equalizer(self.rate, self.numChannels, block, taps)
+		self.block = self.eq.block
+		self.playlist = playlist
+		self.preloadAround = preloadAround
+		self.onTrackEnd = onTrackEnd
+		self.preloader = pm.Preloader(budgetMB * 2 ** 20, frames).start()
+
+		self.index = playlist.current  # Track id
+		self.pcm = None  # (frames, channels) int16 view of the current track's decoded Sound
+		self.track = None  # That Sound, which owns the samples
+		self.cursor = 0  # Next frame of the track to filter
+		self.length = 0.0
+		self.pending = None  # Track id waiting for its decode before it can start
+		self.handover = None  # (block, track id) once a queued block crosses into the next track, until it plays
+		self.volume = 1.0
+		self.paused = False
+		self.underruns = 0
+		self.clock = pm.PlaybackClock()
+
+	def play(self, trackId):
+		"""Start track `trackId` now, or as soon as it is decoded."""
+		if trackId is None:
+			return None  # Empty playlist
+		self.index = trackId
+		self.paused = False
+		self.handover = None
+		self.channel.stop()
+		self.eq.reset()
+		self._prefetch()
+		if not self._load(trackId):
+			self.pending = trackId
+			self.pcm = self.track = None  # Nothing to seek in, and the clock shows 0 until it starts
+			self.length = 0.0
+		else:
+			self.clock.start()
+			self._start(0.0)
+		return self.index
+
+	def skip(self, direction=1):
+		"""Move the playlist on (or back) and play that track."""
+		return self.play(self.playlist.next() if direction > 0 else self.playlist.prev())
+
+	def seek(self, seconds):
+		"""Continue the current track from `seconds` in; at its end, the track ends as if it had played out."""
+		if self.pending is not None or self.pcm is None:
+			return
+		if self.handover is not None:  # In the last blocks of a track whose successor is already being filtered
+			seconds -= self.length
+			self._handover()
+		seconds = min(max(seconds, 0.0), self.length)
+		self.channel.stop()
+		self.eq.reset()
+		self.clock.seek(seconds)
+		self._start(seconds)
+
+	def pause(self):
+		if not self.paused:
+			self.paused = True
+			self.clock.pause()
+			self.channel.pause()
+
+	def resume(self):
+		if self.paused:
+			self.paused = False
+			self.clock.resume()
+			self.channel.unpause()
+
+	def setVolume(self, volume):
+		self.volume = volume
+		self.channel.set_volume(volume)
+
+	def setEq(self, band, value):
+		self.eq.set(band, value)
+
+	def position(self):
+		"""Seconds into the current track."""
+		return min(max(self.clock.position(), 0.0), self.length)
+
+	def update(self):
+		"""Start a pending track and keep a filtered block queued behind the playing one."""
+		if self.pending is not None:
+			if self.channel.get_busy():
+				return  # The end of the previous track is still playing
+			if self._load(self.pending):
+				self.clock.start()
+				self._start(0.0)
+			elif self.playlist.path(self.pending) in self.preloader.failed and len(self.preloader.failed) < len(self.playlist):
+				self.play(self._advance(finished=False))  # Unreadable file: move on
+			return
+		if self.pcm is None or self.paused:
+			return
+		if self.handover is not None and self.channel.get_queue() is not self.handover[0]:
+			self._handover()  # The block crossing into the next track started playing
+		if not self.channel.get_busy():
+			self.underruns += 1
+			self._play(self._nextBlock())
+		if self.channel.get_queue() is None and self.pcm is not None:
+			self._queue(self._nextBlock())
+
+	def close(self):
+		self.channel.stop()
+		self.preloader.stop()
+
+	##################################################
+
+	def _load(self, trackId):
+		"""Make a decoded track current; False while it is still decoding."""
+		sound = self.preloader.get(self.playlist.path(trackId))
+		if sound is None:
+			return False
+		self.pending = None
+		self.track = sound
+		self.pcm = pygame.sndarray.samples(sound).reshape(-1, self.numChannels)
+		return True
+
+	def _start(self, seconds):
+		self.length = len(self.pcm) / self.rate
+		self.cursor = int(seconds * self.rate)
+		self.channel.set_volume(self.volume)
+		self._play(self._nextBlock())
+		if self.pcm is not None:  # Unless that block ended the track with the next one still decoding
+			self._queue(self._nextBlock())
+		if self.paused:  # Paused while the track was decoding, or seeking while paused
+			self.channel.pause()
+			self.clock.pause()
+
+	def _nextBlock(self):
+		"""The next `block` frames through the EQ as a Sound, continuing into the next track at the end of this one.
+
+		None when nothing is left to play: pygame crashes on an empty Sound.
+		"""
+		samples = self.pcm[self.cursor:self.cursor + self.block]
+		self.cursor += len(samples)
+		nextId = None
+		if len(samples) < self.block:
+			nextId = self._advance()
+			self._prefetch(nextId)
+			if nextId is not None and self._load(nextId):
+				self.cursor = self.block - len(samples)
+				samples = np.concatenate([samples, self.pcm[:self.cursor]])
+			else:
+				self.pcm = self.track = None  # Starts from update() once decoded and this block has played
+				self.index = self.pending = nextId
+				self.length = 0.0
+				nextId = None
+			if len(samples) == 0:
+				return None
+		out = self.eq.process(samples)
+		pcm = np.clip(out, -32768, 32767).astype(np.int16)
+		sound = pygame.sndarray.make_sound(pcm[:, 0] if self.numChannels == 1 else pcm)
+		if nextId is not None:
+			self.handover = (sound, nextId)
+		return sound
+
+	def _play(self, sound):
+		if sound is not None:
+			self.channel.play(sound)
+
+	def _queue(self, sound):
+		if sound is not None:
+			self.channel.queue(sound)
+
+	def _handover(self):
+		"""Make the next track current once the block that starts it is heard."""
+		_, nextId = self.handover
+		self.handover = None
+		self.clock.advance(self.length)  # The next track starts where this one ends
+		self.index = nextId
+		self.length = len(self.pcm) / self.rate
+
+	def _advance(self, finished=True):
+		"""Move the playlist to the next track at a natural end and return its id (see Player._advance())."""
+		playlist = self.playlist
+		with playlist.lock:
+			if playlist.current == self.index:
+				if finished and self.onTrackEnd is not None:
+					self.onTrackEnd(self.index)
+				return playlist.next()
+			return playlist.current
+
+	def _prefetch(self, trackId=None):
+		"""Keep the current track (or `trackId`, up next) and its neighbours decoded, nearest first (next before previous)."""
+		ids = [self.index if trackId is None else trackId]
+		for step in range(1, self.preloadAround + 1):
+			ids += [self.playlist.peek(step), self.playlist.peek(-step)]
+		self.preloader.want(dict.fromkeys(self.playlist.path(i) for i in ids if i is not None))
@@ -0,0 +1,49 @@
+import math
+import numpy as np
+
+
+def smoothing_factor(dt, cutoff):
+	"""Exponential smoothing factor for a low-pass filter with the given cutoff (Hz); cutoff may be an array."""
+	r = 2 * math.pi * cutoff * dt
+	return r / (r + 1)
+
+
+class OneEuroFilter():
+	"""One Euro filter over a whole landmark array at once (e.g. hands x 21 x 3).
+
+	Slow movements get a low cutoff (no jitter), fast ones a higher cutoff (little lag). The filtered
+	velocity also drives predict(), a constant-velocity extrapolation for frames without inference.
+	"""
+
+	def __init__(self, minCutoff=1.0, beta=0.007, dCutoff=1.0, maxPredict=0.25):
+		self.minCutoff = minCutoff  # Hz; lower = smoother at rest
+		self.beta = beta  # How fast the cutoff rises with speed (units of the input per second)
+		self.dCutoff = dCutoff  # Hz, cutoff for the velocity estimate
+		self.maxPredict = maxPredict  # Seconds; never extrapolate further than this past the last measurement
+		self.x = None
+		self.dx = None
+		self.t = 0.0
+
+	def reset(self):
+		self.x = None
+
+	def update(self, x, t):
+		"""Filter a new measurement taken at time t (seconds) and return the smoothed array."""
+		if self.x is None or self.x.shape != x.shape:
+			self.x = np.array(x, np.float32)
+			self.dx = np.zeros_like(self.x)
+			self.t = t
+			return self.x.copy()
+
+		dt = max(t - self.t, 1e-3)
+		self.dx += smoothing_factor(dt, self.dCutoff) * ((x - self.x) / dt - self.dx)
+		cutoff = self.minCutoff + self.beta * np.abs(self.dx)
+		self.x += smoothing_factor(dt, cutoff) * (x - self.x)
+		self.t = t
+		return self.x.copy()
+
+	def predict(self, t):
+		"""Estimated array at time t from the last filtered state and velocity."""
+		if self.x is None:
+			return None
+		return self.x + self.dx * min(max(t - self.t, 0.0), self.maxPredict)
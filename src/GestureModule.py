@@ -0,0 +1,450 @@
+import collections
+import numpy as np
+import config
+from HandTrackingModule import tangent_angle, fingers_up
+
+
+# Events emitted by GestureEngine.update; `t` is the timestamp of the frame that triggered them
+VolumeSet = collections.namedtuple('VolumeSet', ['volume', 't'])
+NextTrack = collections.namedtuple('NextTrack', ['t'])
+PrevTrack = collections.namedtuple('PrevTrack', ['t'])
+Pause = collections.namedtuple('Pause', ['t'])
+Resume = collections.namedtuple('Resume', ['t'])
+Seek = collections.namedtuple('Seek', ['seconds', 't'])  # Jump by `seconds` (negative: back)
+EqSet = collections.namedtuple('EqSet', ['band', 'value', 't'])  # A band's gain in dB, or 'balance' -1..1
+
+
+class CircleTracker():
+	"""Signed rotation of a fingertip drawing circles, from a fixed-size ring buffer of its recent positions.
+
+	The buffer keeps running sums of the positions and their squares, so the circle's center (the mean) and
+	radius (the RMS distance from it) update in O(1) per frame as the oldest point drops out. Each frame
+	contributes the angle the fingertip turned around that center; positive is clockwise on screen.
+	"""
+
+	def __init__(self, size=32):
+		self.points = np.zeros((size, 2), np.float64)
+		self.size = size
+		self.count = 0
+		self.head = 0  # Slot the next point goes into
+		self.sum = np.zeros(2)
+		self.sumSquares = 0.0
+		self.lastAngle = None
+
+	def reset(self):
+		self.count = 0
+		self.head = 0
+		self.sum[:] = 0
+		self.sumSquares = 0.0
+		self.lastAngle = None
+
+	def radius(self):
+		if self.count == 0:
+			return 0.0
+		center = self.sum / self.count
+		return float(np.sqrt(max(self.sumSquares / self.count - center @ center, 0.0)))
+
+	def update(self, point):
+		"""Add a fingertip position; returns the angle (radians) it turned since the previous one."""
+		point = np.asarray(point, np.float64)
+		if self.count == self.size:
+			old = self.points[self.head]
+			self.sum -= old
+			self.sumSquares -= old @ old
+		else:
+			self.count += 1
+		self.points[self.head] = point
+		self.sum += point
+		self.sumSquares += point @ point
+		self.head = (self.head + 1) % self.size
+
+		offset = point - self.sum / self.count
+		angle = np.arctan2(offset[1], offset[0])  # Image y points down, so increasing angles turn clockwise
+		delta = 0.0 if self.lastAngle is None else (angle - self.lastAngle + np.pi) % (2 * np.pi) - np.pi
+		self.lastAngle = angle
+		return float(delta)
+
+##################################################
+
+class SwipeDetector():
+	"""Horizontal swipes of a hand, as seek distances that grow with the swipe's speed.
+
+	Palm positions of the last `window` seconds are kept, in hand sizes. A swipe is a move of `minDistance`
+	hand sizes sideways within them at `minSpeed` hand sizes per second or more. It seeks `secondsPerSpeed`
+	seconds per unit of speed (`maxSeek` at most), forwards when moving towards the right of the image.
+	The motion that brings the hand back is ignored for `cooldown` seconds.
+	"""
+
+	def __init__(self, window=0.3, minDistance=1.0, minSpeed=4.0, secondsPerSpeed=2.5, maxSeek=60.0, cooldown=0.6):
+		self.window = window
+		self.minDistance = minDistance
+		self.minSpeed = minSpeed
+		self.secondsPerSpeed = secondsPerSpeed
+		self.maxSeek = maxSeek
+		self.cooldown = cooldown
+		self.history = collections.deque()  # (t, x in hand sizes)
+		self.until = 0.0  # End of the cooldown
+		self.speed = 0.0  # Of the last swipe, for the overlay
+
+	def reset(self):
+		self.history.clear()
+
+	def update(self, x, handSize, t):
+		"""Feed the palm's x (pixels) and the hand size; returns a Seek event when a swipe completes, else None."""
+		if t < self.until or handSize <= 0:
+			return None
+		history = self.history
+		history.append((t, x / handSize))
+		while t - history[0][0] > self.window:
+			history.popleft()
+		distance = history[-1][1] - history[0][1]
+		t0, x0 = history[-min(len(history), 3)]  # Speed over the last two frames, not the rest before the swipe
+		if abs(distance) < self.minDistance or t <= t0:
+			return None
+		speed = abs(history[-1][1] - x0) / (t - t0)
+		if speed < self.minSpeed:
+			return None
+		self.speed = speed
+		self.until = t + self.cooldown
+		history.clear()
+		return Seek(float(np.sign(distance) * min(speed * self.secondsPerSpeed, self.maxSeek)), t)
+
+##################################################
+
+class GestureEngine():
+	"""Turns per-frame landmark arrays into playback events.
+
+	One hand: thumb-index distance sets the volume, a fist pauses, an open palm resumes and tilting
+	the hand past `songChangeAngle` either way changes the song. With volumeMode 'circle', circles drawn
+	with the index fingertip turn the volume up clockwise and down counterclockwise instead. Swiping
+	sideways with three fingers up (index, middle, ring) seeks, further the faster the swipe, and holds
+	the volume meanwhile. Two hands: the distance between the index fingers sets the volume and tilting
+	the right/left hand changes to the next/previous song.
+	Song changes are armed again only once the hand leaves the trigger range (hysteresis), so holding
+	a tilted hand changes the song once. `tiltTime` is how long the tilt behind a song change in the last
+	frame took, from half way between upright and the trigger angle. Thresholds come from `cfg` (the
+	config module by default).
+	The attributes below the thresholds describe the last frame for drawing the overlay.
+	"""
+
+	def __init__(self, cfg=config):
+		self.pinchMuteDistance = cfg.pinchMuteDistance
+		self.pinchMaxDistance = cfg.pinchMaxDistance
+		self.pinchOffset = cfg.pinchOffset
+		self.spreadMuteDistance = cfg.spreadMuteDistance
+		self.spreadMaxDistance = cfg.spreadMaxDistance
+		self.songChangeAngle = cfg.songChangeAngle
+		self.volumeEpsilon = cfg.volumeEpsilon
+		self.volumeMode = cfg.volumeMode
+		self.circleDeadZone = np.radians(cfg.circleDeadZone)
+		self.circleMinRadius = cfg.circleMinRadius
+		self.circleVolumePerTurn = cfg.circleVolumePerTurn
+		self.circleSpeedRef = cfg.circleSpeedRef
+		self.circleSpeedMax = cfg.circleSpeedMax
+		self.circle = CircleTracker(cfg.circleBuffer)
+		self.swipe = SwipeDetector(cfg.swipeWindow, cfg.swipeMinDistance, cfg.swipeMinSpeed, cfg.swipeSecondsPerSpeed,
+		                           cfg.swipeMaxSeek, cfg.swipeCooldown)
+		self.lastT = None
+
+		# Hysteresis state
+		self.paused = False
+		self.armedP1H = False  # One hand, tilted towards angleP
+		self.armedN1H = False  # One hand, tilted towards angleN
+		self.armedNext2H = False  # Two hands, right hand
+		self.armedPrev2H = False  # Two hands, left hand
+		self.lastVolume = None
+		self.restAngle = (self.songChangeAngle + 90) / 2  # Above it a hand counts as upright for tiltTime
+		self.tiltStart = dict.fromkeys('PNRL')  # Last time each tilt angle was at restAngle or above
+		self.tiltTime = None
+
+		# Last frame, for the overlay
+		self.numHands = 0
+		self.volume = 1.0 if self.volumeMode == 'circle' else 0  # Circles turn the player's volume, 1.0 at start
+		self.mid = (0, 0)  # Pixel midpoint of the volume gesture
+		self.hand = ''  # 'LEFT' / 'RIGHT' with one hand
+		self.angleP = 0
+		self.angleN = 0
+		self.angleVolume = 0
+		self.triggeredP = False  # Angle stayed in the trigger range after changing the song
+		self.triggeredN = False
+		self.left, self.right = 0, 1  # Hand indices with two hands
+		self.angleL = 0
+		self.angleR = 0
+
+	def update(self, landmarks, t, paused=None):
+		"""Feed one frame of (hands, 21, 3) pixel landmarks; returns the list of events it triggers.
+
+		`paused` syncs the pause state with the player (a song change also resumes playback).
+		"""
+		if paused is not None:
+			self.paused = paused
+		if len(landmarks) != 1:
+			self.circle.reset()  # A new circle (or swipe) starts when one hand is back
+			self.swipe.reset()
+		if len(landmarks) != self.numHands:
+			self.tiltStart = dict.fromkeys(self.tiltStart)
+		self.tiltTime = None
+		self.numHands = len(landmarks)
+		dt = 0.0 if self.lastT is None else t - self.lastT
+		self.lastT = t
+		if self.numHands == 1:
+			return self._oneHand(landmarks, t, dt)
+		if self.numHands == 2:
+			return self._twoHands(landmarks, t)
+		return []
+
+	##################################################
+
+	def _tilt(self, key, angle, t):
+		"""Follow a tilt angle; returns the seconds since it was last upright."""
+		if angle >= self.restAngle or self.tiltStart[key] is None:
+			self.tiltStart[key] = t
+		return t - self.tiltStart[key]
+
+	def _setVolume(self, volume, t, events):
+		self.volume = volume
+		if self.lastVolume is None or abs(volume - self.lastVolume) > self.volumeEpsilon:
+			self.lastVolume = volume
+			events.append(VolumeSet(volume, t))
+
+	def _circleVolume(self, tip, handSize, dt):
+		"""Volume after this frame's fingertip motion: dead zone for jitter, faster circles change it faster."""
+		delta = self.circle.update(tip)
+		if (self.circle.count < self.circle.size // 2 or abs(delta) < self.circleDeadZone
+		        or self.circle.radius() < self.circleMinRadius * handSize / 100):
+			return self.volume
+		speed = abs(delta) / dt / (2 * np.pi) if dt > 0 else self.circleSpeedRef  # Turns per second
+		scale = min(max(speed / self.circleSpeedRef, 0.25), self.circleSpeedMax)
+		change = delta / (2 * np.pi) * self.circleVolumePerTurn * scale
+		return min(max(self.volume + change, 0.0), 1.0)
+
+	def _oneHand(self, landmarks, t, dt):
+		events = []
+		hand = landmarks[0]
+		pixels = landmarks[:, :, :2].astype(np.int32)
+
+		up = fingers_up(pixels)[0]
+		fingers = up.sum()
+		if fingers == 0 and not self.paused:
+			self.paused = True
+			events.append(Pause(t))
+		elif fingers == 5 and self.paused:
+			self.paused = False
+			events.append(Resume(t))
+
+		# Thumb-index distance normalized by hand size (wrist to middle fingertip), scaled for volume control
+		handSize = np.linalg.norm(hand[0] - hand[12])
+		if up[1] and up[2] and up[3] and not up[4]:  # Three fingers: seeking, the volume stays put
+			seek = self.swipe.update(float(hand[9, 0]), float(handSize), t)
+			if seek is not None:
+				events.append(seek)
+			volume = self.volume
+		elif self.volumeMode == 'circle':
+			self.mid = tuple(pixels[0, 8].tolist())
+			volume = self._circleVolume(hand[8, :2], float(handSize), dt)
+		else:
+			self.swipe.reset()
+			dist = np.linalg.norm(hand[4] - hand[8])
+			dist = float(dist / handSize if handSize > 0 else dist) * 100
+			self.mid = tuple(((pixels[0, 4] + pixels[0, 8]) // 2).tolist())
+			if dist < self.pinchMuteDistance:
+				volume = 0
+			elif dist > self.pinchMaxDistance:
+				volume = 1
+			else:
+				volume = (dist - self.pinchOffset) / (self.pinchMaxDistance - self.pinchOffset)
+		self._setVolume(volume, t, events)
+
+		self.hand = 'LEFT' if pixels[0, 17, 0] > pixels[0, 3, 0] else 'RIGHT'
+		delta = hand[[12, 8], :2] - hand[[0, 4], :2]  # Wrist -> middle fingertip, thumb -> index fingertip
+		angle, self.angleVolume = tangent_angle(delta[:, 1], delta[:, 0]).tolist()
+		self.angleP = 180 - abs(angle) if angle > 0 else abs(angle)
+		self.angleN = 180 + angle if angle < 0 else angle
+		tiltP, tiltN = self._tilt('P', self.angleP, t), self._tilt('N', self.angleN, t)
+
+		# A left hand mirrors the rotation, so the same tilt means the opposite direction
+		forward, backward = (PrevTrack, NextTrack) if self.hand == 'LEFT' else (NextTrack, PrevTrack)
+		if 0 < self.angleP < self.songChangeAngle:
+			if self.armedP1H:
+				self.armedP1H = False
+				self.triggeredP = True
+				self.paused = False
+				self.tiltTime = tiltP
+				events.append(forward(t))
+		else:
+			self.armedP1H = True  # Re-arm only when the angle exits the range
+			self.triggeredP = False
+
+		if 0 < self.angleN < self.songChangeAngle:
+			if self.armedN1H:
+				self.armedN1H = False
+				self.triggeredN = True
+				self.paused = False
+				self.tiltTime = tiltN
+				events.append(backward(t))
+		else:
+			self.armedN1H = True
+			self.triggeredN = False
+		return events
+
+	def _twoHands(self, landmarks, t):
+		events = []
+		pixels = landmarks[:, :, :2].astype(np.int32)
+
+		# Distance between the index finger bases of both hands, normalized by the first hand's size
+		handSize = np.linalg.norm(landmarks[0, 0] - landmarks[0, 12])
+		dist = np.linalg.norm(landmarks[0, 5] - landmarks[1, 5])
+		dist = float(dist / handSize if handSize > 0 else dist) * 100
+		self.mid = tuple(((pixels[0, 5] + pixels[1, 5]) // 2).tolist())
+		if dist < self.spreadMuteDistance:
+			volume = 0
+		elif dist > self.spreadMaxDistance:
+			volume = 1
+		else:
+			volume = (dist - self.spreadMuteDistance) / (self.spreadMaxDistance - self.spreadMuteDistance)
+		self._setVolume(volume, t, events)
+
+		left, right = (1, 0) if pixels[0, 17, 0] < pixels[1, 17, 0] else (0, 1)
+		self.left, self.right = left, right
+		delta = landmarks[:, 12, :2] - landmarks[:, 0, :2]
+		angles = np.abs(tangent_angle(delta[:, 1], delta[:, 0]))
+		self.angleR, self.angleL = float(angles[right]), float(angles[left])
+		tiltR, tiltL = self._tilt('R', self.angleR, t), self._tilt('L', self.angleL, t)
+		self.angleVolume = float(tangent_angle(pixels[right, 8, 1] - pixels[left, 8, 1],
+		                                       pixels[right, 8, 0] - pixels[left, 4, 0]))
+
+		if self.angleR < self.songChangeAngle and self.armedNext2H:
+			self.armedNext2H = False
+			self.paused = False
+			self.tiltTime = tiltR
+			events.append(NextTrack(t))
+		if self.angleL < self.songChangeAngle and self.armedPrev2H:
+			self.armedPrev2H = False
+			self.paused = False
+			self.tiltTime = tiltL
+			events.append(PrevTrack(t))
+		if self.angleR > self.songChangeAngle:
+			self.armedNext2H = True
+		if self.angleL > self.songChangeAngle:
+			self.armedPrev2H = True
+		return events
+
+##################################################
+
+class EqGestures():
+	"""Equalizer control by hand height, for EqualizerModule.EqPlayer.
+
+	One hand: which third of the frame it is in picks bass, mid or treble (left to right in the image), and
+	its height sets that band's gain, +-`eqRangeDb` from the top to the bottom of the central `eqSpan` of the
+	frame. Two hands: the higher one turns the balance towards its side. Changes smaller than `eqEpsilon`
+	(dB, or a tenth of that for the balance) are not sent.
+	"""
+
+	def __init__(self, cfg=config, bands=('bass', 'mid', 'treble')):
+		self.bands = bands
+		self.range = cfg.eqRangeDb
+		self.span = cfg.eqSpan
+		self.epsilon = cfg.eqEpsilon
+		self.values = dict.fromkeys(bands + ('balance',), 0.0)
+		self.band = None  # Band under the hand in the last frame, for the overlay
+
+	def update(self, landmarks, t, frameSize):
+		"""Feed one frame of (hands, 21, 3) pixel landmarks; returns EqSet events."""
+		w, h = frameSize
+		palms = landmarks[:, 9, :2] / [w, h]  # Middle finger base: steadier than the fingertips
+		heights = np.clip((0.5 - palms[:, 1]) / self.span * 2, -1.0, 1.0)  # 1 at the top of the span, -1 at the bottom
+		if len(landmarks) == 1:
+			self.band = self.bands[min(int(palms[0, 0] * len(self.bands)), len(self.bands) - 1)]
+			return self._set(self.band, float(heights[0]) * self.range, self.epsilon, t)
+		self.band = None
+		if len(landmarks) == 2:
+			left, right = np.argsort(palms[:, 0])
+			return self._set('balance', float(np.clip(heights[right] - heights[left], -1.0, 1.0)), self.epsilon / 10, t)
+		return []
+
+	##################################################
+
+	def _set(self, band, value, epsilon, t):
+		if abs(value - self.values[band]) < epsilon:
+			return []
+		self.values[band] = value
+		return [EqSet(band, value, t)]
+
+
+####################################################################################################
+
+ROLE_VOLUME = 'volume'
+ROLE_TRACK = 'track'  # Song changes, pause and resume
+
+
+def event_role(event):
+	return ROLE_VOLUME if isinstance(event, VolumeSet) else ROLE_TRACK
+
+
+class RoleArbiter():
+	"""Merges the gesture events of several users into one stream, each control role owned by one user.
+
+	A user is any hashable key, e.g. a (source, hand) pair. A free role goes to the first user who gestures
+	for it, unless that user already owns a role and someone else is around; a user without a role takes
+	over a role from someone holding both. So one person alone controls everything, and once a second
+	person joins, one of them owns the volume and the other the track changes. A role is released when
+	its owner has not been seen for `releaseAfter` seconds.
+	"""
+
+	def __init__(self, roles=(ROLE_VOLUME, ROLE_TRACK), releaseAfter=2.0):
+		self.owners = dict.fromkeys(roles)  # role -> user key or None
+		self.lastSeen = {}  # user key -> timestamp
+		self.releaseAfter = releaseAfter
+
+	def seen(self, user, t):
+		"""Note that a user is present (e.g. their hand is visible) at time t."""
+		self.lastSeen[user] = t
+
+	def filter(self, user, events, t, present=True):
+		"""The events this user is allowed to send; claims or takes over roles on the way.
+
+		`present` is False for a user without a hand in view (e.g. an idle camera): they are not counted as
+		around, so they neither keep their roles past `releaseAfter` nor stop someone alone from taking both.
+		"""
+		if present:
+			self.seen(user, t)
+		self.expire(t)
+		allowed = []
+		for event in events:
+			role = event_role(event)
+			if role not in self.owners:
+				continue
+			if self.owners[role] != user:
+				if not self._claim(user, role):
+					continue
+			allowed.append(event)
+		return allowed
+
+	def roles(self, user):
+		return [role for role, owner in self.owners.items() if owner == user]
+
+	def expire(self, t):
+		"""Release the roles of users not seen for `releaseAfter` seconds."""
+		for user, last in list(self.lastSeen.items()):
+			if t - last > self.releaseAfter:
+				del self.lastSeen[user]
+				for role, owner in self.owners.items():
+					if owner == user:
+						self.owners[role] = None
+
+	##################################################
+
+	def _claim(self, user, role):
+		owner = self.owners[role]
+		if owner is None:
+			alone = all(other == user for other in self.lastSeen)
+			if alone or not self.roles(user):
+				self.owners[role] = user
+				print(f"Gestures: {role} -> {user}")
+				return True
+			return False
+		if not self.roles(user) and len(self.roles(owner)) > 1:
+			self.owners[role] = user  # Share: the owner of everything gives this role up
+			print(f"Gestures: {role} -> {user}")
+			return True
+		return False
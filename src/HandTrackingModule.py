@@ -1,97 +1,260 @@
 import cv2
-import mediapipe as mp
 import collections
 import time
+import numpy as np
+import InferenceModule as inf
+import TrackingModule as tm
+import FilterModule as fm
+
+
+TIP_IDS = np.array([4, 8, 12, 16, 20])  # Thumb, Index, Middle, Ring, Pinky
+
+
+def tangent_angle(opposite, adjacent):
+	"""Vectorized atan(opposite / adjacent) in degrees; vertical lines give +-90 and a zero vector 0."""
+	opposite = np.asarray(opposite, np.float64)
+	adjacent = np.asarray(adjacent, np.float64)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		degrees = np.degrees(np.arctan(opposite / adjacent))
+	return np.where(adjacent == 0, np.sign(opposite) * 90.0, degrees)
+
+
+def fingers_up(pixels):
+	"""(hands, 5) raised fingers from (hands, 21, 2) pixels; thumb by x position, the others tip above pip joint."""
+	fingers = (pixels[:, TIP_IDS, 1] < pixels[:, TIP_IDS - 2, 1]).astype(np.int8)
+	fingers[:, 0] = pixels[:, 4, 0] >= pixels[:, 2, 0]
+	return fingers
 
 
 class handDetector():
-	def __init__(self, mode=False, maxHands=2, modComp=1, minDetConf=0.5, minTrackConf=0.5):
+	def __init__(self, mode=False, maxHands=2, modComp=1, minDetConf=0.5, minTrackConf=0.5, backend='local', pipelineDepth=1,
+	             roi=False, roiSize=320, targetFps=None, inferEvery=1, inferInterval=None, smooth=False):
 		self.mode = mode
 		self.maxHands = maxHands
 		self.modelComplexity = modComp
 		self.minDetectionConfidence = minDetConf
 		self.minTrackingConfidence = minTrackConf
-		self.mpHands = mp.solutions.hands
-		self.hands = self.mpHands.Hands(self.mode, self.maxHands, self.modelComplexity, self.minDetectionConfidence,
-		                                self.minTrackingConfidence)
-		self.mpDraw = mp.solutions.drawing_utils
-		self.lmList = []  # Initialize lmList
-	
-	def findHands(self, img, draw=True):
-		imqRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-		self.results = self.hands.process(imqRGB)
+		self.pipelineDepth = pipelineDepth
+		params = self._params()
+		if backend == 'process':
+			# MediaPipe runs in a worker process, frames go through shared memory
+			self.hands = None
+			self.backend = inf.ProcessBackend(params, self.maxHands, self.pipelineDepth)
+		elif backend == 'local':
+			self.hands = inf.create_hands(*params)
+			self.backend = inf.LocalBackend(self.hands, self.maxHands)
+		elif not isinstance(backend, str):
+			self.hands = None  # A ready-made backend, e.g. RecordModule.ReplayBackend
+			self.backend = backend
+		else:
+			raise ValueError(f"Unknown inference backend: {backend}")
+		# Optional: run inference on a crop around the tracked hands, and trade model size for frame rate
+		self.roiTracker = tm.RoiTracker(maxSide=roiSize) if roi else None
+		self.governor = tm.LatencyGovernor(targetFps) if targetFps else None
+		# Optional: run inference only every N frames / every `inferInterval` seconds and filter + predict in between
+		self.inferEvery = inferEvery
+		self.inferInterval = inferInterval
+		self.filter = fm.OneEuroFilter() if smooth or inferEvery > 1 or inferInterval else None
+		self.frameIndex = 0
+		self.lastInferFrame = -inferEvery
+		self.lastInferTime = float('-inf')
+		self.resultSerial = 0  # Bumped for every accepted inference result
+		self.filteredSerial = 0
+		self.frameSize = (1, 1)
+		self.result = inf.empty_result(self.maxHands)  # Landmark arrays of the newest finished frame
+		self._results = None
+		self._lmList = None
+		
+		# Per-frame landmark tensors, computed once in findHands; everything else is a view over them
+		self.count = 0
+		self.landmarks = np.zeros((0, inf.NUM_LANDMARKS, 3), np.float32)  # (hands, 21, [x px, y px, z])
+		self.pixels = np.zeros((0, inf.NUM_LANDMARKS, 2), np.int32)  # Truncated x, y for drawing
+		self.handedness = np.zeros(0, np.int8)  # inf.LEFT / inf.RIGHT as classified by MediaPipe
+		self.scores = np.zeros(0, np.float32)
+	
+	def _params(self):
+		return (self.mode, self.maxHands, self.modelComplexity, self.minDetectionConfidence, self.minTrackingConfidence)
+	
+	def setModelComplexity(self, modComp):
+		"""Switch between the lite (0) and full (1) hand landmark model."""
+		if modComp == self.modelComplexity:
+			return
+		self.modelComplexity = modComp
+		self.backend.setParams(self._params())
+		if self.hands is not None:
+			self.hands = self.backend.hands
+		if self.roiTracker is not None:
+			self.roiTracker.reset()  # The new model starts without tracking state
+	
+	def _collect(self, w, h):
+		"""Take finished results from the backend; returns False if a cropped search lost the hand."""
+		found = True
+		# Wait only when the pipeline is full: depth 1 returns this frame's hands, depth N the ones from N-1 frames ago
+		while self.backend.inFlight() >= self.pipelineDepth:
+			found = self._accept(self.backend.collect(block=True), w, h)
+		result = self.backend.collect(block=False)
+		while result is not None:
+			found = self._accept(result, w, h)
+			result = self.backend.collect(block=False)
+		return found
+	
+	def _accept(self, result, w, h):
+		found = True
+		if self.roiTracker is not None:
+			if result.tag is not None:
+				result = result._replace(landmarks=self.roiTracker.toFrame(result.landmarks, result.tag, w, h))
+			found = self.roiTracker.update(result, result.tag, w, h)
+			if not found:
+				result = result._replace(count=0)
+		if self.governor is not None:
+			self.setModelComplexity(self.governor.update(result.elapsed, self.modelComplexity))
+		self.result = result
+		self.resultSerial += 1
+		return found
+	
+	def _inferenceDue(self, t):
+		if self.inferInterval is not None:
+			return t - self.lastInferTime >= self.inferInterval
+		return self.frameIndex - self.lastInferFrame >= self.inferEvery
+	
+	def _filtered(self, measured, t):
+		"""Smooth a fresh measurement, or predict the landmarks when this frame had no new result."""
+		if self.resultSerial == self.filteredSerial:
+			predicted = self.filter.predict(t)
+			return measured if predicted is None or predicted.shape != measured.shape else predicted
+		
+		self.filteredSerial = self.resultSerial
+		previous = self.filter.x
+		if previous is not None and previous.shape != measured.shape:
+			self.filter.reset()  # A hand appeared or disappeared
+		elif previous is not None and len(measured) == 2:
+			# MediaPipe does not keep hand order stable; match hands to the filter state by wrist position
+			keep = np.linalg.norm(previous[:, 0, :2] - measured[:, 0, :2], axis=1).sum()
+			swap = np.linalg.norm(previous[::-1, 0, :2] - measured[:, 0, :2], axis=1).sum()
+			if swap < keep:
+				order = [1, 0] + list(range(2, self.maxHands))
+				self.result = self.result._replace(landmarks=self.result.landmarks[order],
+				                                   handedness=self.result.handedness[order],
+				                                   scores=self.result.scores[order])
+				measured = measured[::-1]
+		return self.filter.update(measured, t)
+	
+	def findHands(self, img, draw=True, timestamp=None):
+		h, w = img.shape[:2]
+		t = time.perf_counter() if timestamp is None else timestamp
+		self.frameIndex += 1
+		
+		if self._inferenceDue(t):
+			self.lastInferFrame, self.lastInferTime = self.frameIndex, t
+			crop, tag = self.roiTracker.crop(img) if self.roiTracker is not None else (img, None)
+			self.backend.submit(crop, tag)
+			if not self._collect(w, h) and self.pipelineDepth == 1:
+				self.backend.submit(img)  # Hand left the crop: search the whole frame right away
+				self._collect(w, h)
+		else:
+			self._collect(w, h)  # Only picks up results that are already finished
+		
+		self.frameSize = (w, h)
+		self.count = self.result.count
+		self.landmarks = self.result.landmarks[:self.count] * np.array([w, h, 1], np.float32)
+		if self.filter is not None:
+			self.landmarks = self._filtered(self.landmarks, t)
+		self.pixels = self.landmarks[:, :, :2].astype(np.int32)
+		self.handedness = self.result.handedness[:self.count]
+		self.scores = self.result.scores[:self.count]
+		self._results = None
+		self._lmList = None
 		
-		if self.results.multi_hand_landmarks:
+		if draw and self.results.multi_hand_landmarks:
+			import mediapipe as mp  # Loaded on first use; replayed landmarks never need it
 			for handLms in self.results.multi_hand_landmarks:
-				if draw:
-					self.mpDraw.draw_landmarks(img, handLms, self.mpHands.HAND_CONNECTIONS)
+				mp.solutions.drawing_utils.draw_landmarks(img, handLms, mp.solutions.hands.HAND_CONNECTIONS)
 		
 		return img
 	
+	@property
+	def results(self):
+		"""MediaPipe-style results of the current frame (built on demand for non-local backends)."""
+		if self._results is None:
+			if self.filter is not None:
+				w, h = self.frameSize
+				normalized = self.landmarks / np.array([w, h, 1], np.float32)
+				self._results = inf.to_results(self.result._replace(count=self.count, landmarks=normalized))
+			elif isinstance(self.backend, inf.LocalBackend) and self.backend.results is not None and self.result.tag is None:
+				self._results = self.backend.results
+			else:
+				self._results = inf.to_results(self.result)
+		return self._results
+	
+	@property
+	def lmList(self):
+		"""Flat [id, cx, cy, cz] list over all hands, built at most once per frame."""
+		if self._lmList is None:
+			lmList = []
+			for pixels, landmarks in zip(self.pixels.tolist(), self.landmarks.tolist()):
+				lmList.extend([id, cx, cy, lm[2]] for id, ((cx, cy), lm) in enumerate(zip(pixels, landmarks)))
+			self._lmList = lmList
+		return self._lmList
+	
+	def close(self):
+		self.backend.close()
+	
 	def numHands(self, numHands=True):
-		if numHands and self.results.multi_hand_landmarks:
-			print('# of hands detected: ', len(self.results.multi_hand_landmarks))
-		if self.results.multi_hand_landmarks:
-			return len(self.results.multi_hand_landmarks)
-		else:
-			return 0
+		if numHands and self.count:
+			print('# of hands detected: ', self.count)
+		return self.count
 	
 	def findPos(self, img, draw=True):
-		lmList = []
-		
-		if self.results.multi_hand_landmarks:
-			for handNo, handLms in enumerate(self.results.multi_hand_landmarks):
-				for id, lm in enumerate(handLms.landmark):
-					h, w, c = img.shape
-					cx, cy = int(lm.x * w), int(lm.y * h)
-					cz = lm.z
-					lmList.append([id, cx, cy, cz])  # Add all landmarks for each hand
-				
-				# Optionally, draw circles on the landmarks
-				if draw:
-					for id, lm in enumerate(handLms.landmark):
-						cx, cy = int(lm.x * w), int(lm.y * h)
-						cv2.circle(img, (cx, cy), 8, (0, 255, 255), cv2.FILLED, lineType=cv2.LINE_AA)
+		# Optionally, draw circles on the landmarks
+		if draw:
+			for cx, cy in self.pixels.reshape(-1, 2).tolist():
+				cv2.circle(img, (cx, cy), 8, (0, 255, 255), cv2.FILLED, lineType=cv2.LINE_AA)
 		
-		self.lmList = lmList
-		return lmList
+		return self.lmList
 	
 	def drawLines(self, img, handNos, color=(255,255,255)):
-		if self.results.multi_hand_landmarks:
-			h, w, _ = img.shape  # Get image dimensions
+		h, w, _ = img.shape  # Get image dimensions
+		pixels = self.pixels.reshape(-1, 2)  # Indices run across hands like lmList (21 per hand)
+		
+		for handNo in handNos:  # Loop through the pairs of landmarks to connect
+			lm1, lm2 = handNo[0], handNo[1]  # Get the two landmarks
+			if lm1 >= len(pixels) or lm2 >= len(pixels):
+				continue  # Skip invalid indices
 			
-			# Loop through detected hands
-			for hand_idx, handLms in enumerate(self.results.multi_hand_landmarks):
-				# Ensure lmList is populated before accessing it
-				if not self.lmList:  # Only update it if empty
-					self.findPos(img)  # Update lmList with the current hand's landmarks
-				
-				for handNo in handNos:  # Loop through the pairs of landmarks to connect
-					lm1, lm2 = handNo[0], handNo[1]  # Get the two landmarks
-					# Ensure indices are within the range of landmarks (21 per hand)
-					if lm1 >= len(self.lmList) or lm2 >= len(self.lmList):
-						continue  # Skip invalid indices
-					
-					# Convert normalized coordinates to pixel coordinates
-					x1, y1 = int(self.lmList[lm1][1]), int(self.lmList[lm1][2])
-					x2, y2 = int(self.lmList[lm2][1]), int(self.lmList[lm2][2])
-					
-					# Check if coordinates are within image bounds
-					if x1 >= w or y1 >= h or x2 >= w or y2 >= h:
-						print(f"Warning: Coordinates out of bounds for line: ({x1}, {y1}) -> ({x2}, {y2})")
-						continue  # Skip drawing if coordinates are out of bounds
-					
-					# Draw the line
-					cv2.line(img, (x1, y1), (x2, y2), color, 2, lineType=cv2.LINE_AA)
-					
-					# Draw circles at the landmarks
-					cv2.circle(img, (x1, y1), 10, color, 2, lineType=cv2.LINE_AA)
-					cv2.circle(img, (x2, y2), 10, color, 2, lineType=cv2.LINE_AA)
+			(x1, y1), (x2, y2) = pixels[lm1].tolist(), pixels[lm2].tolist()
+			
+			# Check if coordinates are within image bounds
+			if x1 >= w or y1 >= h or x2 >= w or y2 >= h:
+				print(f"Warning: Coordinates out of bounds for line: ({x1}, {y1}) -> ({x2}, {y2})")
+				continue  # Skip drawing if coordinates are out of bounds
+			
+			# Draw the line
+			cv2.line(img, (x1, y1), (x2, y2), color, 2, lineType=cv2.LINE_AA)
+			
+			# Draw circles at the landmarks
+			cv2.circle(img, (x1, y1), 10, color, 2, lineType=cv2.LINE_AA)
+			cv2.circle(img, (x2, y2), 10, color, 2, lineType=cv2.LINE_AA)
 		
 		return img
 	
+	def handSize(self, hand=0):
+		"""Distance from wrist (0) to middle fingertip (12), used to normalize distances."""
+		return float(np.linalg.norm(self.landmarks[hand, 0] - self.landmarks[hand, 12]))
+	
+	def distance(self, hand1, p1, hand2, p2, normalize=True):
+		"""3D distance between landmark p1 of hand1 and p2 of hand2, and the pixel midpoint between them."""
+		if self.count == 0:
+			return None
+		dist = float(np.linalg.norm(self.landmarks[hand1, p1] - self.landmarks[hand2, p2]))
+		if normalize:
+			handSize = self.handSize(0)  # Normalize by the first hand, like findDistance
+			if handSize > 0:  # Avoid division by zero
+				dist /= handSize
+		midX, midY = ((self.pixels[hand1, p1] + self.pixels[hand2, p2]) // 2).tolist()
+		return dist, midX, midY
+	
 	def findDistance(self, lmList1, lmList2, img, p1, p2, normalize=True):
-		if len(self.lmList) >= 9:  # Ensure at least 9 landmarks exist
+		if self.count:
 			lm1, lm2 = lmList1[p1], lmList2[p2]  # Specific landmarks (e.g., index and thumb tip)
 			x1, y1, z1 = lm1[1], lm1[2], lm1[3]
 			x2, y2, z2 = lm2[1], lm2[2], lm2[3]
@@ -100,34 +263,33 @@ class handDetector():
 			dist = ((x1 - x2) ** 2 + (y1 - y2) ** 2 + (z1 - z2) ** 2) ** 0.5
 			
 			if normalize:
-				# Normalize by hand size (distance from wrist (0) to middle fingertip (12))
-				if len(self.lmList) > 12:
-					x0, y0, z0 = self.lmList[0][1], self.lmList[0][2], self.lmList[0][3]  # Wrist
-					x12, y12, z12 = self.lmList[12][1], self.lmList[12][2], self.lmList[12][3]  # Middle fingertip
-					handSize = ((x0 - x12) ** 2 + (y0 - y12) ** 2 + (z0 - z12) ** 2) ** 0.5
-					if handSize > 0:  # Avoid division by zero
-						dist /= handSize
+				handSize = self.handSize(0)
+				if handSize > 0:  # Avoid division by zero
+					dist /= handSize
 			
-			# Display distance on screen
 			midX, midY = (x1 + x2) // 2, (y1 + y2) // 2
 			
 			return dist, midX, midY
 		return None
 	
+	def angles(self, p1, p2):
+		"""Per-hand angle (degrees) of the line from landmark p1 to p2, as get_angle_from_tangent computes it."""
+		delta = self.landmarks[:, p2, :2] - self.landmarks[:, p1, :2]
+		return tangent_angle(delta[:, 1], delta[:, 0])
+	
+	def fingersUp(self):
+		"""(hands, 5) array of raised fingers for every detected hand."""
+		return fingers_up(self.pixels)
+	
+	def boundingBoxes(self):
+		"""(hands, 4) array of xMin, yMin, xMax, yMax in pixels."""
+		return np.concatenate((self.pixels.min(axis=1), self.pixels.max(axis=1)), axis=1)
+	
 	def numFingers(self, img, lmList, draw=True):
-		tipIds = [4, 8, 12, 16, 20]  # Thumb, Index, Middle, Ring, Pinky
 		if len(lmList) != 0:
-			fingers = []
-			for id in range(0,5):
-				if lmList[tipIds[id]][2] < lmList[tipIds[id]-2][2]:
-					fingers.append(1)
-				else:
-					fingers.append(0)
-				if lmList[4][1] < lmList[2][1]:
-					fingers[0] = 0
-				else:
-					fingers[0] = 1
-			return fingers
+			if lmList is self._lmList:
+				return fingers_up(self.pixels[:1])[0].tolist()
+			return fingers_up(np.array([lm[1:3] for lm in lmList[:21]], np.int32)[None])[0].tolist()
 	
 
 
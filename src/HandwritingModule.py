@@ -0,0 +1,214 @@
+import bisect
+import array
+import threading
+import numpy as np
+import config
+import SearchModule as srch
+from HandTrackingModule import fingers_up
+
+
+def arc(cx, cy, rx, ry, start, end, steps=12):
+	"""Points of an elliptic arc from `start` to `end` degrees; image y points down, so increasing angles turn clockwise."""
+	a = np.radians(np.linspace(start, end, steps))
+	return list(zip((cx + rx * np.cos(a)).tolist(), (cy + ry * np.sin(a)).tolist()))
+
+
+# Capital letters as one stroke each, in a unit box with y down; some have a second common way of writing them
+LETTER_STROKES = {
+	'A': [[(0, 1), (0.5, 0), (1, 1)], [(0, 1), (0.5, 0), (1, 1), (0.75, 0.5), (0.25, 0.5)]],
+	'B': [[(0, 1), (0, 0)] + arc(0.1, 0.25, 0.7, 0.25, -90, 90) + arc(0.1, 0.75, 0.8, 0.25, -90, 90)],
+	'C': [arc(0.5, 0.5, 0.5, 0.5, -40, -320)],
+	'D': [[(0, 1), (0, 0)] + arc(0, 0.5, 0.9, 0.5, -90, 90)],
+	'E': [[(0.9, 0), (0, 0), (0, 0.5), (0.7, 0.5), (0, 0.5), (0, 1), (0.9, 1)],
+	      arc(0.5, 0.3, 0.4, 0.3, -30, -270) + arc(0.5, 0.7, 0.5, 0.3, -90, -330)],
+	'F': [[(0.9, 0), (0, 0), (0, 1)], [(0.9, 0), (0, 0), (0, 0.5), (0.6, 0.5), (0, 0.5), (0, 1)]],
+	'G': [arc(0.5, 0.5, 0.5, 0.5, -40, -360) + [(0.55, 0.5)]],
+	'H': [[(0, 0), (0, 1), (0, 0.5), (1, 0.5), (1, 0), (1, 1)]],
+	'I': [[(0.5, 0), (0.5, 1)]],
+	'J': [[(0.8, 0), (0.8, 0.7)] + arc(0.45, 0.7, 0.35, 0.3, 0, 180)],
+	'K': [[(0, 0), (0, 1), (0, 0.6), (0.9, 0), (0.2, 0.5), (0.9, 1)]],
+	'L': [[(0, 0), (0, 1), (0.8, 1)]],
+	'M': [[(0, 1), (0, 0), (0.5, 0.6), (1, 0), (1, 1)]],
+	'N': [[(0, 1), (0, 0), (1, 1), (1, 0)]],
+	'O': [arc(0.5, 0.5, 0.5, 0.5, -90, -450, 24)],
+	'P': [[(0, 1), (0, 0)] + arc(0, 0.27, 0.8, 0.27, -90, 90)],
+	'Q': [arc(0.5, 0.5, 0.5, 0.5, -90, -450, 24) + [(0.6, 0.7), (1, 1)]],
+	'R': [[(0, 1), (0, 0)] + arc(0, 0.27, 0.8, 0.27, -90, 90) + [(0.9, 1)]],
+	'S': [arc(0.5, 0.27, 0.45, 0.27, -20, -270) + arc(0.5, 0.73, 0.45, 0.27, -90, 160)],
+	'T': [[(0, 0), (1, 0), (0.5, 0), (0.5, 1)]],
+	'U': [[(0, 0), (0, 0.6)] + arc(0.5, 0.6, 0.5, 0.4, 180, 0) + [(1, 0)]],
+	'V': [[(0, 0), (0.5, 1), (1, 0)]],
+	'W': [[(0, 0), (0.25, 1), (0.5, 0.3), (0.75, 1), (1, 0)]],
+	'X': [[(0, 0), (1, 1), (1, 0), (0, 1)]],
+	'Y': [[(0, 0), (0.5, 0.5), (1, 0), (0.5, 0.5), (0.5, 1)]],
+	'Z': [[(0, 0), (1, 0), (0, 1), (1, 1)]],
+}
+
+
+def resample(points, n=32):
+	"""n points evenly spaced along a polyline's length."""
+	points = np.asarray(points, np.float64)
+	steps = np.linalg.norm(np.diff(points, axis=0), axis=1)
+	along = np.concatenate(([0.0], np.cumsum(steps)))
+	if along[-1] == 0:
+		return np.repeat(points[:1], n, axis=0)
+	targets = np.linspace(0, along[-1], n)
+	return np.stack([np.interp(targets, along, points[:, 0]), np.interp(targets, along, points[:, 1])], axis=1)
+
+
+def normalize_stroke(points, n=32):
+	"""Resampled stroke centered on its centroid and scaled so its larger side is 1, keeping the aspect ratio
+	(an I stays a line instead of being stretched into a box)."""
+	cloud = resample(points, n)
+	cloud -= cloud.mean(axis=0)
+	size = np.ptp(cloud, axis=0).max()
+	return (cloud / size if size > 0 else cloud).astype(np.float32)
+
+####################################################################################################
+
+class LetterRecognizer():
+	"""Point-cloud letter recognizer in the spirit of $P: strokes are compared as sets of points, so where a
+	letter starts and which way it is drawn do not matter.
+
+	Templates are resampled and normalized once, into a (templates, n, 2) array with their squared norms. A
+	stroke is compared with all of them at once through the (templates, n, n) squared distances between its
+	points and theirs, one matrix product: the distance is the mean distance from each point to the nearest
+	point of the other cloud, both ways. That stands in for $P's greedy point matching, which does not
+	vectorize, and keeps a lookup around 0.2 ms.
+	"""
+
+	def __init__(self, strokes=LETTER_STROKES, n=32):
+		self.n = n
+		self.letters = [letter for letter, variants in strokes.items() for _ in variants]
+		self.clouds = np.stack([normalize_stroke(stroke, n) for variants in strokes.values() for stroke in variants])
+		self.norms = (self.clouds ** 2).sum(axis=2)[:, :, None]
+
+	def recognize(self, points):
+		"""(letter, distance) of the closest template; distances are in units of the stroke's size."""
+		cloud = normalize_stroke(points, self.n)
+		squared = self.norms + (cloud ** 2).sum(axis=1) - 2 * self.clouds @ cloud.T
+		np.maximum(squared, 0, out=squared)  # Rounding can dip below zero
+		scores = np.sqrt(squared.min(axis=2)).mean(axis=1) + np.sqrt(squared.min(axis=1)).mean(axis=1)
+		best = int(np.argmin(scores))
+		return self.letters[best], float(scores[best]) / 2
+
+
+class LetterIndex():
+	"""Track ids by the first letter of their title, for jumping to songs by an air-written letter."""
+
+	def __init__(self):
+		self.tracks = {}  # letter -> array('I') of track ids, in id order
+		self.lock = threading.Lock()
+
+	def add(self, trackId, path):
+		"""Index a track; fits PlaylistModule.Playlist.subscribe() like SearchModule.SearchIndex.add()."""
+		text = srch.track_text(path)
+		if not text:
+			return
+		with self.lock:
+			self.tracks.setdefault(text[0].upper(), array.array('I')).append(trackId)
+
+	def first(self, letter, after=None):
+		"""First track starting with `letter`, or the one after track `after` (wrapping), so writing the same
+		letter again steps through its songs; None if no title starts with it."""
+		with self.lock:
+			tracks = self.tracks.get(letter)
+			if not tracks:
+				return None
+			i = 0 if after is None else bisect.bisect_right(tracks, after)
+			return tracks[i % len(tracks)]
+
+####################################################################################################
+
+class StrokeCapture():
+	"""Fingertip positions of one stroke in a preallocated array. When it fills up every other point is
+	dropped, so a long stroke keeps its shape at half the resolution instead of growing the buffer."""
+
+	def __init__(self, capacity=256):
+		self.buffer = np.zeros((capacity, 2), np.float32)
+		self.count = 0
+
+	def __len__(self):
+		return self.count
+
+	@property
+	def points(self):
+		return self.buffer[:self.count]
+
+	def add(self, point):
+		if self.count == len(self.buffer):
+			half = self.count // 2
+			self.buffer[:half] = self.buffer[:self.count:2][:half]
+			self.count = half
+		self.buffer[self.count] = point
+		self.count += 1
+
+	def length(self):
+		return float(np.linalg.norm(np.diff(self.points, axis=0), axis=1).sum()) if self.count > 1 else 0.0
+
+	def clear(self):
+		self.count = 0
+
+
+class AirWriter():
+	"""Song search by writing a title's first letter in the air.
+
+	Pointing with the index finger alone puts the pen down and the index fingertip draws; any other hand pose
+	(or no hand) for `strokeEndSeconds` ends the stroke. A stroke longer than `strokeMinLength` hand sizes is
+	recognized, and a close enough letter plays the first song starting with it (the next one when the same
+	letter is written again) as a SearchModule.PlayTrack event. Only that end-of-stroke step costs more than
+	copying a point. `letter`, `distance` and `stroke` describe the last stroke for the overlay.
+	"""
+
+	def __init__(self, index, recognizer=None, cfg=config):
+		self.index = index
+		self.recognizer = recognizer or LetterRecognizer(n=cfg.strokePoints)
+		self.stroke = StrokeCapture(cfg.strokeCapacity)
+		self.endSeconds = cfg.strokeEndSeconds
+		self.minLength = cfg.strokeMinLength
+		self.maxDistance = cfg.strokeMaxDistance
+		self.handSize = 0.0
+		self.penUp = None  # Time the pointing pose was last lost while a stroke was open
+		self.letter = None
+		self.distance = None
+		self.played = (None, None)  # (letter, track id) of the last song a letter started
+
+	@property
+	def writing(self):
+		return len(self.stroke) > 0
+
+	def update(self, landmarks, t):
+		"""Feed one frame of (hands, 21, 3) pixel landmarks; returns a list with a PlayTrack when a letter was recognized."""
+		if len(landmarks) == 1:
+			fingers = fingers_up(landmarks[:, :, :2])[0]
+			if fingers[1] and not fingers[2:].any():
+				self.penUp = None
+				self.stroke.add(landmarks[0, 8, :2])
+				self.handSize = max(self.handSize, float(np.linalg.norm(landmarks[0, 0, :2] - landmarks[0, 9, :2])))
+				return []
+		if not self.writing:
+			return []
+		if self.penUp is None:
+			self.penUp = t
+		if t - self.penUp < self.endSeconds:
+			return []  # A frame or two of lost pose does not split a letter
+		return self._finish(t)
+
+	##################################################
+
+	def _finish(self, t):
+		events = []
+		if self.stroke.length() >= self.minLength * self.handSize:
+			self.letter, self.distance = self.recognizer.recognize(self.stroke.points)
+			trackId = None
+			if self.distance <= self.maxDistance:
+				lastLetter, lastTrack = self.played
+				trackId = self.index.first(self.letter, lastTrack if lastLetter == self.letter else None)
+			print(f"Handwriting: {self.letter} ({self.distance:.3f})" + ('' if trackId is not None else ", no song"))
+			if trackId is not None:
+				self.played = (self.letter, trackId)
+				events.append(srch.PlayTrack(trackId, self.letter, 1 - self.distance / self.maxDistance, t))
+		self.stroke.clear()
+		self.penUp = None
+		self.handSize = 0.0
+		return events
@@ -0,0 +1,252 @@
+import cv2
+import time
+import atexit
+import queue
+import collections
+import numpy as np
+import multiprocessing as mproc
+from multiprocessing import shared_memory
+
+
+NUM_LANDMARKS = 21
+LEFT, RIGHT = 0, 1  # Handedness codes in the result arrays
+
+# One inference result: landmarks are normalized (x, y, z) exactly as MediaPipe returns them
+# `elapsed` is the time spent in cvtColor + hands.process, `tag` is whatever the caller submitted with the frame
+Result = collections.namedtuple('Result', ['tag', 'count', 'landmarks', 'handedness', 'scores', 'elapsed'])
+Results = collections.namedtuple('Results', ['multi_hand_landmarks', 'multi_handedness'])
+
+
+def empty_result(maxHands, tag=None):
+	return Result(tag, 0, np.zeros((maxHands, NUM_LANDMARKS, 3), np.float32),
+	              np.zeros(maxHands, np.int8), np.zeros(maxHands, np.float32), 0.0)
+
+##################################################
+
+def create_hands(mode, maxHands, modComp, minDetConf, minTrackConf):
+	import mediapipe as mp
+	return mp.solutions.hands.Hands(mode, maxHands, modComp, minDetConf, minTrackConf)
+
+##################################################
+
+def read_results(results, landmarks, handedness, scores):
+	"""Copy a MediaPipe result into fixed-size arrays and return the number of hands."""
+	if not results.multi_hand_landmarks:
+		return 0
+	count = min(len(results.multi_hand_landmarks), len(landmarks))
+	for i in range(count):
+		landmarks[i] = [(lm.x, lm.y, lm.z) for lm in results.multi_hand_landmarks[i].landmark]
+		if results.multi_handedness:
+			category = results.multi_handedness[i].classification[0]
+			handedness[i] = LEFT if category.label == 'Left' else RIGHT
+			scores[i] = category.score
+	return count
+
+##################################################
+
+def to_results(result):
+	"""MediaPipe-style results for a Result, so drawing and findPos work with any backend."""
+	from mediapipe.framework.formats import landmark_pb2, classification_pb2
+	if result.count == 0:
+		return Results(None, None)
+	handLandmarks, handedness = [], []
+	for i in range(result.count):
+		handLandmarks.append(landmark_pb2.NormalizedLandmarkList(
+			landmark=[landmark_pb2.NormalizedLandmark(x=x, y=y, z=z) for x, y, z in result.landmarks[i].tolist()]))
+		handedness.append(classification_pb2.ClassificationList(classification=[classification_pb2.Classification(
+			index=int(result.handedness[i]), score=float(result.scores[i]),
+			label='Left' if result.handedness[i] == LEFT else 'Right')]))
+	return Results(handLandmarks, handedness)
+
+
+####################################################################################################
+
+class LocalBackend():
+	"""Runs MediaPipe in the calling thread; results are ready as soon as submit() returns."""
+
+	def __init__(self, hands, maxHands):
+		self.hands = hands
+		self.maxHands = maxHands
+		self.pending = collections.deque()
+		self.results = None  # Raw MediaPipe results of the last processed frame
+
+	def submit(self, img, tag=None):
+		start = time.perf_counter()
+		imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+		self.results = self.hands.process(imgRGB)
+		result = empty_result(self.maxHands, tag)
+		count = read_results(self.results, result.landmarks, result.handedness, result.scores)
+		self.pending.append(result._replace(count=count, elapsed=time.perf_counter() - start))
+	
+	def setParams(self, params):
+		"""Reload MediaPipe with new (mode, maxHands, modComp, minDetConf, minTrackConf)."""
+		self.hands.close()
+		self.hands = create_hands(*params)
+
+	def collect(self, block=True):
+		return self.pending.popleft() if self.pending else None
+
+	def inFlight(self):
+		return len(self.pending)
+
+	def close(self):
+		pass
+
+
+####################################################################################################
+
+def _worker(params, depth, maxHands, resultName, requests, responses):
+	"""Inference process: reads frames from shared memory, writes landmarks back to shared memory."""
+	hands = create_hands(*params)
+	resultShm = shared_memory.SharedMemory(name=resultName)
+	landmarks, handedness, scores, elapsed, counts = _result_views(resultShm.buf, depth, maxHands)
+	frameShm, frames = None, None
+
+	while True:
+		msg = requests.get()
+		if msg is None:
+			break
+		if msg[0] == 'frames':  # Parent (re)allocated the frame slots
+			if frameShm is not None:
+				frames = None
+				frameShm.close()
+			frameShm = shared_memory.SharedMemory(name=msg[1])
+			frames = np.ndarray(msg[2], np.uint8, buffer=frameShm.buf)
+		elif msg[0] == 'process':
+			_, slot, h, w = msg
+			start = time.perf_counter()
+			imgRGB = cv2.cvtColor(frames[slot, :h, :w], cv2.COLOR_BGR2RGB)
+			counts[slot] = read_results(hands.process(imgRGB), landmarks[slot], handedness[slot], scores[slot])
+			elapsed[slot] = time.perf_counter() - start
+			responses.put(slot)
+		elif msg[0] == 'params':  # Model settings changed (e.g. by the latency governor)
+			hands.close()
+			hands = create_hands(*msg[1])
+
+	landmarks = handedness = scores = elapsed = counts = frames = None
+	resultShm.close()
+	if frameShm is not None:
+		frameShm.close()
+	hands.close()
+
+
+def _result_views(buf, depth, maxHands):
+	landmarksSize = depth * maxHands * NUM_LANDMARKS * 3 * 4
+	scoresSize = depth * maxHands * 4
+	elapsedSize = depth * 4
+	countsSize = depth * 4
+	landmarks = np.ndarray((depth, maxHands, NUM_LANDMARKS, 3), np.float32, buffer=buf)
+	scores = np.ndarray((depth, maxHands), np.float32, buffer=buf, offset=landmarksSize)
+	elapsed = np.ndarray((depth,), np.float32, buffer=buf, offset=landmarksSize + scoresSize)
+	counts = np.ndarray((depth,), np.int32, buffer=buf, offset=landmarksSize + scoresSize + elapsedSize)
+	handedness = np.ndarray((depth, maxHands), np.int8, buffer=buf,
+	                        offset=landmarksSize + scoresSize + elapsedSize + countsSize)
+	return landmarks, handedness, scores, elapsed, counts
+
+
+class ProcessBackend():
+	"""Runs MediaPipe in a worker process, pipelined `depth` frames deep.
+
+	Frames are copied into shared-memory slots and only slot numbers travel through the queues;
+	landmarks come back in a small shared array. With depth 1 every frame waits for its own
+	result (lowest latency); with depth 2+ inference of frame N overlaps rendering of frame N-1,
+	trading one frame of latency per extra slot for throughput.
+	"""
+
+	def __init__(self, params, maxHands, depth=1):
+		if depth < 1:
+			raise ValueError("Pipeline depth must be at least 1")
+		self.maxHands = maxHands
+		self.depth = depth
+		ctx = mproc.get_context('spawn')
+		self.requests = ctx.Queue()
+		self.responses = ctx.Queue()
+
+		resultSize = depth * (maxHands * NUM_LANDMARKS * 3 * 4 + maxHands * 4 + 4 + 4 + maxHands)
+		self.resultShm = shared_memory.SharedMemory(create=True, size=resultSize)
+		self.landmarks, self.handedness, self.scores, self.elapsed, self.counts = \
+			_result_views(self.resultShm.buf, depth, maxHands)
+		self.frameShm = None
+		self.frames = None
+
+		self.freeSlots = collections.deque(range(depth))
+		self.pending = collections.deque()  # (slot, tag) in submission order
+		self.ready = collections.deque()  # Results received while reallocating the frame slots
+
+		# Started before the first frame so MediaPipe loads while the camera warms up
+		self.process = ctx.Process(target=_worker, name='HandInference', daemon=True,
+		                           args=(params, depth, maxHands, self.resultShm.name, self.requests, self.responses))
+		self.process.start()
+		atexit.register(self.close)
+
+	def submit(self, img, tag=None):
+		if not self.freeSlots:
+			raise RuntimeError("Inference pipeline is full; collect() a result first")
+		h, w = img.shape[:2]
+		if self.frames is None or h > self.frames.shape[1] or w > self.frames.shape[2]:
+			oldH, oldW = self.frames.shape[1:3] if self.frames is not None else (0, 0)
+			self._allocateFrames((max(h, oldH), max(w, oldW), 3))
+		slot = self.freeSlots.popleft()
+		np.copyto(self.frames[slot, :h, :w], img)
+		self.pending.append((slot, tag))
+		self.requests.put(('process', slot, h, w))
+
+	def collect(self, block=True):
+		"""Oldest finished result, or None when nothing is ready (non-blocking) or in flight."""
+		if self.ready:
+			return self.ready.popleft()
+		if not self.pending:
+			return None
+		return self._receive(block)
+
+	def inFlight(self):
+		return len(self.pending) + len(self.ready)
+	
+	def setParams(self, params):
+		"""Reload MediaPipe in the worker; frames submitted afterwards use the new settings."""
+		self.requests.put(('params', params))
+
+	def close(self):
+		if self.process is None:
+			return
+		if self.process.is_alive():
+			self.requests.put(None)
+			self.process.join(timeout=2.0)
+			if self.process.is_alive():
+				self.process.terminate()
+		self.process = None
+		self.landmarks = self.handedness = self.scores = self.elapsed = self.counts = self.frames = None
+		for shm in (self.resultShm, self.frameShm):
+			if shm is not None:
+				shm.close()
+				shm.unlink()
+
+	def _receive(self, block):
+		while True:
+			try:
+				slot = self.responses.get(block, 0.5)
+				break
+			except queue.Empty:
+				if not block:
+					return None
+				if not self.process.is_alive():
+					raise RuntimeError("Hand inference process died")
+
+		expected, tag = self.pending.popleft()  # The worker answers in submission order
+		assert slot == expected
+		result = Result(tag, int(self.counts[slot]), self.landmarks[slot].copy(),
+		                self.handedness[slot].copy(), self.scores[slot].copy(), float(self.elapsed[slot]))
+		self.freeSlots.append(slot)
+		return result
+
+	def _allocateFrames(self, shape):
+		while self.pending:  # The worker must be done with the old slots before they go away
+			self.ready.append(self._receive(block=True))
+		if self.frameShm is not None:
+			self.frames = None
+			self.frameShm.close()
+			self.frameShm.unlink()
+		slotShape = (self.depth,) + tuple(shape)
+		self.frameShm = shared_memory.SharedMemory(create=True, size=int(np.prod(slotShape)))
+		self.frames = np.ndarray(slotShape, np.uint8, buffer=self.frameShm.buf)
+		self.requests.put(('frames', self.frameShm.name, slotShape))
@@ -0,0 +1,146 @@
+import os
+import json
+import threading
+import collections
+
+
+INDEX_VERSION = 1
+INDEX_FILE = '.library_index.json'
+
+# One entry per audio file; everything the render loop needs without touching the disk
+Track = collections.namedtuple('Track', ['path', 'name', 'title', 'artist', 'features',
+                                         'length', 'bitrate', 'size', 'mtime'])
+
+
+##################################################
+
+def split_song_name(words_list):
+	"""Split Track_Artist_Name words into (title, artist, features)."""
+	if not words_list:
+		return "", "", ""
+
+	title = words_list[0]  # First element is the song title
+	artist_section = words_list[1:]  # The rest is the artist and features
+
+	if 'Ft' in artist_section:
+		ft_index = artist_section.index('Ft')
+		return title, " ".join(artist_section[:ft_index]), " ".join(artist_section[ft_index + 1:])
+	return title, " ".join(artist_section), ""
+
+##################################################
+
+def song_name(path):
+	"""File stem of a song path, e.g. 'Sunshine_John_Doe'."""
+	return os.path.splitext(os.path.basename(path))[0]
+
+
+####################################################################################################
+
+class LibraryIndex():
+	"""Track metadata for a songs folder, cached on disk and served from memory.
+
+	Entries are checked against the file's size and mtime, by scan() for the whole folder (which also
+	forgets deleted files) and by get() the first time a song is asked for in a session, so a file replaced
+	since the cache was written is never served stale. scan() may run on a background thread meanwhile.
+	"""
+
+	def __init__(self, folderPath, cacheFile=None):
+		self.folderPath = folderPath
+		self.cacheFile = cacheFile or os.path.join(folderPath, INDEX_FILE)
+		self.tracks = {}  # path -> Track
+		self.checked = set()  # Paths whose entries were checked against the file this session
+		self.dirty = False
+		self.lock = threading.RLock()
+		self.load()
+
+	def load(self):
+		"""Read the on-disk cache; a missing or stale cache just means a full rescan."""
+		try:
+			with open(self.cacheFile, 'r', encoding='utf-8') as f:
+				data = json.load(f)
+		except (OSError, ValueError):
+			return
+		if data.get('version') != INDEX_VERSION:
+			return
+		for path, fields in data.get('tracks', {}).items():
+			self.tracks[path] = Track(path, *fields)
+
+	def save(self):
+		"""Write the cache atomically so an interrupted save never corrupts it."""
+		with self.lock:
+			if not self.dirty:
+				return
+			data = {'version': INDEX_VERSION,
+			        'tracks': {path: list(track[1:]) for path, track in self.tracks.items()}}
+			tmpFile = self.cacheFile + '.tmp'
+			try:
+				with open(tmpFile, 'w', encoding='utf-8') as f:
+					json.dump(data, f, separators=(',', ':'))
+				os.replace(tmpFile, self.cacheFile)
+				self.dirty = False
+			except OSError as e:
+				print(f"Warning: could not write library index {self.cacheFile}: {e}")
+
+	def scan(self, paths):
+		"""Index the given song paths, re-reading only files whose size or mtime changed."""
+		seen = set()
+		for path in paths:
+			seen.add(path)
+			try:
+				st = os.stat(path)
+			except OSError:
+				continue
+			if not self._current(self.tracks.get(path), st):
+				self._store(self._read(path, st))
+			self.checked.add(path)
+
+		with self.lock:  # Forget files that are no longer in the folder
+			for path in [p for p in self.tracks if p not in seen]:
+				del self.tracks[path]
+				self.dirty = True
+
+		self.save()
+		return self
+
+	def get(self, path):
+		"""Metadata for a song; only reads the file when it is new or changed since it was indexed."""
+		track = self.tracks.get(path)
+		if track is not None and path in self.checked:
+			return track  # From memory: called every frame while a track decodes
+		self.checked.add(path)
+		try:
+			st = os.stat(path)
+		except OSError:
+			st = None
+		if st is None:
+			if track is None or track.size:  # Unreadable, or deleted since
+				track = self._store(self._read(path, None))
+		elif not self._current(track, st):
+			track = self._store(self._read(path, st))
+		return track
+
+	##################################################
+
+	def _current(self, track, st):
+		return track is not None and track.size == st.st_size and track.mtime == st.st_mtime_ns
+
+	def _store(self, track):
+		with self.lock:
+			self.tracks[track.path] = track
+			self.dirty = True
+		return track
+
+	def _read(self, path, st):
+		name = song_name(path)
+		title, artist, features = split_song_name(name.split('_'))
+		length, bitrate = 0.0, 0
+		if st is not None:
+			from mutagen.mp3 import MP3  # Only needed for files the cached index doesn't cover
+			from mutagen import MutagenError
+			try:
+				info = MP3(path).info
+				length, bitrate = info.length, info.bitrate
+			except MutagenError as e:
+				print(f"Warning: could not read {path}: {e}")
+		return Track(path, name, title, artist, features, length, bitrate,
+		             st.st_size if st else 0, st.st_mtime_ns if st else 0)
@@ -0,0 +1,145 @@
+import os
+import re
+import array
+import bisect
+import threading
+import collections
+
+
+TIME_TAG = re.compile(r'\[(\d+):(\d+(?:[.:]\d+)?)\]')  # [mm:ss], [mm:ss.xx] or [mm:ss:xx]
+LEADING_TAGS = re.compile(r'^((?:\[[^\]]*\])+)(.*)$')
+WORD_TIME = re.compile(r'<\d+:\d+(?:[.:]\d+)?>')  # Enhanced LRC word timing inside a line
+
+
+def lrc_path(trackPath):
+	"""The .lrc file that goes with a song: same folder, same name."""
+	return os.path.splitext(trackPath)[0] + '.lrc'
+
+
+def parse_lrc(text):
+	"""Lyrics of an LRC file's text. A line may carry several time tags ([00:12.00][01:30.00]Chorus), which
+	repeat it; [offset:ms] shifts every line (positive: earlier) and other metadata tags are ignored."""
+	timed = []
+	offset = 0.0
+	for raw in text.splitlines():
+		match = LEADING_TAGS.match(raw.strip())
+		if match is None:
+			continue
+		tags, line = match.groups()
+		line = WORD_TIME.sub('', line).strip()
+		for tag in re.findall(r'\[[^\]]*\]', tags):
+			stamp = TIME_TAG.fullmatch(tag)
+			if stamp is not None:
+				minutes, seconds = stamp.groups()
+				timed.append((int(minutes) * 60 + float(seconds.replace(':', '.')), line))
+			elif tag[1:8].lower() == 'offset:':
+				try:
+					offset = float(tag[8:-1]) / 1000
+				except ValueError:
+					pass
+	timed.sort(key=lambda item: item[0])  # Stable: lines with the same time keep the file's order
+	return Lyrics(array.array('d', (max(t - offset, 0.0) for t, _ in timed)), [line for _, line in timed])
+
+
+def load_lrc(path):
+	"""Lyrics of an .lrc file, or None if there is none."""
+	try:
+		with open(path, encoding='utf-8-sig', errors='replace') as f:
+			return parse_lrc(f.read())
+	except OSError:
+		return None
+
+####################################################################################################
+
+class Lyrics():
+	"""Timed lines of one track: `times` in seconds, sorted, in an array('d'), and `lines` with their text."""
+
+	def __init__(self, times=None, lines=None):
+		self.times = times if times is not None else array.array('d')
+		self.lines = lines if lines is not None else []
+
+	def __len__(self):
+		return len(self.times)
+
+	def find(self, position, hint=-1):
+		"""Index of the line showing at `position` seconds (-1 before the first line).
+
+		`hint` is the previous result: during playback the answer is that line or the next one, so this checks
+		those two first and only falls back to a binary search after a seek.
+		"""
+		times = self.times
+		n = len(times)
+		for i in (hint, hint + 1):
+			if -1 <= i < n and (i < 0 or times[i] <= position) and (i + 1 == n or position < times[i + 1]):
+				return i
+		return bisect.bisect_right(times, position) - 1
+
+
+NO_LYRICS = Lyrics()  # A track without an .lrc file
+
+
+class LyricsLoader():
+	"""Parses the .lrc file next to a track on a background thread and keeps the last `cacheSize` tracks' lyrics.
+
+	want() is called on track changes and never waits; get() returns the track's Lyrics, NO_LYRICS when it has
+	no .lrc file, or None while it is being parsed. A cached track is parsed again if its .lrc file changed.
+	"""
+
+	def __init__(self, cacheSize=8):
+		self.cacheSize = cacheSize
+		self.cache = collections.OrderedDict()  # Track path -> (.lrc mtime, Lyrics), most recent last
+		self.wanted = None  # Track path to load next
+		self.cond = threading.Condition()
+		self.running = False
+		self.thread = None
+
+	def start(self):
+		self.running = True
+		self.thread = threading.Thread(target=self._run, name='LyricsLoader', daemon=True)
+		self.thread.start()
+		return self
+
+	def want(self, trackPath):
+		with self.cond:
+			self.wanted = trackPath
+			self.cond.notify_all()
+
+	def get(self, trackPath):
+		with self.cond:
+			entry = self.cache.get(trackPath)
+			return entry[1] if entry is not None else None
+
+	def close(self):
+		with self.cond:
+			self.running = False
+			self.cond.notify_all()
+		if self.thread is not None:
+			self.thread.join(timeout=1.0)
+
+	##################################################
+
+	def _run(self):
+		while True:
+			with self.cond:
+				while self.wanted is None and self.running:
+					self.cond.wait()
+				if not self.running:
+					break
+				trackPath, self.wanted = self.wanted, None
+				entry = self.cache.get(trackPath)
+
+			path = lrc_path(trackPath)
+			try:
+				mtime = os.stat(path).st_mtime_ns
+			except OSError:
+				mtime = None
+			if entry is not None and entry[0] == mtime:
+				lyrics = entry[1]  # Unchanged
+			else:
+				lyrics = (load_lrc(path) if mtime is not None else None) or NO_LYRICS
+
+			with self.cond:
+				self.cache[trackPath] = (mtime, lyrics)
+				self.cache.move_to_end(trackPath)
+				while len(self.cache) > self.cacheSize:
+					self.cache.popitem(last=False)
@@ -0,0 +1,279 @@
+import os
+import cv2
+import numpy as np
+
+
+def sec_to_min(seconds):
+	"""Convert seconds to minutes and seconds."""
+	minutes = int(seconds // 60)
+	seconds = int(seconds % 60)
+	return f"{minutes}:{seconds:02}"
+
+
+def blend(img, x, y, premultiplied, inverse):
+	"""img = img * inverse / 255 + premultiplied for a patch whose top-left corner lands at (x, y), clipped to img."""
+	h, w = inverse.shape[:2]
+	x0, y0 = max(x, 0), max(y, 0)
+	x1, y1 = min(x + w, img.shape[1]), min(y + h, img.shape[0])
+	if x0 >= x1 or y0 >= y1:
+		return
+	roi = img[y0:y1, x0:x1]
+	if x1 - x0 < w or y1 - y0 < h:
+		premultiplied = premultiplied[y0 - y:y1 - y, x0 - x:x1 - x]
+		inverse = inverse[y0 - y:y1 - y, x0 - x:x1 - x]
+	cv2.multiply(roi, inverse, dst=roi, scale=1 / 255)  # Saturating uint8 SIMD ops, in place on the view
+	cv2.add(roi, premultiplied, dst=roi)
+
+
+class Layer():
+	"""Antialiased text and lines rendered once into alpha-premultiplied patches, then blended onto frames.
+
+	Each primitive is kept as the bounding box of its own pixels, so blending touches what the text and lines
+	cover rather than the whole frame. (x, y) passed to blend() offsets every patch.
+	"""
+
+	def __init__(self, width, height):
+		self.width = width
+		self.height = height
+		self.patches = []  # (x, y, premultiplied BGR, 255 - alpha per channel)
+
+	def _stamp(self, draw, color):
+		mask = np.zeros((self.height, self.width), np.uint8)
+		draw(mask)
+		ys, xs = np.nonzero(mask)
+		if len(ys) == 0:
+			return
+		y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+		alpha = mask[y0:y1, x0:x1, None].astype(np.float32) / 255
+		premultiplied = np.round(alpha * np.array(color, np.float32)).astype(np.uint8)
+		inverse = np.repeat(255 - mask[y0:y1, x0:x1, None], 3, axis=2)
+		self.patches.append((int(x0), int(y0), premultiplied, inverse))
+
+	def text(self, text, org, scale, color, thickness=1, font=cv2.FONT_HERSHEY_PLAIN):
+		self._stamp(lambda mask: cv2.putText(mask, text, org, font, scale, 255, thickness, lineType=cv2.LINE_AA), color)
+
+	def line(self, p1, p2, color, thickness=1):
+		self._stamp(lambda mask: cv2.line(mask, p1, p2, 255, thickness, lineType=cv2.LINE_AA), color)
+
+	def blend(self, img, x=0, y=0):
+		for px, py, premultiplied, inverse in self.patches:
+			blend(img, x + px, y + py, premultiplied, inverse)
+
+##################################################
+
+class TextSprites():
+	"""Pre-rendered text labels in one style, blended at any position (org is putText's bottom-left corner)."""
+
+	def __init__(self, color, scale=1, thickness=1, font=cv2.FONT_HERSHEY_PLAIN, maxSprites=64):
+		self.color = color
+		self.scale = scale
+		self.thickness = thickness
+		self.font = font
+		self.maxSprites = maxSprites
+		self.sprites = {}
+
+	def get(self, text):
+		sprite = self.sprites.get(text)
+		if sprite is None:
+			if len(self.sprites) >= self.maxSprites:
+				del self.sprites[next(iter(self.sprites))]  # The oldest one
+			(w, h), baseline = cv2.getTextSize(text, self.font, self.scale, self.thickness)
+			pad = self.thickness + 1
+			sprite = self.sprites[text] = Layer(w + 2 * pad, h + baseline + 2 * pad)
+			sprite.text(text, (pad, pad + h), self.scale, self.color, self.thickness, self.font)
+			sprite.patches = [(px - pad, py - pad - h, *arrays) for px, py, *arrays in sprite.patches]  # Relative to org
+		return sprite
+
+	def draw(self, img, text, org):
+		self.get(text).blend(img, org[0], org[1])
+
+##################################################
+
+class HudOverlay():
+	"""Song title and progress bar.
+
+	The title, bar track and song length are rendered into a cached layer only when the song or the frame
+	size changes and composited with one blend per element; only the progress fill and elapsed time are drawn per frame.
+	barType 1 is the bar under the title with the times at its ends, 2 a full-width bar with "elapsed / length".
+	"""
+
+	def __init__(self, color=(53, 0, 0), seccolor=(255, 255, 255), barType=1):
+		self.color = color
+		self.seccolor = seccolor
+		self.barType = barType
+		self.key = None
+		self.layer = None
+		self.second = None  # Elapsed whole seconds the cached label shows
+		self.elapsed = ''
+
+	def _render(self, songName, songLength, w, h):
+		layer = Layer(w, h)
+		layer.text(songName, ((w - cv2.getTextSize(songName, cv2.FONT_HERSHEY_PLAIN, 2, 1)[0][0]) // 2, 500),
+		           2, self.color)
+		if self.barType == 1:
+			songBarY = 520
+			layer.line((100, songBarY), (w - 100, songBarY), self.color, 2)
+			layer.text(sec_to_min(songLength), (w - 90, songBarY + 4), 1, self.color)
+		elif self.barType == 2:
+			songBarY = 538
+			layer.line((0, songBarY), (w, songBarY), self.color, 5)
+		self.layer = layer
+
+	def draw(self, img, songName, songPlayTime, songLength):
+		h, w = img.shape[:2]
+		key = (songName, int(songLength), w, h)
+		if key != self.key:
+			self._render(songName, songLength, w, h)
+			self.key = key
+			self.second = None
+		self.layer.blend(img)
+		second = int(songPlayTime)
+		if second != self.second:  # Format the time once per second, not once per frame
+			self.second = second
+			self.elapsed = sec_to_min(second) if self.barType == 1 else f"{sec_to_min(second)} / {sec_to_min(songLength)}"
+
+		if self.barType == 1:
+			songBarY = 520
+			songPlayLength = np.interp(songPlayTime, [0, songLength or 1], [100, w - 100])
+			cv2.line(img, (100, songBarY), (int(songPlayLength), songBarY), self.seccolor, 2, lineType=cv2.LINE_AA)
+			cv2.putText(img, self.elapsed, (55, songBarY + 4), cv2.FONT_HERSHEY_PLAIN, 1, self.color, 1,
+			            lineType=cv2.LINE_AA)
+		elif self.barType == 2:
+			songBarY = 538
+			songPlayLength = np.interp(songPlayTime, [0, songLength or 1], [0, w])
+			cv2.line(img, (0, songBarY), (int(songPlayLength), songBarY), self.seccolor, 5, lineType=cv2.LINE_AA)
+			cv2.putText(img, self.elapsed, (w // 2 - 50, songBarY - 15), cv2.FONT_HERSHEY_PLAIN, 1, self.color, 1,
+			            lineType=cv2.LINE_AA)
+
+##################################################
+
+class LyricsOverlay():
+	"""The current lyrics line centered under the progress bar, with `context` lines before and after it dimmed.
+
+	The line is followed with Lyrics.find() from the last one, so a frame costs a couple of comparisons however
+	long the lyrics are. Lines are rendered into TextSprites before they are needed, one per frame (a render
+	takes about half a millisecond), in the styles the next line change calls for; drawing is then one blend
+	per visible line.
+	"""
+
+	def __init__(self, color=(53, 0, 0), currentColor=(255, 255, 255), context=1, y=590, spacing=28):
+		self.current = TextSprites(currentColor, scale=1.5, thickness=2, maxSprites=16)
+		self.others = TextSprites(color, scale=1.2, maxSprites=16)
+		self.context = context
+		self.y = y  # Baseline of the current line
+		self.spacing = spacing
+		self.lyrics = None
+		self.index = -1
+		self.ahead = []  # (sprites, line index) to render before the next line change
+
+	def draw(self, img, lyrics, position):
+		if lyrics is not self.lyrics:
+			self.lyrics, self.index, self.ahead = lyrics, -1, []
+		if lyrics is None or len(lyrics) == 0:
+			return
+		index = lyrics.find(position, self.index)
+		lines = lyrics.lines
+		if index != self.index:
+			self.index = index
+			# At the next change, line index + 1 becomes current, this one dims and one more scrolls in
+			self.ahead = [(self.current, index + 1), (self.others, index + self.context + 1)]
+			if self.context > 0:
+				self.ahead.append((self.others, index))
+		elif self.ahead:
+			sprites, i = self.ahead.pop()
+			if 0 <= i < len(lines) and lines[i]:
+				sprites.get(lines[i])
+		w = img.shape[1]
+		for i in range(max(index - self.context, 0), min(index + self.context + 1, len(lines))):
+			if lines[i]:
+				sprite = (self.current if i == index else self.others).get(lines[i])
+				sprite.blend(img, (w - sprite.width) // 2, self.y + (i - index) * self.spacing)
+
+##################################################
+
+class Heatmap():
+	"""Where hands have been: landmark hits in a coarse grid with exponential decay, shown as a colormap.
+
+	add() scatters a frame's landmarks into `cell`-pixel cells with one np.add.at and decays the grid so a hit
+	loses half its weight every `halfLife` seconds. The colored overlay is rebuilt at most every `refresh`
+	seconds (upsampled from the grid, transparent where nothing happened) and blended over the frame with the
+	same patch blend as the HUD, cropped to the cells that have hits.
+	"""
+
+	def __init__(self, cell=16, halfLife=30.0, refresh=0.5, opacity=0.5, colormap=cv2.COLORMAP_JET):
+		self.cell = cell
+		self.halfLife = halfLife
+		self.refresh = refresh
+		self.opacity = opacity
+		self.colormap = colormap
+		self.frameSize = None
+		self.grid = None  # (rows, cols) float32 hit weights
+		self.lastT = None
+		self.renderedAt = float('-inf')
+		self.patch = None  # (x, y, premultiplied, inverse) of the current overlay
+
+	def reset(self, width, height):
+		self.frameSize = (width, height)
+		self.grid = np.zeros((-(-height // self.cell), -(-width // self.cell)), np.float32)
+		self.lastT = None
+		self.patch = None
+
+	def add(self, landmarks, t, frameSize):
+		"""Accumulate (hands, 21, 2+) pixel landmarks seen at time t in a frame of frameSize (w, h)."""
+		if frameSize != self.frameSize:
+			self.reset(*frameSize)
+		if self.lastT is not None and t > self.lastT:
+			self.grid *= np.float32(0.5 ** ((t - self.lastT) / self.halfLife))
+		self.lastT = t
+		if len(landmarks) == 0:
+			return
+		rows, cols = self.grid.shape
+		xy = landmarks[..., :2].reshape(-1, 2).astype(np.int32) // self.cell
+		col = np.clip(xy[:, 0], 0, cols - 1)
+		row = np.clip(xy[:, 1], 0, rows - 1)
+		np.add.at(self.grid.reshape(-1), row * cols + col, 1)  # A view: repeated cells add up, unlike grid[idx] += 1
+
+	def draw(self, img, t):
+		if self.grid is None:
+			return
+		if t - self.renderedAt >= self.refresh or t < self.renderedAt:
+			self.renderedAt = t
+			self._render()
+		if self.patch is not None:
+			blend(img, *self.patch)
+
+	def export(self, path):
+		"""Save the grid (npz: grid, cell, frameSize) for placing controls, plus a colored PNG next to it."""
+		if self.grid is None:
+			return
+		np.savez_compressed(path, grid=self.grid, cell=self.cell, frameSize=np.array(self.frameSize, np.int32))
+		levels = self._levels(self.grid)
+		w, h = self.frameSize
+		cv2.imwrite(os.path.splitext(path)[0] + '.png',
+		            cv2.resize(cv2.applyColorMap(levels, self.colormap), (w, h), interpolation=cv2.INTER_NEAREST))
+
+	##################################################
+
+	def _levels(self, grid):
+		"""0-255 per cell; square root so a few very busy cells don't flatten the rest."""
+		peak = self.grid.max()
+		if peak <= 0:
+			return np.zeros(grid.shape, np.uint8)
+		return (np.sqrt(grid / peak) * 255).astype(np.uint8)
+
+	def _render(self):
+		rows, cols = np.nonzero(self._levels(self.grid) > 16)  # Faint cells stay transparent and outside the patch
+		if len(rows) == 0:
+			self.patch = None
+			return
+		r0, r1, c0, c1 = rows.min(), rows.max() + 1, cols.min(), cols.max() + 1
+		levels = self._levels(self.grid[r0:r1, c0:c1])
+		w, h = self.frameSize
+		x, y = int(c0 * self.cell), int(r0 * self.cell)
+		size = (min(int(c1 * self.cell), w) - x, min(int(r1 * self.cell), h) - y)
+		# Blend weights at grid resolution, then one uint8 resize each: the per-pixel work stays in OpenCV
+		alpha = levels[:, :, None].astype(np.float32) * (self.opacity / 255)
+		premultiplied = (cv2.applyColorMap(levels, self.colormap) * alpha).astype(np.uint8)
+		inverse = np.repeat((255 * (1 - alpha)).astype(np.uint8), 3, axis=2)
+		self.patch = (x, y, cv2.resize(premultiplied, size, interpolation=cv2.INTER_LINEAR),
+		              cv2.resize(inverse, size, interpolation=cv2.INTER_LINEAR))
@@ -0,0 +1,498 @@
+import io
+import time
+import threading
+import collections
+import numpy as np
+import pygame
+
+
+def sound_bytes(sound):
+	"""Decoded size of a pygame Sound at the mixer's sample format."""
+	frequency, size, channels = pygame.mixer.get_init()
+	return int(sound.get_length() * frequency) * channels * (abs(size) // 8)
+
+
+def decode_span(path, table, start, end):
+	"""Samples from `start` to `end` seconds into the MP3 at `path`, decoded from the frames around them only
+	(see SeekModule.FrameTable.span()), or None if it cannot be read.
+
+	They match the whole track's decode sample for sample when the mixer runs at the file's rate; SDL's
+	resampler does not line spans up, so check table.rate first.
+	"""
+	first, stop, drop = table.span(start, end)
+	try:
+		with open(path, 'rb') as f:
+			f.seek(first)
+			data = f.read() if stop is None else f.read(stop - first)
+		samples = pygame.sndarray.samples(pygame.mixer.Sound(file=io.BytesIO(data)))
+	except (pygame.error, OSError):
+		return None
+	return samples[drop:drop + int(round((end - start) * table.rate))]
+
+
+class Preloader():
+	"""Decodes tracks into pygame Sounds on a background thread and keeps them in an LRU cache.
+
+	SDL decodes outside the GIL, so the video loop keeps running while a track loads. It does hold the
+	mixer's lock, though, which stalls the playing track for a whole-file decode; with a SeekModule.FrameIndex
+	as `frames`, MP3s are decoded `chunk` seconds at a time with decode_span() instead, so the
+	lock is never held for more than a few milliseconds. Once the decoded audio exceeds `budget` bytes the
+	least recently used tracks are evicted, except the ones last passed to want().
+	"""
+
+	def __init__(self, budget, frames=None, chunk=2.0):
+		self.budget = budget
+		self.frames = frames
+		self.chunk = chunk
+		self.cache = collections.OrderedDict()  # path -> Sound, most recently used last
+		self.sizes = {}
+		self.used = 0
+		self.wanted = []  # Paths to keep decoded, most urgent first
+		self.failed = set()
+		self.cond = threading.Condition()
+		self.running = False
+		self.thread = None
+
+	def start(self):
+		self.running = True
+		self.thread = threading.Thread(target=self._run, name='Preloader', daemon=True)
+		self.thread.start()
+		return self
+
+	def want(self, paths):
+		with self.cond:
+			self.wanted = list(paths)
+			self.cond.notify_all()
+
+	def get(self, path):
+		"""The decoded Sound, or None while it is still loading (or failed to)."""
+		with self.cond:
+			sound = self.cache.get(path)
+			if sound is not None:
+				self.cache.move_to_end(path)
+			return sound
+
+	def stop(self):
+		with self.cond:
+			self.running = False
+			self.cond.notify_all()
+		if self.thread is not None:
+			self.thread.join(timeout=1.0)
+
+	##################################################
+
+	def _next(self):
+		return next((path for path in self.wanted if path not in self.cache and path not in self.failed), None)
+
+	def _evict(self):
+		for path in list(self.cache):
+			if self.used <= self.budget:
+				break
+			if path not in self.wanted:
+				del self.cache[path]
+				self.used -= self.sizes.pop(path)
+
+	def _decode(self, path):
+		"""The whole track as a Sound, in chunks when its frame table allows; None if it stopped being wanted."""
+		table = self.frames.get(path) if self.frames is not None else None
+		rate = pygame.mixer.get_init()[0]
+		if table is None or not table.duration or table.rate != rate:
+			return pygame.mixer.Sound(path)  # Holds the mixer's lock until the whole file is decoded
+		total = int(table.starts[-1] - table.delay - table.padding)
+		step = int(self.chunk * rate)
+		pcm = None
+		for first in range(0, total, step):
+			with self.cond:
+				if not self.running or path not in self.wanted:
+					return None
+			count = min(step, total - first)
+			samples = decode_span(path, table, first / rate, (first + count) / rate)
+			if samples is None or len(samples) != count:
+				return pygame.mixer.Sound(path)  # A damaged stretch: leave it to the whole-file decoder
+			if pcm is None:
+				pcm = np.empty((total,) + samples.shape[1:], samples.dtype)
+			pcm[first:first + count] = samples
+		return pygame.mixer.Sound(array=pcm)
+
+	def _run(self):
+		while True:
+			with self.cond:
+				path = self._next() if self.running else None
+				while path is None and self.running:
+					self.cond.wait()
+					path = self._next()
+				if not self.running:
+					break
+
+			try:
+				sound = self._decode(path)  # The slow part
+			except (pygame.error, OSError):
+				with self.cond:
+					self.failed.add(path)
+				continue
+			if sound is None:
+				continue  # No longer wanted
+
+			with self.cond:
+				self.cache[path] = sound
+				self.sizes[path] = sound_bytes(sound)
+				self.used += self.sizes[path]
+				self._evict()
+				self.cond.notify_all()
+
+####################################################################################################
+
+class PlaybackClock():
+	"""Position in the current track from time.perf_counter(), accounting for pauses and seeks."""
+
+	def __init__(self):
+		self.origin = 0.0  # perf_counter() at which the track was (or would have been) at position 0
+		self.pausedAt = None
+
+	def start(self, offset=0.0, now=None):
+		"""Running from `offset` seconds into the track."""
+		now = time.perf_counter() if now is None else now
+		self.origin = now - offset
+		self.pausedAt = None
+
+	def pause(self, now=None):
+		if self.pausedAt is None:
+			self.pausedAt = time.perf_counter() if now is None else now
+
+	def resume(self, now=None):
+		if self.pausedAt is not None:
+			self.origin += (time.perf_counter() if now is None else now) - self.pausedAt
+			self.pausedAt = None
+
+	def seek(self, offset):
+		"""Jump to `offset` seconds, keeping the pause state."""
+		if self.pausedAt is not None:
+			self.origin = self.pausedAt - offset
+		else:
+			self.start(offset)
+
+	def advance(self, seconds):
+		"""Move position 0 later by `seconds`, e.g. the previous track's length once a queued track takes over."""
+		self.origin += seconds
+
+	def position(self, now=None):
+		if self.pausedAt is not None:
+			return self.pausedAt - self.origin
+		return (time.perf_counter() if now is None else now) - self.origin
+
+##################################################
+
+class Player():
+	"""Plays the tracks of a PlaylistModule.Playlist from memory on two reserved mixer channels.
+
+	The tracks around the current one are decoded ahead by a Preloader, so a skip swaps buffers instead
+	of stopping, loading and restarting pygame.mixer.music on the video thread. A skip to a track that is
+	not decoded yet starts it from update() once it is. Natural track ends continue into the next track
+	without a gap (queued on the same channel) or, with `crossfade` seconds, faded in on the other channel.
+
+	Track ends are detected from the channels' end events (read with pump=False, so any thread may call
+	update()) or, when SDL's event queue is unavailable, once the clock passes the track length; neither
+	depends on how often update() runs. Tracks are identified by their playlist track id; natural ends move
+	the playlist on, while skips are decided by the caller (see skip()). `onTrackEnd(trackId)` is called on
+	the updating thread whenever a track played to its end.
+
+	A seek plays the next `seekWindow` seconds at once and queues the rest of the track behind them on the
+	next update(). With a SeekModule.FrameIndex as `frames`, a seek into an MP3 that is still decoding (the
+	second or so after a skip) plays windows decoded from the frames around the target, found by binary
+	search in the track's frame table, until the whole track is ready. Otherwise it is kept, and the track
+	starts there once decoded.
+	"""
+
+	def __init__(self, playlist, crossfade=0.0, budgetMB=256, preloadAround=1, queueAhead=1.0, endEvents=True,
+	             onTrackEnd=None, frames=None, seekWindow=2.0):
+		pygame.mixer.set_reserved(2)  # Keep Sound.play() from grabbing our channels
+		self.channels = [pygame.mixer.Channel(0), pygame.mixer.Channel(1)]
+		self.active = 0  # Channel of the current track; the other one fades out during a crossfade
+		self.playlist = playlist
+		self.crossfade = crossfade
+		self.preloadAround = preloadAround
+		self.queueAhead = queueAhead  # Seconds before the end at which the next track is queued
+		self.onTrackEnd = onTrackEnd
+		self.frames = frames
+		self.seekWindow = seekWindow  # Seconds played right after a seek, before the rest of the track is queued
+		self.preloader = Preloader(budgetMB * 2 ** 20, frames).start()
+		self.endEvent = self._endEvents() if endEvents else None
+
+		self.index = playlist.current  # Track id
+		self.track = None  # Decoded Sound of the current track
+		self.sound = None  # Sound on the channel: the track, or its tail after a seek
+		self.length = 0.0
+		self.pending = None  # Track id waiting for its decode before it can start
+		self.seekTo = None  # Position to continue from once the pending track is decoded
+		self.queued = None  # Track id queued behind the current track for a gapless switch
+		self.restAt = None  # After a seek: seconds into the track at which the sound on the channel stops
+		self.table = None  # SeekModule.FrameTable of a track played from windows while it is still decoding
+		self.volume = 1.0
+		self.paused = False
+		self.clock = PlaybackClock()
+
+	def play(self, trackId):
+		"""Start track `trackId` now, or as soon as it is decoded."""
+		if trackId is None:
+			return None  # Empty playlist
+		self.index = trackId
+		self.queued = None
+		self.seekTo = None
+		self.restAt = self.table = None
+		self.paused = False
+		self._prefetch()
+		sound = self.preloader.get(self.playlist.path(trackId))
+		if sound is None:
+			self.pending = self.index
+			self.track = self.sound = None
+			self.length = 0.0
+			for channel in self.channels:
+				channel.stop()
+		else:
+			self._start(sound)
+		return self.index
+
+	def skip(self, direction=1):
+		"""Move the playlist on (or back) and play that track."""
+		return self.play(self.playlist.next() if direction > 0 else self.playlist.prev())
+
+	def seek(self, seconds):
+		"""Continue the current track from `seconds` in (Sounds only play from their start, so this plays copies).
+
+		A seek to the end or past it ends the track as if it had played out.
+		"""
+		if self.track is None:
+			if self.pending is not None or self.restAt is not None:
+				self._seekUndecoded(max(seconds, 0.0))
+			return
+		seconds = max(seconds, 0.0)
+		frequency = pygame.mixer.get_init()[0]
+		samples = pygame.sndarray.samples(self.track)  # A view of the decoded track
+		start = int(seconds * frequency)
+		if start >= len(samples):
+			self.play(self._advance())  # No tail left, and pygame crashes on an empty Sound
+			return
+		end = start + int(self.seekWindow * frequency)
+		self._playFrom(pygame.mixer.Sound(array=samples[start:end]), seconds, end / frequency)
+
+	def pause(self):
+		if not self.paused:
+			self.paused = True
+			self.clock.pause()
+			for channel in self.channels:
+				channel.pause()
+
+	def resume(self):
+		if self.paused:
+			self.paused = False
+			self.clock.resume()
+			for channel in self.channels:
+				channel.unpause()
+
+	def setVolume(self, volume):
+		self.volume = volume
+		for channel in self.channels:
+			channel.set_volume(volume)
+
+	def position(self):
+		"""Seconds into the current track."""
+		return min(max(self.clock.position(), 0.0), self.length)
+
+	def update(self):
+		"""Start a pending track, and queue or crossfade into the next one near the end of the current."""
+		if self.restAt is not None:
+			self._queueRest()
+			return
+		if self.pending is not None:
+			path = self.playlist.path(self.pending)
+			sound = self.preloader.get(path)
+			if sound is not None:
+				seekTo = self.seekTo
+				self._start(sound)
+				if seekTo is not None:
+					self.seek(seekTo)
+			elif path in self.preloader.failed and len(self.preloader.failed) < len(self.playlist):
+				self.play(self._advance(finished=False))  # Unreadable file: move on
+			return
+		if self.sound is None or self.paused:
+			return
+
+		channel = self.channels[self.active]
+		remaining = self.length - self.clock.position()
+		ended = self._ended(channel, remaining)
+		if self.queued is not None:
+			if ended and channel.get_sound() is not self.sound:  # The queued track took over, sample-exact
+				self.clock.advance(self.length)
+				self._advance()
+				self.index, self.queued = self.queued, None
+				self.track = self.sound = channel.get_sound()
+				self.length = self.track.get_length()
+				self._prefetch()
+			return
+		if channel.get_queue() is not None:
+			return  # The rest of the track after a seek has yet to start
+
+		if remaining <= max(self.crossfade, self.queueAhead):
+			nextId = self.playlist.peek(1)
+			sound = self.preloader.get(self.playlist.path(nextId))
+			if sound is None:
+				if ended:
+					self.play(self._advance())  # Next track is late: it starts once decoded
+			elif self.crossfade > 0:
+				self.index = self._advance()
+				self._start(sound, fadeMs=int(max(remaining, 0) * 1000))
+				self._prefetch()
+			else:
+				channel.queue(sound)
+				self.queued = nextId
+		elif ended:
+			self.play(self._advance())
+
+	def close(self):
+		for channel in self.channels:
+			channel.stop()
+		self.preloader.stop()
+
+	##################################################
+
+	def _endEvents(self):
+		"""Have both channels post an event when a sound ends; pygame only posts them with the video subsystem up."""
+		try:
+			if not pygame.display.get_init():
+				pygame.display.init()  # No window is opened
+		except pygame.error:
+			return None  # No video driver: fall back to the clock
+		endEvent = pygame.event.custom_type()
+		for channel in self.channels:
+			channel.set_endevent(endEvent)
+		return endEvent
+
+	def _ended(self, channel, remaining):
+		"""Whether the current sound finished (or was replaced by the queued one) on the active channel."""
+		if self.endEvent is not None:
+			# Events also come from stopped or faded-out sounds, so they only tell when to look
+			if not pygame.event.get(self.endEvent, pump=False) and remaining > 0:
+				return False
+		elif remaining > 0:
+			return False
+		return channel.get_sound() is not self.sound or not channel.get_busy()
+
+	def _advance(self, finished=True):
+		"""Move the playlist to the next track at a natural end and return its id.
+
+		If the playlist no longer points at what is playing, a skip was just made elsewhere and its play()
+		is on the way, so the playlist is left alone.
+		"""
+		playlist = self.playlist
+		with playlist.lock:
+			if playlist.current == self.index:
+				if finished and self.onTrackEnd is not None:
+					self.onTrackEnd(self.index)
+				return playlist.next()
+			return playlist.current
+
+	def _prefetch(self):
+		"""Keep the current track and its neighbours decoded, nearest first (next before previous)."""
+		ids = [self.index]
+		for step in range(1, self.preloadAround + 1):
+			ids += [self.playlist.peek(step), self.playlist.peek(-step)]
+		self.preloader.want(dict.fromkeys(self.playlist.path(i) for i in ids if i is not None))
+
+	def _seekUndecoded(self, seconds):
+		"""Seek into a track that is still decoding: play a window of it decoded from its frame table, or keep the
+		target (clamped to the table's length, the clock held there) for when the track starts."""
+		path = self.playlist.path(self.index)
+		table = self.frames.get(path) if self.frames is not None else None
+		if table is not None and table.duration:
+			if seconds >= table.duration:
+				self.play(self._advance())
+				return
+			if table.rate == pygame.mixer.get_init()[0]:
+				end = min(seconds + self.seekWindow, table.duration)
+				samples = decode_span(path, table, seconds, end)
+				if samples is not None and len(samples):
+					self.pending = self.seekTo = None
+					self.table = table
+					self.length = table.duration
+					self._playFrom(pygame.mixer.Sound(array=samples), seconds, end)
+					return
+			self.length = table.duration
+			self.clock.start(seconds)
+			self.clock.pause()  # Nothing plays yet
+		if self.restAt is not None:  # The window could not be decoded: wait for the whole track after all
+			self.channels[self.active].stop()
+			self.pending, self.restAt = self.index, None
+		self.seekTo = seconds
+
+	def _playFrom(self, sound, seconds, restAt):
+		"""Play `sound`, the track from `seconds` to `restAt` seconds in; update() queues what follows."""
+		self.sound = sound
+		self.restAt = restAt
+		self.queued = None
+		channel = self.channels[self.active]
+		channel.play(sound)
+		self.clock.start(seconds)
+		if self.paused:
+			channel.pause()
+			self.clock.pause()
+
+	def _queueRest(self):
+		"""Queue what follows the sound played since a seek: the rest of the track once it is decoded, until then
+		its next window."""
+		channel = self.channels[self.active]
+		if self.endEvent is not None:
+			pygame.event.get(self.endEvent, pump=False)  # Copies and windows ending are not the track ending
+		if channel.get_queue() is not None:
+			return
+		frequency = pygame.mixer.get_init()[0]
+		path = self.playlist.path(self.index)
+		track = self.track if self.track is not None else self.preloader.get(path)
+		if track is not None:
+			samples = pygame.sndarray.samples(track)
+			start = int(round(self.restAt * frequency))
+			self.track = track
+			self.length = track.get_length()
+			self.restAt = self.table = None
+			if start < len(samples):  # Otherwise the sound playing ends the track
+				self.sound = pygame.mixer.Sound(array=samples[start:])
+				self._continue(channel, self.sound)
+			return
+		if self.restAt >= self.length:
+			if not channel.get_busy():
+				self.play(self._advance())  # Played to the end before the decode finished
+			return
+		end = min(self.restAt + self.seekWindow, self.length)
+		samples = decode_span(path, self.table, self.restAt, end)
+		if samples is None or not len(samples):
+			self.play(self._advance(finished=False))  # Unreadable from here: move on
+			return
+		self.sound = pygame.mixer.Sound(array=samples)
+		self.restAt = end
+		self._continue(channel, self.sound)
+
+	def _continue(self, channel, sound):
+		if channel.get_busy():  # Also while paused
+			channel.queue(sound)
+		else:
+			channel.play(sound)  # The previous one ran out already
+			if self.paused:
+				channel.pause()
+
+	def _start(self, sound, fadeMs=0):
+		self.pending = None
+		self.seekTo = None
+		self.restAt = self.table = None
+		self.track = self.sound = sound
+		self.length = sound.get_length()
+		self.clock.start()
+		if fadeMs > 0:
+			self.channels[self.active].fadeout(fadeMs)
+			self.active = 1 - self.active
+		else:
+			self.channels[1 - self.active].stop()
+		channel = self.channels[self.active]
+		channel.set_volume(self.volume)
+		channel.play(sound, fade_ms=fadeMs)
+		if self.paused:  # Paused while the track was decoding
+			channel.pause()
+			self.clock.pause()
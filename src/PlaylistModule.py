@@ -0,0 +1,231 @@
+import os
+import array
+import random
+import threading
+import collections
+
+
+AUDIO_EXTENSIONS = ('.mp3',)
+
+
+def scan_library(folderPath, extensions=AUDIO_EXTENSIONS):
+	"""Yield audio file paths under folderPath as they are found, depth first, in name order per folder."""
+	stack = [folderPath]
+	while stack:
+		folder = stack.pop()
+		try:
+			with os.scandir(folder) as it:
+				entries = sorted(it, key=lambda entry: entry.name)
+		except OSError:
+			continue  # Unreadable folder: skip it, keep scanning
+		subfolders = []
+		for entry in entries:
+			if entry.is_dir(follow_symlinks=False):
+				if not entry.name.startswith('.'):
+					subfolders.append(entry.path)
+			elif entry.name.lower().endswith(extensions):
+				yield entry.path.replace("\\", "/")
+		stack.extend(reversed(subfolders))  # Visit subfolders in name order
+
+
+class PathTable():
+	"""Track paths stored compactly: folders interned once, file names packed into one UTF-8 buffer.
+
+	A track is identified by its id (position in the table); 100k tracks cost a few MB instead of
+	100k Python strings.
+	"""
+
+	def __init__(self):
+		self.folders = []
+		self.folderIds = {}
+		self.trackFolders = array.array('I')  # Folder id per track
+		self.names = bytearray()  # File names, back to back
+		self.offsets = array.array('Q', [0])  # Track i's name is names[offsets[i]:offsets[i + 1]]
+
+	def __len__(self):
+		return len(self.trackFolders)
+
+	def __getitem__(self, trackId):
+		if not 0 <= trackId < len(self.trackFolders):
+			raise IndexError(trackId)
+		name = self.names[self.offsets[trackId]:self.offsets[trackId + 1]].decode('utf-8')
+		return f"{self.folders[self.trackFolders[trackId]]}/{name}"
+
+	def add(self, path):
+		"""Store a path and return its track id."""
+		folder, name = path.rsplit('/', 1) if '/' in path else ('.', path)
+		folderId = self.folderIds.get(folder)
+		if folderId is None:
+			folderId = self.folderIds[folder] = len(self.folders)
+			self.folders.append(folder)
+		self.trackFolders.append(folderId)
+		self.names += name.encode('utf-8')
+		self.offsets.append(len(self.names))
+		return len(self.trackFolders) - 1
+
+####################################################################################################
+
+class Playlist():
+	"""Play order over a growing set of track ids, with an up-next queue and a bounded history.
+
+	`order` is a permutation of all track ids (library order, or shuffled without repeats) and `position`
+	the current slot in it, so next/prev are O(1). Tracks queued with enqueue() play before the order
+	continues; history remembers where each played track came from so prev() retraces what was heard.
+	Tracks can be added while playing (see scan()); shuffled additions land at a random not-yet-played slot.
+	Every added track is registered with the RecommendModule.Recommender, if given; with `weighted`, tracks
+	after the queue are its weighted random picks instead, drawn ahead into `lookahead` so peek() and next()
+	agree. All methods are thread-safe.
+	"""
+
+	def __init__(self, shuffle=False, historySize=200, seed=None, recommender=None, weighted=False):
+		self.paths = PathTable()
+		self.order = array.array('I')
+		self.position = 0  # Slot in `order` of the current track (when it came from the order)
+		self.current = None  # Track id playing now
+		self.queue = collections.deque()  # Up-next track ids
+		self.history = collections.deque(maxlen=historySize)  # (track id, position) of earlier tracks
+		self.recommender = recommender
+		if recommender is not None:
+			recommender.playlist = self  # Paths for its stats file
+		self.weighted = weighted and recommender is not None
+		self.lookahead = collections.deque()  # Weighted picks not played yet
+		self.subscribers = []  # Called with (track id, path) for every added track
+		self.shuffled = shuffle
+		self.random = random.Random(seed)
+		self.lock = threading.RLock()
+		self.scanned = threading.Event()  # Set when scan() has walked the whole library
+
+	def __len__(self):
+		return len(self.order)
+
+	def path(self, trackId):
+		return self.paths[trackId]
+
+	def add(self, path):
+		"""Add a track and return its id."""
+		with self.lock:
+			trackId = self.paths.add(path)
+			self.order.append(trackId)
+			if self.recommender is not None:
+				self.recommender.add(trackId, path)
+			for callback in self.subscribers:
+				callback(trackId, path)
+			if self.shuffled:
+				# Swap into a random slot after the current one, so it still plays once before the order repeats
+				start = self.position + 1
+				if start < len(self.order):
+					slot = self.random.randrange(start, len(self.order))
+					self.order[slot], self.order[-1] = self.order[-1], self.order[slot]
+			if self.current is None:
+				self.current = self.order[self.position]
+			return trackId
+
+	def scan(self, folderPath, extensions=AUDIO_EXTENSIONS, firstTrack=None):
+		"""Add every audio file under folderPath on a background thread; returns the thread.
+
+		`firstTrack` (an Event) is set as soon as one track is available, so playback can start right away.
+		"""
+		def run():
+			for path in scan_library(folderPath, extensions):
+				self.add(path)
+				if firstTrack is not None and not firstTrack.is_set():
+					firstTrack.set()
+			self.scanned.set()
+			if firstTrack is not None:
+				firstTrack.set()  # Empty library: stop waiting anyway
+
+		thread = threading.Thread(target=run, name='LibraryScan', daemon=True)
+		thread.start()
+		return thread
+
+	def subscribe(self, callback):
+		"""Call callback(trackId, path) for every track already added and every one added later, in id order."""
+		with self.lock:
+			for trackId in range(len(self.paths)):
+				callback(trackId, self.paths[trackId])
+			self.subscribers.append(callback)
+
+	def shuffle(self, enabled=True):
+		"""Shuffle (or restore library order for) everything after the current track."""
+		with self.lock:
+			self.shuffled = enabled
+			if not self.order:
+				return
+			if enabled:
+				# Fisher-Yates over the slots after the current one
+				for i in range(len(self.order) - 1, self.position + 1, -1):
+					j = self.random.randint(self.position + 1, i)
+					self.order[i], self.order[j] = self.order[j], self.order[i]
+			else:
+				self.order = array.array('I', range(len(self.order)))
+				if self.current is not None:
+					self.position = self.current  # Library order: slot == id
+
+	def enqueue(self, trackId):
+		with self.lock:
+			self.queue.append(trackId)
+
+	def peek(self, step=1):
+		"""Track id `step` tracks ahead (queue first, then the order) or behind (history first) without moving."""
+		with self.lock:
+			if not self.order:
+				return None
+			if step > 0:
+				if step <= len(self.queue):
+					return self.queue[step - 1]
+				if self.weighted:
+					self._draw(step - len(self.queue))
+					return self.lookahead[step - len(self.queue) - 1]
+				return self.order[(self.position + step - len(self.queue)) % len(self.order)]
+			if -step <= len(self.history):
+				return self.history[step][0]
+			return self.order[(self.position + step + len(self.history)) % len(self.order)]
+
+	def next(self):
+		"""Move to and return the next track id."""
+		with self.lock:
+			if not self.order:
+				return None
+			if self.current is not None:
+				self.history.append((self.current, self.position))
+			if self.queue:
+				self.current = self.queue.popleft()  # Queued tracks don't move the position in the order
+			elif self.weighted:
+				self._draw(1)
+				self.current = self.lookahead.popleft()
+			else:
+				self.position = (self.position + 1) % len(self.order)
+				self.current = self.order[self.position]
+			return self.current
+
+	def prev(self):
+		"""Move back to and return the previous track id."""
+		with self.lock:
+			if not self.order:
+				return None
+			if self.weighted and self.current is not None:
+				self.lookahead.appendleft(self.current)  # next() comes back here, as it does in the order
+			if self.history:
+				self.current, self.position = self.history.pop()
+			else:
+				self.position = (self.position - 1) % len(self.order)
+				self.current = self.order[self.position]
+			return self.current
+
+	def jump(self, trackId):
+		"""Play a specific track now; the order continues after it."""
+		with self.lock:
+			if self.current is not None:
+				self.history.append((self.current, self.position))
+			self.current = trackId
+			if not self.shuffled:
+				self.position = trackId
+			return trackId
+
+	##################################################
+
+	def _draw(self, count):
+		"""Make sure `lookahead` holds at least `count` weighted picks, none repeating the track before it."""
+		while len(self.lookahead) < count:
+			previous = self.lookahead[-1] if self.lookahead else self.current
+			self.lookahead.append(self.recommender.pick(exclude=previous))
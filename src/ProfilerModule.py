@@ -0,0 +1,93 @@
+import time
+import contextlib
+import numpy as np
+
+
+class StageTimer():
+	"""Collects per-stage durations into preallocated arrays and summarizes them as percentiles."""
+
+	def __init__(self, capacity=10000):
+		self.capacity = capacity  # Samples kept per stage; older ones are overwritten
+		self.samples = {}
+		self.counts = {}
+		self.order = []  # Stages in the order they were first seen
+
+	def add(self, name, seconds):
+		samples = self.samples.get(name)
+		if samples is None:
+			samples = self.samples[name] = np.zeros(self.capacity, np.float64)
+			self.counts[name] = 0
+			self.order.append(name)
+		samples[self.counts[name] % self.capacity] = seconds
+		self.counts[name] += 1
+
+	@contextlib.contextmanager
+	def stage(self, name):
+		start = time.perf_counter()
+		yield
+		self.add(name, time.perf_counter() - start)
+
+	def summary(self):
+		"""{stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, throughput_hz}}"""
+		stats = {}
+		for name in self.order:
+			samples = self.samples[name][:min(self.counts[name], self.capacity)]
+			p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+			mean = samples.mean()
+			stats[name] = {'count': self.counts[name], 'mean_ms': mean * 1e3, 'p50_ms': p50 * 1e3,
+			               'p95_ms': p95 * 1e3, 'p99_ms': p99 * 1e3, 'max_ms': samples.max() * 1e3,
+			               'throughput_hz': 1 / mean if mean > 0 else float('inf')}
+		return stats
+
+##################################################
+
+class FpsCounter():
+	"""Moving average of the instantaneous frame rate over the last `window` frames."""
+
+	def __init__(self, window=30):
+		self.values = np.zeros(window, np.float64)
+		self.n = 0
+		self.pTime = 0
+
+	def tick(self):
+		cTime = time.time()
+		fps = round(1 / (cTime - self.pTime), 3) if cTime != self.pTime else 0
+		self.pTime = cTime
+		self.values[self.n % len(self.values)] = fps
+		self.n += 1
+		return self.values[:min(self.n, len(self.values))].mean()
+
+##################################################
+
+class StartupTimer():
+	"""Startup breakdown: time per phase (excluding phases nested in it) and milestones since `start`."""
+
+	def __init__(self, start=None):
+		self.start = time.perf_counter() if start is None else start
+		self.phases = {}  # Name -> seconds, in the order they first finished
+		self.marks = {}
+		self.stack = []  # [name, started, seconds spent in nested phases]
+
+	def add(self, name, seconds):
+		self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+	@contextlib.contextmanager
+	def phase(self, name):
+		entry = [name, time.perf_counter(), 0.0]
+		self.stack.append(entry)
+		try:
+			yield
+		finally:
+			self.stack.pop()
+			total = time.perf_counter() - entry[1]
+			self.add(name, total - entry[2])
+			if self.stack:
+				self.stack[-1][2] += total
+
+	def mark(self, name):
+		self.marks[name] = time.perf_counter() - self.start
+
+	def report(self):
+		parts = [f"{name} {seconds * 1e3:.0f} ms" for name, seconds in self.phases.items()]
+		parts += [f"{name} at {seconds * 1e3:.0f} ms" for name, seconds in self.marks.items()]
+		return "Startup: " + ", ".join(parts)
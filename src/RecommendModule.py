@@ -0,0 +1,154 @@
+import os
+import json
+import array
+import random
+import threading
+
+
+STATS_VERSION = 1
+STATS_FILE = '.track_stats.json'
+
+
+class FenwickTree():
+	"""Prefix sums over a growing array of non-negative weights: add, append and search are all O(log n)."""
+
+	def __init__(self):
+		self.tree = array.array('d', [0.0])  # 1-based; tree[i] covers (i - lowbit(i), i]
+		self.values = array.array('d')
+
+	def __len__(self):
+		return len(self.values)
+
+	def total(self):
+		return self.prefix(len(self.values))
+
+	def prefix(self, n):
+		"""Sum of the first n values."""
+		s = 0.0
+		while n > 0:
+			s += self.tree[n]
+			n &= n - 1
+		return s
+
+	def append(self, value):
+		"""Add a value at the end; its node holds it plus the sums of the nodes it covers."""
+		n = len(self.values) + 1
+		self.values.append(value)
+		self.tree.append(value + self.prefix(n - 1) - self.prefix(n - (n & -n)))
+
+	def add(self, i, delta):
+		self.values[i] += delta
+		i += 1
+		while i < len(self.tree):
+			self.tree[i] += delta
+			i += i & -i
+
+	def set(self, i, value):
+		self.add(i, value - self.values[i])
+
+	def find(self, target):
+		"""Smallest index whose prefix sum (including itself) exceeds target, for 0 <= target < total()."""
+		i, step = 0, 1 << (len(self.tree) - 1).bit_length()
+		while step:
+			j = i + step
+			if j < len(self.tree) and self.tree[j] <= target:
+				i = j
+				target -= self.tree[j]
+			step >>= 1
+		return min(i, len(self.values) - 1)  # Guards against float rounding at the very end
+
+####################################################################################################
+
+class Recommender():
+	"""Weighted random track picks that learn from how tracks were left.
+
+	Each track's weight is (plays + 1) / (skips + 1): a quick skip makes it come up less often, a full
+	play more often. Weights live in a FenwickTree and play/skip counts in arrays, all indexed by playlist
+	track id, so a pick and a weight update are both O(log n) and no path is stored twice. The counts are
+	kept per path in a JSON file next to the songs and survive restarts: paths are looked up in the
+	`playlist` (set by the Playlist the recommender is given to) only when saving. Thread-safe: the video
+	thread records skips, the audio thread records full plays.
+	"""
+
+	def __init__(self, folderPath, statsFile=None, seed=None):
+		self.statsFile = statsFile or os.path.join(folderPath, STATS_FILE)
+		self.stored = {}  # path -> [plays, skips] from the file, for tracks not added (yet)
+		self.plays = array.array('I')  # Track id -> full plays
+		self.skips = array.array('I')  # Track id -> skips
+		self.weights = FenwickTree()
+		self.playlist = None
+		self.random = random.Random(seed)
+		self.lock = threading.Lock()
+		self.dirty = False
+		self.load()
+
+	def load(self):
+		try:
+			with open(self.statsFile, 'r', encoding='utf-8') as f:
+				data = json.load(f)
+		except (OSError, ValueError):
+			return
+		if data.get('version') == STATS_VERSION:
+			self.stored = data.get('tracks', {})
+
+	def save(self):
+		"""Write the stats atomically, like the library index."""
+		with self.lock:
+			if not self.dirty or self.playlist is None:
+				return
+			tracks = dict(self.stored)  # Tracks missing this session keep their counts
+			for trackId, (plays, skips) in enumerate(zip(self.plays, self.skips)):
+				if plays or skips:
+					tracks[self.playlist.path(trackId)] = [plays, skips]
+			data = {'version': STATS_VERSION, 'tracks': tracks}
+			self.dirty = False
+		tmpFile = self.statsFile + '.tmp'
+		try:
+			with open(tmpFile, 'w', encoding='utf-8') as f:
+				json.dump(data, f, separators=(',', ':'))
+			os.replace(tmpFile, self.statsFile)
+		except OSError as e:
+			print(f"Warning: could not write track stats {self.statsFile}: {e}")
+
+	@staticmethod
+	def weight(plays, skips):
+		return (plays + 1) / (skips + 1)
+
+	def add(self, trackId, path):
+		"""Register a playlist track; ids must arrive in order (0, 1, 2, ...)."""
+		with self.lock:
+			assert trackId == len(self.plays)
+			plays, skips = self.stored.pop(path, (0, 0))
+			self.plays.append(plays)
+			self.skips.append(skips)
+			self.weights.append(self.weight(plays, skips))
+
+	def played(self, trackId):
+		"""The track played to its end."""
+		self._record(trackId, self.plays)
+
+	def skipped(self, trackId):
+		"""The track was skipped soon after it started."""
+		self._record(trackId, self.skips)
+
+	def pick(self, exclude=None):
+		"""Random track id with probability proportional to its weight, avoiding `exclude` when possible."""
+		with self.lock:
+			n = len(self.weights)
+			if n == 0:
+				return None
+			for _ in range(4):
+				trackId = self.weights.find(self.random.random() * self.weights.total())
+				if trackId != exclude or n == 1:
+					return trackId
+			return (exclude + 1) % n  # Dominant weight on the excluded track: just take its neighbour
+
+	##################################################
+
+	def _record(self, trackId, counts):
+		with self.lock:
+			if trackId is None or trackId >= len(counts):
+				return
+			counts[trackId] += 1
+			self.weights.set(trackId, self.weight(self.plays[trackId], self.skips[trackId]))
+			self.dirty = True
@@ -0,0 +1,154 @@
+import os
+import cv2
+import time
+import collections
+import numpy as np
+import InferenceModule as inf
+
+
+FRAMES_FILE = 'frames.avi'
+LANDMARKS_FILE = 'landmarks.npz'
+
+# Columnar landmark stream: one row per frame, landmarks normalized to the frame size
+Recording = collections.namedtuple('Recording', ['timestamps', 'frameIds', 'counts', 'landmarks',
+                                                 'handedness', 'scores', 'frameSize', 'videoPath'])
+
+
+class Recorder():
+	"""Saves raw frames (MJPG video) and per-frame landmarks + timestamps into a recording folder."""
+
+	def __init__(self, path, fps=30, saveFrames=True, maxHands=2, capacity=1024):
+		os.makedirs(path, exist_ok=True)
+		self.path = path
+		self.fps = fps
+		self.saveFrames = saveFrames
+		self.writer = None
+		self.frameSize = None
+		self.n = 0
+		self.timestamps = np.zeros(capacity, np.float64)
+		self.frameIds = np.zeros(capacity, np.int64)
+		self.counts = np.zeros(capacity, np.int8)
+		self.landmarks = np.zeros((capacity, maxHands, inf.NUM_LANDMARKS, 3), np.float32)
+		self.handedness = np.zeros((capacity, maxHands), np.int8)
+		self.scores = np.zeros((capacity, maxHands), np.float32)
+
+	def add(self, img, detector, timestamp, frameId=-1):
+		"""Record one frame (before any overlay is drawn) and the landmarks the gesture logic sees for it."""
+		h, w = img.shape[:2]
+		if self.frameSize is None:
+			self.frameSize = (w, h)
+			if self.saveFrames:
+				self.writer = cv2.VideoWriter(os.path.join(self.path, FRAMES_FILE),
+				                              cv2.VideoWriter_fourcc(*'MJPG'), self.fps, (w, h))
+		if self.writer is not None:
+			self.writer.write(img)
+
+		if self.n == len(self.timestamps):
+			self._grow()
+		i, count = self.n, detector.count
+		self.timestamps[i] = timestamp
+		self.frameIds[i] = frameId
+		self.counts[i] = count
+		self.landmarks[i, :count] = detector.landmarks / np.array([w, h, 1], np.float32)
+		self.handedness[i, :count] = detector.handedness
+		self.scores[i, :count] = detector.scores
+		self.n += 1
+
+	def close(self):
+		if self.writer is not None:
+			self.writer.release()
+			self.writer = None
+		n = self.n
+		np.savez_compressed(os.path.join(self.path, LANDMARKS_FILE), timestamps=self.timestamps[:n],
+		                    frameIds=self.frameIds[:n], counts=self.counts[:n], landmarks=self.landmarks[:n],
+		                    handedness=self.handedness[:n], scores=self.scores[:n],
+		                    frameSize=np.array(self.frameSize or (0, 0), np.int32))
+
+	def _grow(self):
+		for name in ('timestamps', 'frameIds', 'counts', 'landmarks', 'handedness', 'scores'):
+			array = getattr(self, name)
+			grown = np.zeros((2 * len(array),) + array.shape[1:], array.dtype)
+			grown[:len(array)] = array
+			setattr(self, name, grown)
+
+
+####################################################################################################
+
+def load_recording(path):
+	with np.load(os.path.join(path, LANDMARKS_FILE)) as data:
+		columns = {name: data[name] for name in data.files}
+	videoPath = os.path.join(path, FRAMES_FILE)
+	return Recording(columns['timestamps'], columns['frameIds'], columns['counts'], columns['landmarks'],
+	                 columns['handedness'], columns['scores'], tuple(columns['frameSize'].tolist()),
+	                 videoPath if os.path.exists(videoPath) else None)
+
+##################################################
+
+class RecordingSource():
+	"""Frame source that replays a recording's video, or blank frames when only landmarks are needed.
+
+	Exposes the recorded capture time of each frame as `timestamp`, so replays are deterministic.
+	Plays as fast as possible unless realtime=True.
+	"""
+
+	def __init__(self, recording, useVideo=True, realtime=False):
+		self.recording = recording
+		self.video = cv2.VideoCapture(recording.videoPath) if useVideo and recording.videoPath else None
+		self.realtime = realtime
+		self.index = 0
+		self.timestamp = 0.0
+		w, h = recording.frameSize
+		self.blank = np.zeros((h, w, 3), np.uint8)
+		self.startWall = None
+
+	def read(self):
+		if self.index >= len(self.recording.timestamps):
+			return False, None
+		if self.video is not None:
+			success, img = self.video.read()
+			if not success:
+				return False, None
+		else:
+			img = self.blank.copy()
+
+		self.timestamp = float(self.recording.timestamps[self.index])
+		if self.realtime:
+			if self.startWall is None:
+				self.startWall = time.perf_counter() - self.timestamp
+			delay = self.startWall + self.timestamp - time.perf_counter()
+			if delay > 0:
+				time.sleep(delay)
+		self.index += 1
+		return True, img
+
+	def release(self):
+		if self.video is not None:
+			self.video.release()
+
+##################################################
+
+class ReplayBackend():
+	"""Inference backend that returns the recorded landmarks frame by frame instead of running MediaPipe."""
+
+	def __init__(self, recording):
+		self.recording = recording
+		self.index = 0
+		self.pending = collections.deque()
+		self.results = None
+
+	def submit(self, img, tag=None):
+		rec, i = self.recording, min(self.index, len(self.recording.counts) - 1)
+		self.index += 1
+		self.pending.append(inf.Result(tag, int(rec.counts[i]), rec.landmarks[i], rec.handedness[i], rec.scores[i], 0.0))
+
+	def collect(self, block=True):
+		return self.pending.popleft() if self.pending else None
+
+	def inFlight(self):
+		return len(self.pending)
+
+	def setParams(self, params):
+		pass
+
+	def close(self):
+		pass
@@ -0,0 +1,233 @@
+import re
+import time
+import wave
+import array
+import queue
+import threading
+import collections
+import numpy as np
+import GestureModule as gm
+import LibraryIndexModule as lib
+
+
+# A voice or typed request to play a specific track; handled next to the gesture events
+PlayTrack = collections.namedtuple('PlayTrack', ['trackId', 'query', 'score', 't'])
+
+FILLER_WORDS = {'by', 'ft', 'feat', 'featuring', 'the', 'song', 'track', 'please'}
+PLAY_WORDS = ('play', 'put on', 'queue')
+WAKE_WORD = 'jarvis'  # AudioToTextRecorder's wake word, which may end up in the transcription
+
+
+def normalize(text):
+	"""Lowercase words without punctuation or underscores."""
+	return re.sub(r'[^0-9a-z]+', ' ', text.lower().replace('_', ' ')).strip()
+
+
+def trigrams(text):
+	"""Distinct character trigrams of each word, padded so word starts and ends count too."""
+	grams = set()
+	for word in text.split():
+		word = f" {word} "  # One space each side: '  x' grams would match a 26th of the library
+		grams.update(word[i:i + 3] for i in range(len(word) - 2))
+	return grams
+
+
+def track_text(path):
+	"""Searchable text of a song file: the title, artist and features format_song_title shows."""
+	title, artist, features = lib.split_song_name(lib.song_name(path).split('_'))
+	return normalize(f"{title} {artist} {features}")
+
+####################################################################################################
+
+class SearchIndex():
+	"""Trigram inverted index over track names with ranked fuzzy lookups.
+
+	Each trigram maps to an array of track ids (postings), and each track keeps its trigram ids (forward
+	index). A query takes its candidates from its rarest trigrams, then counts for each candidate the
+	trigrams it shares with the query from the forward index, and ranks by the Dice coefficient
+	2 * shared / (query trigrams + track trigrams), so typos and missing words still find the track.
+	Common trigrams never have their postings read, and at most a few hundred candidates are scored, which
+	keeps a lookup's work around 0.3 ms on 100k tracks. Tracks can be added while searching.
+	"""
+
+	def __init__(self):
+		self.gramIds = {}  # trigram -> id
+		self.postings = []  # Per trigram id: array('I') of track ids, in id order
+		self.grams = array.array('I')  # Trigram ids of every track, back to back
+		self.offsets = array.array('Q', [0])  # Track i's trigrams are grams[offsets[i]:offsets[i + 1]]
+		self.lock = threading.Lock()
+
+	def __len__(self):
+		return len(self.offsets) - 1
+
+	def add(self, trackId, path):
+		"""Index a track; ids must arrive in order (0, 1, 2, ...), as PlaylistModule.Playlist.subscribe() gives them."""
+		grams = trigrams(track_text(path))
+		with self.lock:
+			assert trackId == len(self.offsets) - 1
+			for gram in grams:
+				gramId = self.gramIds.get(gram)
+				if gramId is None:
+					gramId = self.gramIds[gram] = len(self.postings)
+					self.postings.append(array.array('I'))
+				self.postings[gramId].append(trackId)
+				self.grams.append(gramId)
+			self.offsets.append(len(self.grams))
+
+	def search(self, query, limit=5, minScore=0.3, candidateBudget=3000, maxCandidates=300):
+		"""Best matching (trackId, score) pairs, best first.
+
+		Candidates are the tracks in the postings of the query's rarest trigrams, as many as fit in
+		`candidateBudget` ids (at least three trigrams), and at most the `maxCandidates` sharing the most
+		of those are scored. A track sharing nothing but the most common trigrams with the query is missed,
+		but it would not rank anyway.
+		"""
+		words = [word for word in normalize(query).split() if word not in FILLER_WORDS]
+		grams = trigrams(' '.join(words))
+		if not grams:
+			return []
+		with self.lock:
+			gramIds = [self.gramIds[gram] for gram in grams if gram in self.gramIds]  # Misspelled parts drop out
+			if not gramIds:
+				return []
+			gramIds.sort(key=lambda gramId: len(self.postings[gramId]))
+			rare, total = 0, 0
+			while rare < len(gramIds) and (rare < 3 or total + len(self.postings[gramIds[rare]]) <= candidateBudget):
+				total += len(self.postings[gramIds[rare]])
+				rare += 1
+			candidates, shared = np.unique(np.concatenate([np.frombuffer(self.postings[gramId], np.uint32)
+			                                               for gramId in gramIds[:rare]]), return_counts=True)
+			if rare < len(gramIds):
+				if len(candidates) > maxCandidates:
+					candidates = candidates[np.argpartition(-shared, maxCandidates)[:maxCandidates]]
+				# Count every shared trigram from the candidates' forward entries
+				offsets = np.frombuffer(self.offsets, np.uint64)
+				starts = offsets[candidates].astype(np.int64)
+				sizes = offsets[candidates + 1].astype(np.int64) - starts
+				ends = np.cumsum(sizes)
+				positions = np.arange(ends[-1]) + np.repeat(starts - (ends - sizes), sizes)
+				inQuery = np.zeros(len(self.postings), bool)
+				inQuery[gramIds] = True
+				shared = np.add.reduceat(inQuery[np.frombuffer(self.grams, np.uint32)[positions]], ends - sizes)
+			else:
+				offsets = np.frombuffer(self.offsets, np.uint64)
+				sizes = offsets[candidates + 1].astype(np.int64) - offsets[candidates].astype(np.int64)
+			del offsets  # Release the array buffers before add() may grow them
+		scores = 2.0 * shared / (len(grams) + sizes)
+		if len(candidates) > limit:
+			best = np.argpartition(-scores, limit)[:limit]
+			candidates, scores = candidates[best], scores[best]
+		ranked = sorted(zip(scores.tolist(), candidates.tolist()), key=lambda pair: (-pair[0], pair[1]))
+		return [(trackId, score) for score, trackId in ranked if score >= minScore]
+
+####################################################################################################
+
+def parse_command(text, index, t=None):
+	"""Turn a transcribed or typed phrase into a player event (GestureModule events or PlayTrack), or None."""
+	t = time.perf_counter() if t is None else t
+	phrase = normalize(text)
+	if phrase.startswith(WAKE_WORD):
+		phrase = phrase[len(WAKE_WORD):].lstrip()
+	if phrase in ('next', 'next song', 'skip'):
+		return gm.NextTrack(t)
+	if phrase in ('previous', 'previous song', 'back', 'go back'):
+		return gm.PrevTrack(t)
+	if phrase in ('pause', 'stop'):
+		return gm.Pause(t)
+	if phrase in ('resume', 'play', 'continue'):
+		return gm.Resume(t)
+	for word in PLAY_WORDS:
+		if phrase.startswith(word + ' '):
+			phrase = phrase[len(word) + 1:]
+			break
+	matches = index.search(phrase, limit=1)
+	if not matches:
+		return None
+	trackId, score = matches[0]
+	return PlayTrack(trackId, phrase, score, t)
+
+
+def wav_chunks(path, frames=1024):
+	"""Yield (chunk, sampleRate) blocks of 16-bit mono PCM from a WAV file."""
+	with wave.open(path, 'rb') as f:
+		if f.getsampwidth() != 2 or f.getnchannels() != 1:
+			raise ValueError(f"{path}: expected 16-bit mono PCM")
+		rate = f.getframerate()
+		while True:
+			chunk = f.readframes(frames)
+			if not chunk:
+				break
+			yield chunk, rate
+
+
+class VoiceCommands():
+	"""Background consumer that turns transcriptions into player events without touching the frame loop.
+
+	A thread blocks on `recorder.text()` (a RealtimeSTT AudioToTextRecorder, or anything with that method)
+	and queues the parsed events; the frame loop drains them with poll(), which never waits. submit() feeds
+	typed text the same way, and feedWav() streams a prerecorded WAV file into a recorder created with
+	use_microphone=False, so both paths work without a live mic.
+	"""
+
+	def __init__(self, index, recorder=None):
+		self.index = index
+		self.recorder = recorder
+		self.events = queue.SimpleQueue()
+		self.running = False
+		self.threads = []
+
+	def start(self):
+		self.running = True
+		if self.recorder is not None:
+			self._spawn(self._listen, 'VoiceCommands')
+		return self
+
+	def submit(self, text):
+		"""Parse a phrase and queue its event; safe from any thread. Returns the event (or None)."""
+		event = parse_command(text, self.index)
+		if event is not None:
+			self.events.put(event)
+		else:
+			print(f"Voice: nothing matches '{text}'")
+		return event
+
+	def feedWav(self, path):
+		"""Stream a WAV file into the recorder in real time on a background thread."""
+		def feed():
+			for chunk, rate in wav_chunks(path):
+				if not self.running:
+					break
+				self.recorder.feed_audio(chunk, original_sample_rate=rate)
+				time.sleep(len(chunk) / 2 / rate)  # Keep the recorded pace, like a microphone
+		return self._spawn(feed, 'VoiceWavFeed')
+
+	def poll(self):
+		"""Events queued since the last call."""
+		events = []
+		while True:
+			try:
+				events.append(self.events.get_nowait())
+			except queue.Empty:
+				return events
+
+	def close(self):
+		self.running = False
+		if self.recorder is not None and hasattr(self.recorder, 'shutdown'):
+			self.recorder.shutdown()  # Also wakes a blocked text()
+		for thread in self.threads:
+			thread.join(timeout=1.0)
+
+	##################################################
+
+	def _spawn(self, target, name):
+		thread = threading.Thread(target=target, name=name, daemon=True)
+		thread.start()
+		self.threads.append(thread)
+		return thread
+
+	def _listen(self):
+		while self.running:
+			text = self.recorder.text()
+			if text and self.running:
+				print(f"Voice: {text}")
+				self.submit(text)
@@ -0,0 +1,180 @@
+import os
+import hashlib
+import threading
+import collections
+import numpy as np
+
+
+INDEX_VERSION = 1
+DECODER_DELAY = 529  # Samples an MP3 decoder's synthesis filterbank delays the output by
+INDEX_FOLDER = '.frame_index'  # Next to LibraryIndexModule's .library_index.json
+PREROLL = 4  # Frames decoded ahead of a span and dropped, so its samples match a decode of the whole file
+
+# Layer III bitrates (kbps) by header index, MPEG-1 and MPEG-2/2.5
+BITRATES = {1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+            2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0]}
+SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}  # By version bits
+
+
+def frame_header(header):
+	"""(frame bytes, samples, sample rate, side info bytes) of a 4-byte MPEG Layer III header as an int, or None."""
+	if header >> 21 != 0x7FF or (header >> 17) & 3 != 1:  # Frame sync, layer III
+		return None
+	version = (header >> 19) & 3
+	bitrateIndex, rateIndex = (header >> 12) & 15, (header >> 10) & 3
+	if version == 1 or rateIndex == 3 or BITRATES[1 if version == 3 else 2][bitrateIndex] == 0:
+		return None  # Reserved version or rate, free format or bad bitrate
+	bitrate = BITRATES[1 if version == 3 else 2][bitrateIndex] * 1000
+	rate = SAMPLE_RATES[version][rateIndex]
+	samples = 1152 if version == 3 else 576
+	mono = (header >> 6) & 3 == 3
+	sideInfo = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+	return samples // 8 * bitrate // rate + ((header >> 9) & 1), samples, rate, sideInfo
+
+
+def id3_size(data):
+	"""Bytes taken by an ID3v2 tag at the start of the data (0 if there is none)."""
+	if len(data) < 10 or data[:3] != b'ID3':
+		return 0
+	size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+	return 10 + size + (10 if data[5] & 0x10 else 0)  # Footer flag
+
+
+def lame_trim(data, i):
+	"""(delay, padding) samples a gapless decoder trims, from the LAME tag of a Xing/Info frame at data[i:]."""
+	flags = int.from_bytes(data[i + 4:i + 8], 'big')
+	tag = i + 8 + 4 * (flags & 1) + 4 * (flags >> 1 & 1) + 100 * (flags >> 2 & 1) + 4 * (flags >> 3 & 1)
+	if len(data) < tag + 24 or not data[tag:tag + 4].isalpha():  # 'LAME', 'Lavc', ...: no tag otherwise
+		return 0, 0
+	b = data[tag + 21:tag + 24]
+	delay, padding = (b[0] << 4) | (b[1] >> 4), ((b[1] & 15) << 8) | b[2]
+	return delay + DECODER_DELAY, max(padding - DECODER_DELAY, 0)
+
+
+def scan_frames(data):
+	"""(byte offsets, first sample of each frame plus the total, sample rate, delay, padding) of an MP3 file's frames.
+
+	A Xing/Info header frame, which decoders skip, counts no samples; the encoder delay and padding in its
+	LAME tag are trimmed by gapless decoders such as mpg123 (pygame's), so they are returned to map decoded
+	positions to frames. After a bad header the scan resyncs on the next frame sync word.
+	"""
+	offsets, counts = [], []
+	rate = delay = padding = 0
+	i = id3_size(data)
+	end = len(data) - 4
+	while i <= end:
+		info = frame_header(int.from_bytes(data[i:i + 4], 'big'))
+		if info is None:
+			i = data.find(b'\xff', i + 1)  # Resync
+			if i < 0:
+				break
+			continue
+		size, samples, rate, sideInfo = info
+		if not offsets and data[i + 4 + sideInfo:i + 8 + sideInfo] in (b'Xing', b'Info'):
+			samples = 0  # VBR header, no audio
+			delay, padding = lame_trim(data, i + 4 + sideInfo)
+		offsets.append(i)
+		counts.append(samples)
+		i += size
+	starts = np.zeros(len(counts) + 1, np.int64)
+	np.cumsum(counts, out=starts[1:])
+	return np.array(offsets, np.int64), starts, rate, delay, padding
+
+####################################################################################################
+
+class FrameTable(collections.namedtuple('FrameTable', ['offsets', 'starts', 'rate', 'delay', 'padding'])):
+	"""Byte offset and first sample of every audio frame of a track; `starts` has one more entry, the total.
+
+	Positions in seconds are on the decoded track's timeline, which starts `delay` samples into the frames.
+	"""
+	__slots__ = ()
+
+	@property
+	def duration(self):
+		return float(self.starts[-1] - self.delay - self.padding) / self.rate if self.rate else 0.0
+
+	def sample(self, seconds):
+		"""Sample of the frames' timeline (at the file's rate) that is `seconds` into the decoded track."""
+		return seconds * self.rate + self.delay
+
+	def locate(self, seconds):
+		"""(frame, byte offset) of the frame playing at `seconds`, by binary search."""
+		if len(self.offsets) == 0:
+			return 0, 0
+		frame = int(np.searchsorted(self.starts, self.sample(seconds), side='right')) - 1
+		frame = min(max(frame, 0), len(self.offsets) - 1)
+		return frame, int(self.offsets[frame])
+
+	def span(self, start, end):
+		"""(first byte, end byte or None for the end of the file, samples to drop) to decode `start` to `end` seconds.
+
+		Decoding starts PREROLL frames early to refill the bit reservoir and the filterbank, but never at the
+		Xing/Info frame: a decoder would take it for the start of the track and trim the encoder delay.
+		"""
+		first = 1 if len(self.starts) > 1 and self.starts[1] == 0 else 0
+		frame = max(self.locate(start)[0] - PREROLL, first)
+		last = self.locate(end)[0] + 2  # One frame to spare
+		stop = int(self.offsets[last]) if last < len(self.offsets) else None
+		return int(self.offsets[frame]), stop, int(round(self.sample(start))) - int(self.starts[frame])
+
+
+class FrameIndex():
+	"""FrameTables for the tracks of a songs folder, built on first use and cached on disk.
+
+	Each track's table goes to its own file in `.frame_index` next to the library index, checked against
+	the song's size and mtime, so a library of thousands of tracks never loads more than the tracks that
+	are played. Building a table reads the file once and walks its frame headers (about 25 ms for a
+	4-minute track); loading it from the cache is a fraction of that.
+	"""
+
+	def __init__(self, folderPath, cacheFolder=None):
+		self.cacheFolder = cacheFolder or os.path.join(folderPath, INDEX_FOLDER)
+		self.tables = {}  # path -> FrameTable, for this session
+		self.lock = threading.Lock()
+
+	def get(self, path):
+		"""The track's FrameTable, or None if the file can't be read."""
+		with self.lock:
+			table = self.tables.get(path)
+		if table is not None:
+			return table
+		try:
+			st = os.stat(path)
+		except OSError:
+			return None
+		cacheFile = os.path.join(self.cacheFolder, hashlib.md5(path.encode('utf-8')).hexdigest()[:16] + '.npz')
+		table = self._load(cacheFile, st)
+		if table is None:
+			try:
+				with open(path, 'rb') as f:
+					table = FrameTable(*scan_frames(f.read()))
+			except OSError as e:
+				print(f"Warning: could not index {path}: {e}")
+				return None
+			self._save(cacheFile, table, st)
+		with self.lock:
+			self.tables[path] = table
+		return table
+
+	##################################################
+
+	def _load(self, cacheFile, st):
+		try:
+			with np.load(cacheFile) as data:
+				if data['key'].tolist() != [INDEX_VERSION, st.st_size, st.st_mtime_ns]:
+					return None  # Stale: the song changed
+				return FrameTable(data['offsets'].astype(np.int64), data['starts'], *data['format'].tolist())
+		except (OSError, ValueError, KeyError):
+			return None
+
+	def _save(self, cacheFile, table, st):
+		"""Write atomically so an interrupted save never leaves a broken table behind."""
+		tmpFile = f"{cacheFile}.{threading.get_ident()}.tmp.npz"  # The preloader and a seek may build the same table
+		try:
+			os.makedirs(self.cacheFolder, exist_ok=True)
+			np.savez(tmpFile, key=np.array([INDEX_VERSION, st.st_size, st.st_mtime_ns], np.int64),
+			         offsets=table.offsets.astype(np.uint32), starts=table.starts,
+			         format=np.array([table.rate, table.delay, table.padding], np.int64))
+			os.replace(tmpFile, cacheFile)
+		except OSError as e:
+			print(f"Warning: could not write frame index {cacheFile}: {e}")
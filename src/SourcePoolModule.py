@@ -0,0 +1,128 @@
+import os
+import time
+import queue
+import collections
+import multiprocessing as mproc
+
+
+# Hands found in one frame of one source; landmarks are (count, 21, 3) pixel coordinates like handDetector.landmarks
+SourceFrame = collections.namedtuple('SourceFrame', ['source', 'frameId', 't', 'landmarks', 'handedness', 'elapsed'])
+
+
+def open_source(spec, landmarksOnly=False, realtime=False):
+	"""(FrameGrabber, handDetector) for a source spec: a camera index, a video file or a recording folder."""
+	import cv2
+	import config
+	import CaptureModule as cm
+	import RecordModule as rm
+	import HandTrackingModule as htm
+
+	detectorArgs = dict(minDetConf=0.8, minTrackConf=0.8, roi=config.roiTracking, roiSize=config.roiSize,
+	                    targetFps=config.targetFps, inferEvery=config.inferenceEvery,
+	                    inferInterval=config.inferenceInterval, smooth=config.landmarkSmoothing)
+	if os.path.isdir(spec):
+		recording = rm.load_recording(spec)
+		source = rm.RecordingSource(recording, useVideo=not landmarksOnly, realtime=realtime)
+		grabber = cm.FrameGrabber(source, cm.CAPTURE_EVERY, config.captureRingSize)
+		if landmarksOnly:
+			return grabber.start(), htm.handDetector(backend=rm.ReplayBackend(recording))
+	elif spec.isdigit():
+		cap = cv2.VideoCapture(int(spec))
+		cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+		grabber = cm.FrameGrabber(cap, config.captureMode, config.captureRingSize)
+	else:
+		grabber = cm.FrameGrabber(cv2.VideoCapture(spec), cm.CAPTURE_EVERY, config.captureRingSize)  # Every frame of a file
+	return grabber.start(), htm.handDetector(**detectorArgs)
+
+
+def _source_worker(index, spec, landmarksOnly, realtime, frames, stop):
+	"""One source per process: capture and hand inference both run here, only landmarks go back."""
+	grabber = detector = None
+	try:
+		grabber, detector = open_source(spec, landmarksOnly, realtime)
+		while not stop.is_set():
+			success, img = grabber.read()
+			if not success:
+				break
+			start = time.perf_counter()
+			detector.findHands(img, draw=False, timestamp=grabber.timestamp)
+			frames.put(SourceFrame(index, grabber.frameId, grabber.timestamp, detector.landmarks.copy(),
+			                       detector.handedness.copy(), time.perf_counter() - start))
+	finally:
+		frames.put(SourceFrame(index, None, 0.0, None, None, 0.0))  # This source is done
+		if grabber is not None:
+			grabber.release()
+		if detector is not None:
+			detector.close()
+
+####################################################################################################
+
+class SourcePool():
+	"""Runs capture and hand tracking for N video sources in a pool of worker processes, one per source.
+
+	Sources work independently, so throughput grows with the number of cores until the main process,
+	which only receives landmarks, becomes the bottleneck. read() returns SourceFrames from all sources
+	in arrival order; `finished` is set once every source has ended. `backlog` frames per source may wait in the
+	queue before a file source blocks; cameras drop old frames in their FrameGrabber instead.
+	"""
+
+	def __init__(self, specs, landmarksOnly=False, realtime=False, backlog=4):
+		ctx = mproc.get_context('spawn')
+		self.specs = list(specs)
+		self.frames = ctx.Queue(maxsize=backlog * len(self.specs))
+		self.stop = ctx.Event()
+		self.running = [True] * len(self.specs)  # Until the source's end marker arrives
+		self.received = [0] * len(self.specs)
+		self.processes = [ctx.Process(target=_source_worker, name=f'Source{i}', daemon=True,
+		                              args=(i, spec, landmarksOnly, realtime, self.frames, self.stop))
+		                  for i, spec in enumerate(self.specs)]
+
+	def start(self):
+		for process in self.processes:
+			process.start()
+		return self
+
+	@property
+	def finished(self):
+		return not any(self.running)
+
+	def read(self, timeout=None):
+		"""Next SourceFrame from any source, or None when all have ended or nothing arrived within timeout."""
+		deadline = None if timeout is None else time.perf_counter() + timeout
+		while not self.finished:
+			wait = 0.5 if deadline is None else min(0.5, max(deadline - time.perf_counter(), 0.0))
+			try:
+				frame = self.frames.get(timeout=wait)
+			except queue.Empty:
+				for i, process in enumerate(self.processes):
+					if self.running[i] and not process.is_alive() and process.exitcode != 0:
+						print(f"Warning: source {self.specs[i]} stopped (exit code {process.exitcode})")
+						self.running[i] = False  # Died without saying goodbye, e.g. failed to import
+				if deadline is not None and time.perf_counter() >= deadline:
+					return None
+				continue
+			if frame.frameId is None:
+				self.running[frame.source] = False
+				continue
+			self.received[frame.source] += 1
+			return frame
+		return None
+
+	def close(self):
+		self.stop.set()
+		deadline = time.perf_counter() + 2.0
+		for process in self.processes:
+			while process.is_alive() and time.perf_counter() < deadline:
+				self._drain()  # A worker blocked on the full queue (or flushing it on exit) needs room
+				process.join(timeout=0.05)
+			if process.is_alive():
+				process.terminate()
+
+	##################################################
+
+	def _drain(self):
+		while True:
+			try:
+				self.frames.get_nowait()
+			except queue.Empty:
+				return
@@ -0,0 +1,186 @@
+import json
+import time
+import bisect
+import threading
+import http.server
+import numpy as np
+
+
+# Per-frame stamps: perf_counter() when the frame was grabbed, read by the main loop, had its hands found and
+# its gestures evaluated, and the seconds the tilt took to reach the song change angle (NaN without one)
+STAGES = ('capture', 'read', 'hands', 'gestures', 'tilt')
+# Stretches of the motion-to-action latency, from the frame's capture to the mixer call its gesture caused:
+# 'queue' is the frame waiting for the main loop, 'dispatch' the event handling, command queue, mixer call and
+# mixer buffer. 'tilt' (song changes only) comes before the capture of the frame that triggered.
+SPANS = ('queue', 'inference', 'gestures', 'dispatch', 'tilt', 'total')
+ACTIONS = ('play', 'skip', 'seek', 'pause', 'resume', 'volume', 'eq')  # AudioController command kinds
+TILT_ACTIONS = ('play', 'skip')  # The ones a song change issues
+BUCKETS = (0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)  # Histogram upper bounds in seconds
+METRIC = 'hand_player_motion_to_action_seconds'
+
+####################################################################################################
+
+class Tracer():
+	"""Motion-to-action latency: frame stamps from capture to gesture, joined with the mixer calls they caused.
+
+	The main loop records each frame's stamps with frame() under its FrameGrabber id, and AudioController
+	reports with action() when it applies a command a gesture in that frame issued. Everything lives in arrays
+	allocated here: the stamps of the last `capacity` frames (a row per frame id modulo capacity), per action
+	and span histogram counts for Prometheus, and rings of the last `recent` latencies for percentiles. A frame
+	costs one row write; the rest only runs per action. The two run on different threads, so the stamp ring
+	is read and written under the same lock as the histograms.
+	"""
+
+	def __init__(self, capacity=256, recent=1000):
+		self.capacity = capacity
+		self.stamps = np.full((capacity, len(STAGES)), np.nan)
+		self.frameIds = np.full(capacity, -1, np.int64)
+		self.buckets = np.zeros((len(ACTIONS), len(SPANS), len(BUCKETS) + 1), np.int64)  # Last one: +Inf
+		self.sums = np.zeros((len(ACTIONS), len(SPANS)))
+		self.recent = np.zeros((len(ACTIONS), len(SPANS), recent))
+		self.counts = np.zeros((len(ACTIONS), len(SPANS)), np.int64)
+		self.frames = 0
+		self.missed = 0  # Actions whose frame had already left the stamp ring
+		self.current = None  # Frame id whose gesture events are being handled, picked up by AudioController
+		self.lock = threading.Lock()
+
+	def frame(self, frameId, capture, read, hands, gestures, tilt=None):
+		row = frameId % self.capacity
+		stamps = (capture, read, hands, gestures, np.nan if tilt is None else tilt)
+		with self.lock:
+			self.frameIds[row] = frameId
+			self.stamps[row] = stamps
+			self.frames += 1
+
+	def action(self, frameId, kind, t):
+		"""A command issued while handling frame `frameId` reached the mixer at `t` (output buffer included)."""
+		row = frameId % self.capacity
+		action = ACTIONS.index(kind) if kind in ACTIONS else -1
+		if action < 0:
+			return
+		with self.lock:
+			if self.frameIds[row] != frameId:  # Overwritten by a newer frame
+				self.missed += 1
+				return
+			capture, read, hands, gestures, tilt = self.stamps[row].tolist()
+			if kind not in TILT_ACTIONS:
+				tilt = np.nan  # A volume change in the same frame did not wait for the tilt
+			spans = (read - capture, hands - read, gestures - hands, t - gestures, tilt, t - capture)
+			for span, seconds in enumerate(spans):
+				if seconds != seconds:  # NaN: no tilt
+					continue
+				self.buckets[action, span, bisect.bisect_left(BUCKETS, seconds)] += 1
+				self.sums[action, span] += seconds
+				self.recent[action, span, self.counts[action, span] % self.recent.shape[2]] = seconds
+				self.counts[action, span] += 1
+
+	def summary(self):
+		"""{action: {span: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}} over the recent latencies."""
+		stats = {}
+		with self.lock:
+			for a, s in zip(*np.nonzero(self.counts)):
+				samples = self.recent[a, s, :min(self.counts[a, s], self.recent.shape[2])]
+				p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+				stats.setdefault(ACTIONS[a], {})[SPANS[s]] = {
+					'count': int(self.counts[a, s]), 'mean_ms': samples.mean() * 1e3, 'p50_ms': p50 * 1e3,
+					'p95_ms': p95 * 1e3, 'p99_ms': p99 * 1e3, 'max_ms': samples.max() * 1e3}
+		return stats
+
+	def prometheus(self):
+		"""The histograms and counters in the Prometheus text exposition format."""
+		lines = [f"# HELP {METRIC} Time from a frame's capture to the mixer call its gesture caused, by stretch",
+		         f"# TYPE {METRIC} histogram"]
+		with self.lock:
+			for a, s in zip(*np.nonzero(self.counts)):
+				labels = f'action="{ACTIONS[a]}",span="{SPANS[s]}"'
+				cumulative = np.cumsum(self.buckets[a, s]).tolist()
+				for bound, count in zip(BUCKETS + ('+Inf',), cumulative):
+					lines.append(f'{METRIC}_bucket{{{labels},le="{bound}"}} {count}')
+				lines.append(f'{METRIC}_sum{{{labels}}} {self.sums[a, s]:.6f}')
+				lines.append(f'{METRIC}_count{{{labels}}} {self.counts[a, s]}')
+		lines += ['# HELP hand_player_frames_traced_total Frames whose stamps were recorded',
+		          '# TYPE hand_player_frames_traced_total counter', f'hand_player_frames_traced_total {self.frames}',
+		          '# HELP hand_player_actions_untraced_total Actions whose frame was no longer in the stamp ring',
+		          '# TYPE hand_player_actions_untraced_total counter', f'hand_player_actions_untraced_total {self.missed}']
+		return '\n'.join(lines) + '\n'
+
+	def report(self):
+		"""One line per action: p50/p95 of the total and the p50 of each stretch."""
+		lines = []
+		for action, spans in self.summary().items():
+			total = spans['total']
+			parts = ', '.join(f"{span} {stats['p50_ms']:.1f}" for span, stats in spans.items() if span != 'total')
+			lines.append(f"Motion to {action}: {total['count']} x, p50 {total['p50_ms']:.1f} ms, "
+			             f"p95 {total['p95_ms']:.1f} ms ({parts} ms)")
+		return '\n'.join(lines)
+
+##################################################
+
+class MetricsServer():
+	"""Serves Tracer.prometheus() at http://host:port/metrics on a background thread (local only by default)."""
+
+	def __init__(self, tracer, port, host='127.0.0.1'):
+		class Handler(http.server.BaseHTTPRequestHandler):
+			def do_GET(self):
+				if self.path.split('?')[0] != '/metrics':
+					self.send_error(404)
+					return
+				body = tracer.prometheus().encode('utf-8')
+				self.send_response(200)
+				self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, *args):
+				pass  # No request log on the console
+
+		self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+		self.server.daemon_threads = True
+		self.thread = None
+
+	def start(self):
+		self.thread = threading.Thread(target=self.server.serve_forever, name='MetricsServer', daemon=True)
+		self.thread.start()
+		return self
+
+	def close(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+
+class JsonlDump():
+	"""Appends Tracer.summary() with a wall-clock time to a JSONL file every `interval` seconds, and once on close."""
+
+	def __init__(self, tracer, path, interval=10.0):
+		self.tracer = tracer
+		self.path = path
+		self.interval = interval
+		self.stop = threading.Event()
+		self.thread = None
+
+	def start(self):
+		self.thread = threading.Thread(target=self._run, name='JsonlDump', daemon=True)
+		self.thread.start()
+		return self
+
+	def close(self):
+		self.stop.set()
+		if self.thread is not None:
+			self.thread.join(timeout=1.0)
+		self._write()
+
+	##################################################
+
+	def _run(self):
+		while not self.stop.wait(self.interval):
+			self._write()
+
+	def _write(self):
+		record = {'time': time.time(), 'frames': self.tracer.frames, 'untraced': self.tracer.missed,
+		          'actions': self.tracer.summary()}
+		try:
+			with open(self.path, 'a', encoding='utf-8') as f:
+				f.write(json.dumps(record) + '\n')
+		except OSError as e:
+			print(f"Warning: could not write metrics to {self.path}: {e}")
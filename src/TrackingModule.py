@@ -0,0 +1,121 @@
+import cv2
+import numpy as np
+
+
+class RoiTracker():
+	"""Keeps a crop window around the tracked hands so inference only sees that region.
+
+	The window is recomputed only when the hands drift out of its inner area, which keeps the
+	crop stable between frames and lets MediaPipe's own landmark tracking stay valid.
+	"""
+
+	def __init__(self, margin=0.35, maxSide=320, minScore=0.6, refreshEvery=30, edge=0.02):
+		self.margin = margin  # Extra space around the hand box, as a fraction of its larger side
+		self.maxSide = maxSide  # Crops are downscaled so their larger side is at most this many pixels
+		self.minScore = minScore  # Handedness confidence below this drops back to a full-frame search
+		self.refreshEvery = refreshEvery  # Full-frame search every N frames so new hands get noticed
+		self.edge = edge  # Landmarks this close to the crop border mean the hand is leaving the ROI
+		self.roi = None  # (x0, y0, x1, y1) in pixels, None = search the full frame
+		self.framesSinceFull = 0
+
+	def reset(self):
+		self.roi = None
+
+	def crop(self, img):
+		"""Return (image to run inference on, tag describing the crop)."""
+		if self.roi is None or self.framesSinceFull >= self.refreshEvery:
+			self.framesSinceFull = 0
+			return img, None
+
+		self.framesSinceFull += 1
+		x0, y0, x1, y1 = self.roi
+		crop = img[y0:y1, x0:x1]
+		scale = self.maxSide / max(x1 - x0, y1 - y0)
+		if scale < 1:
+			crop = cv2.resize(crop, (max(1, int((x1 - x0) * scale)), max(1, int((y1 - y0) * scale))),
+			                  interpolation=cv2.INTER_AREA)
+		return crop, self.roi
+
+	def toFrame(self, landmarks, tag, w, h):
+		"""Map normalized crop landmarks (hands, 21, 3) back to normalized full-frame coordinates."""
+		if tag is None:
+			return landmarks
+		x0, y0, x1, y1 = tag
+		cropW, cropH = x1 - x0, y1 - y0
+		return landmarks * np.array([cropW / w, cropH / h, cropW / w], np.float32) + \
+		       np.array([x0 / w, y0 / h, 0], np.float32)
+
+	def update(self, result, tag, w, h):
+		"""Move the window after a frame; returns False if a cropped search lost the hand."""
+		count = result.count
+		if count == 0 or result.scores[:count].min() < self.minScore:
+			self.roi = None
+			return tag is None
+
+		landmarks = result.landmarks[:count]  # Already in full-frame normalized coordinates
+		xMin, yMin = landmarks[:, :, 0].min() * w, landmarks[:, :, 1].min() * h
+		xMax, yMax = landmarks[:, :, 0].max() * w, landmarks[:, :, 1].max() * h
+
+		if tag is not None:
+			x0, y0, x1, y1 = tag
+			edgeX, edgeY = self.edge * (x1 - x0), self.edge * (y1 - y0)
+			if xMin < x0 + edgeX or yMin < y0 + edgeY or xMax > x1 - edgeX or yMax > y1 - edgeY:
+				self.roi = None  # Hand is leaving the crop, look at the whole frame again
+				return False
+
+		if self.roi is not None:
+			x0, y0, x1, y1 = self.roi
+			insetX, insetY = (x1 - x0) * self.margin / 4, (y1 - y0) * self.margin / 4
+			side = max(xMax - xMin, yMax - yMin) * (1 + 2 * self.margin)
+			if (xMin > x0 + insetX and yMin > y0 + insetY and xMax < x1 - insetX and yMax < y1 - insetY
+			        and side > 0.5 * max(x1 - x0, y1 - y0)):
+				return True  # Still well inside the current window
+
+		# Square window centred on the hands, clipped to the frame
+		side = max(xMax - xMin, yMax - yMin) * (1 + 2 * self.margin)
+		cx, cy = (xMin + xMax) / 2, (yMin + yMax) / 2
+		x0, y0 = int(max(0, cx - side / 2)), int(max(0, cy - side / 2))
+		x1, y1 = int(min(w, cx + side / 2)), int(min(h, cy + side / 2))
+		self.roi = (x0, y0, x1, y1) if x1 - x0 > 16 and y1 - y0 > 16 else None
+		return True
+
+
+####################################################################################################
+
+class LatencyGovernor():
+	"""Switches MediaPipe's model complexity to hold a target frame rate.
+
+	Tracks an exponential moving average of inference time; when it stays above the budget the
+	lighter model (0) is used, and once there is plenty of headroom the full model (1) comes back.
+	"""
+
+	def __init__(self, targetFps, budgetShare=0.6, patience=15, cooldown=60, smoothing=0.1):
+		self.budget = budgetShare / targetFps  # Seconds of each frame inference may use
+		self.patience = patience  # Consecutive frames over/under budget before switching
+		self.cooldown = cooldown  # Frames to wait after a switch (reloading the model is expensive)
+		self.smoothing = smoothing
+		self.average = None
+		self.over = 0
+		self.under = 0
+		self.wait = 0
+
+	def update(self, elapsed, complexity):
+		"""Feed one frame's inference time; returns the model complexity to use from now on."""
+		self.average = elapsed if self.average is None else self.average + self.smoothing * (elapsed - self.average)
+		if self.wait > 0:
+			self.wait -= 1
+			return complexity
+
+		self.over = self.over + 1 if self.average > self.budget else 0
+		self.under = self.under + 1 if self.average < 0.5 * self.budget else 0
+		if complexity > 0 and self.over >= self.patience:
+			return self._switch(complexity - 1)
+		if complexity < 1 and self.under >= self.patience:
+			return self._switch(complexity + 1)
+		return complexity
+
+	def _switch(self, complexity):
+		self.over = self.under = 0
+		self.wait = self.cooldown
+		self.average = None  # The new model has its own timing
+		return complexity
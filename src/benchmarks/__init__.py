@@ -0,0 +1 @@
+"""Benchmarks for the frame pipeline; run with `python -m benchmarks --help` from the src folder."""
@@ -0,0 +1,144 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+
+import cv2
+import numpy as np
+import HandTrackingModule as htm
+import CaptureModule as cm
+import RecordModule as rm
+import ProfilerModule as prof
+import LibraryIndexModule as lib
+import OverlayModule as ov
+import config
+from benchmarks import pipeline, synthetic
+
+
+def git_commit():
+	try:
+		return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+		                      check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+##################################################
+
+def compare(results, baselinePath, tolerance):
+	"""Print p50/p95 ratios against an earlier result file; returns the stages that got slower."""
+	with open(baselinePath, 'r', encoding='utf-8') as f:
+		baseline = json.load(f)
+	regressions = []
+	print(f"\n{'stage':<12}{'p50 old':>10}{'p50 new':>10}{'p95 old':>10}{'p95 new':>10}")
+	for name, new in results['stages'].items():
+		old = baseline['stages'].get(name)
+		if old is None:
+			continue
+		flag = ''
+		if new['p50_ms'] > old['p50_ms'] * (1 + tolerance) and new['p50_ms'] - old['p50_ms'] > 0.05:
+			regressions.append(name)
+			flag = '  <-- slower'
+		print(f"{name:<12}{old['p50_ms']:>10.3f}{new['p50_ms']:>10.3f}{old['p95_ms']:>10.3f}{new['p95_ms']:>10.3f}{flag}")
+	return regressions
+
+##################################################
+
+def main():
+	parser = argparse.ArgumentParser(description="Per-stage latency benchmark for the frame pipeline")
+	parser.add_argument('--recording', metavar='DIR', help="recorded session (default: synthetic frames and landmarks)")
+	parser.add_argument('--mediapipe', action='store_true',
+	                    help="run MediaPipe on the frames instead of replaying recorded/synthetic landmarks")
+	parser.add_argument('--frames', type=int, default=300)
+	parser.add_argument('--songs', metavar='DIR', help="songs folder for the metadata, mixer and audio command latency stages")
+	parser.add_argument('--display', action='store_true', help="time cv2.imshow instead of JPEG encoding")
+	parser.add_argument('--heatmap', action='store_true', help="include the hand position heatmap (accumulate + blend) stage")
+	parser.add_argument('--output', metavar='FILE', help="write the results as JSON")
+	parser.add_argument('--compare', metavar='FILE', help="compare against an earlier JSON result")
+	parser.add_argument('--tolerance', type=float, default=0.2, help="allowed p50 slowdown for --compare")
+	args = parser.parse_args()
+
+	timer = prof.StageTimer()
+	recording = rm.load_recording(args.recording) if args.recording else synthetic.hand_sequence(args.frames)
+	if args.recording and recording.videoPath:
+		source = rm.RecordingSource(recording, useVideo=True)
+	else:
+		w, h = recording.frameSize
+		source = cm.SyntheticSource(w, h, count=len(recording.timestamps))
+
+	if args.mediapipe:
+		detector = htm.handDetector(minDetConf=0.8, minTrackConf=0.8)
+		detector.backend = pipeline.TimedBackend(detector.hands, detector.maxHands, timer)
+	else:
+		detector = htm.handDetector(backend=rm.ReplayBackend(recording))
+
+	library, songPath, audio = None, None, None
+	if args.songs:
+		songPaths = sorted(os.path.join(args.songs, song) for song in os.listdir(args.songs)
+		                   if song.lower().endswith('.mp3'))
+		if songPaths:
+			songPath = songPaths[0]
+			library = lib.LibraryIndex(args.songs).scan(songPaths)
+			os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+			import pygame
+			import PlayerModule as pm
+			import AudioModule as am
+			pygame.mixer.init(frequency=44100, buffer=config.mixerBuffer)
+			# Command latencies land in the same timer as 'play' and 'volume' stages
+			import PlaylistModule as plm
+			playlist = plm.Playlist()
+			for path in songPaths:
+				playlist.add(path)
+			audio = am.AudioController(pm.Player(playlist), epsilon=config.audioVolumeEpsilon, ramp=config.volumeRamp,
+			                           outputLatency=config.mixerBuffer / 44100, latency=timer).start()
+			audio.play(0)
+
+	start = time.perf_counter()
+	heatmap = ov.Heatmap(cell=config.heatmapCell, halfLife=config.heatmapHalfLife, refresh=config.heatmapRefresh,
+	                     opacity=config.heatmapOpacity) if args.heatmap else None
+	pipeline.run_pipeline(source, detector, timer, args.frames, library, songPath, audio, args.display, heatmap)
+	wall = time.perf_counter() - start
+
+	if songPath:
+		# Reference cost of what the metadata stage replaced: parsing the MP3 header every frame
+		from mutagen.mp3 import MP3
+		for _ in range(50):
+			with timer.stage('mp3_parse'):
+				MP3(songPath).info.length
+	detector.close()
+	if audio is not None:
+		audio.close()
+
+	results = {
+		'commit': git_commit(),
+		'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'platform': platform.platform(),
+		'python': platform.python_version(),
+		'opencv': cv2.__version__,
+		'numpy': np.__version__,
+		'input': args.recording or 'synthetic',
+		'mediapipe': args.mediapipe,
+		'frames': timer.counts.get('frame', 0),
+		'wall_s': wall,
+		'fps': timer.counts.get('frame', 0) / wall if wall > 0 else 0,
+		'stages': timer.summary(),
+	}
+
+	print(f"{'stage':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'per s':>12}")
+	for name, stats in results['stages'].items():
+		print(f"{name:<12}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['throughput_hz']:>12.0f}")
+	print(f"{results['frames']} frames in {wall:.2f} s ({results['fps']:.1f} FPS)")
+
+	if args.output:
+		with open(args.output, 'w', encoding='utf-8') as f:
+			json.dump(results, f, indent=2)
+	if args.compare and compare(results, args.compare, args.tolerance):
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
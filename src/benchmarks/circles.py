@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import types
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+
+import numpy as np
+import config
+import GestureModule as gm
+from benchmarks import synthetic
+
+
+def run_circles(turnsPerSecond, seconds, fps=30, jitter=0.002):
+	"""Draw circles at the given speed into a circle-mode GestureEngine; returns (volume change, per-frame seconds)."""
+	n = int(seconds * fps)
+	recording = synthetic.circle_sequence(n, turnsPerSecond, fps=fps, jitter=jitter)
+	w, h = recording.frameSize
+	scale = np.array([w, h, 1], np.float32)
+	cfg = types.SimpleNamespace(**{name: getattr(config, name) for name in dir(config) if not name.startswith('_')})
+	cfg.volumeMode = 'circle'
+	engine = gm.GestureEngine(cfg)
+	engine.volume = 0.5  # Room to move either way
+	times = np.zeros(n)
+	for i in range(n):
+		landmarks = recording.landmarks[i, :1] * scale
+		start = time.perf_counter()
+		engine.update(landmarks, recording.timestamps[i])
+		times[i] = time.perf_counter() - start
+	return engine.volume - 0.5, times
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Circle volume gesture: volume change per speed and update cost")
+	parser.add_argument('--speeds', type=float, nargs='+', default=[-2, -1, -0.5, 0, 0.5, 1, 2],
+	                    help="turns per second, positive is clockwise; 0 is a still fingertip (jitter only)")
+	parser.add_argument('--seconds', type=float, default=1.0)
+	parser.add_argument('--jitter', type=float, default=0.002, help="landmark noise, normalized units")
+	args = parser.parse_args()
+
+	print(f"{'turns/s':>8}{'turns':>8}{'volume':>10}{'p50 us':>10}{'p99 us':>10}")
+	for speed in args.speeds:
+		change, times = run_circles(speed, args.seconds, jitter=args.jitter)
+		p50, p99 = np.percentile(times, [50, 99]) * 1e6
+		print(f"{speed:>8.2f}{speed * args.seconds:>8.2f}{change:>+10.3f}{p50:>10.1f}{p99:>10.1f}")
+
+
+if __name__ == "__main__":
+	main()
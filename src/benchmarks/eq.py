@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')  # No sound card needed
+
+import numpy as np
+import EqualizerModule as eqm
+
+
+def run_dsp(block, taps, blocks, changeEvery, rate=44100, seed=0):
+	"""Filter noise through an Equalizer, moving the bass every `changeEvery` blocks; returns per-block seconds."""
+	rng = np.random.default_rng(seed)
+	eq = eqm.Equalizer(rate, 2, block, taps)
+	samples = rng.normal(0, 3000, (block * 16, 2))
+	times = np.zeros(blocks)
+	for i in range(blocks):
+		if changeEvery and i % changeEvery == 0:
+			eq.set('bass', float(rng.uniform(-12, 12)))
+		chunk = samples[(i % 16) * block:(i % 16 + 1) * block]
+		start = time.perf_counter()
+		eq.process(chunk)
+		times[i] = time.perf_counter() - start
+	return times
+
+
+def run_clicks(crossfade, band='bass', freq=100, block=1024, taps=2048, rate=44100):
+	"""Sharpest kink (second difference) of a sine while `band` jumps between -12 and +12 dB every block, relative
+	to the sine's own sharpest at +12 dB: about 1 means the changes are smooth, far above 1 means clicks."""
+	t = np.arange(block * 64) / rate
+	sine = np.stack([np.sin(2 * np.pi * freq * t)] * 2, axis=1) * 1000
+	eq = eqm.Equalizer(rate, 2, block, taps, crossfade=crossfade)
+	out = []
+	for i in range(64):
+		eq.set(band, 12.0 if i % 2 else -12.0)
+		out.append(eq.process(sine[i * block:(i + 1) * block]))
+	kinks = np.abs(np.diff(np.concatenate(out)[block * 8:, 0], 2))
+	return kinks.max() / (1000 * 10 ** (12 / 20) * (2 * np.pi * freq / rate) ** 2)
+
+
+def run_player(songs, seconds, block, taps):
+	"""Play the first song of `songs` through EqPlayer on the SDL dummy driver, sweeping the EQ with the update
+	loop AudioController runs; returns (update seconds, underruns)."""
+	import pygame
+	import PlaylistModule as plm
+	pygame.mixer.init(frequency=44100, buffer=512)
+	playlist = plm.Playlist()
+	for path in sorted(os.listdir(songs)):
+		if path.endswith('.mp3'):
+			playlist.add(os.path.join(songs, path))
+	player = eqm.EqPlayer(playlist, block=block, taps=taps)
+	player.play(playlist.current)
+	times = []
+	start = time.perf_counter()
+	while time.perf_counter() - start < seconds:
+		elapsed = time.perf_counter() - start
+		player.setEq('bass', 12 * np.sin(elapsed * 3))
+		player.setEq('balance', np.sin(elapsed))
+		tick = time.perf_counter()
+		player.update()
+		if player.pending is None:
+			times.append(time.perf_counter() - tick)
+		time.sleep(0.01)  # AudioController's tick
+	underruns = player.underruns
+	player.close()
+	pygame.mixer.quit()
+	return np.array(times), underruns
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Equalizer DSP cost per block vs real time, and click check")
+	parser.add_argument('--block', type=int, nargs='+', default=[512, 1024, 2048], help="frames per block")
+	parser.add_argument('--taps', type=int, default=2048)
+	parser.add_argument('--blocks', type=int, default=2000)
+	parser.add_argument('--songs', metavar='DIR', help="also play a song through EqPlayer (SDL dummy driver)")
+	parser.add_argument('--seconds', type=float, default=5.0)
+	args = parser.parse_args()
+
+	print(f"{'block':>6}{'block ms':>10}{'steady us':>11}{'change us':>11}{'p99 us':>9}{'% of RT':>9}")
+	for block in args.block:
+		steady = run_dsp(block, args.taps, args.blocks, 0)
+		changing = run_dsp(block, args.taps, args.blocks, 1)
+		duration = block / 44100
+		p99 = np.percentile(changing, 99)
+		print(f"{block:>6}{duration * 1e3:>10.1f}{np.median(steady) * 1e6:>11.0f}{np.median(changing) * 1e6:>11.0f}"
+		      f"{p99 * 1e6:>9.0f}{p99 / duration:>9.1%}")
+	for band, freq in (('bass', 100), ('mid', 1000), ('treble', 6000)):
+		print(f"{band} +-12 dB every block, {freq} Hz sine kinks (1 = smooth): crossfade {run_clicks(True, band, freq):.1f}, "
+		      f"without {run_clicks(False, band, freq):.1f}")
+
+	if args.songs:
+		times, underruns = run_player(args.songs, args.seconds, args.block[len(args.block) // 2], args.taps)
+		p50, p99 = np.percentile(times, [50, 99]) * 1e3
+		print(f"EqPlayer: {len(times)} updates, p50 {p50:.3f} ms, p99 {p99:.3f} ms, {underruns} underruns")
+
+
+if __name__ == "__main__":
+	main()
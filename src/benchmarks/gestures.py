@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+
+import numpy as np
+import GestureModule as gm
+import RecordModule as rm
+from benchmarks import synthetic
+
+
+def run_gestures(recording, repeat=1):
+	"""Feed every recorded frame to a fresh GestureEngine; returns (events by type, per-frame seconds)."""
+	w, h = recording.frameSize
+	scale = np.array([w, h, 1], np.float32)  # Recordings store normalized x, y
+	frames = [recording.landmarks[i, :recording.counts[i]] * scale for i in range(len(recording.timestamps))]
+	engine = gm.GestureEngine()
+	events = {}
+	times = np.zeros(len(frames) * repeat, np.float64)
+	for r in range(repeat):
+		for i, landmarks in enumerate(frames):
+			start = time.perf_counter()
+			emitted = engine.update(landmarks, recording.timestamps[i])
+			times[r * len(frames) + i] = time.perf_counter() - start
+			for event in emitted:
+				name = type(event).__name__
+				events[name] = events.get(name, 0) + 1
+	return events, times
+
+
+def run_roles(recording, releaseAfter=2.0):
+	"""One user gesturing on source 0 while source 1 sees nobody, as App.runSources feeds a RoleArbiter; returns
+	(track events sent, track events let through, final role owners). Alone, the user must own both roles."""
+	w, h = recording.frameSize
+	scale = np.array([w, h, 1], np.float32)
+	arbiter = gm.RoleArbiter(releaseAfter=releaseAfter)
+	engines = [gm.GestureEngine(), gm.GestureEngine()]
+	empty = np.zeros((0, recording.landmarks.shape[2], 3), np.float32)
+	sent = allowed = 0
+	for i, t in enumerate(recording.timestamps):
+		for source, landmarks in enumerate([recording.landmarks[i, :recording.counts[i]] * scale, empty]):
+			events = engines[source].update(landmarks, t)
+			sent += sum(gm.event_role(event) == gm.ROLE_TRACK for event in events)
+			events = arbiter.filter(source, events, t, len(landmarks) > 0)
+			allowed += sum(gm.event_role(event) == gm.ROLE_TRACK for event in events)
+	return sent, allowed, arbiter.owners
+
+
+def main():
+	parser = argparse.ArgumentParser(description="GestureEngine throughput on synthetic or recorded landmarks")
+	parser.add_argument('--recording', metavar='DIR', help="recorded session (default: synthetic landmarks)")
+	parser.add_argument('--frames', type=int, default=3000)
+	parser.add_argument('--repeat', type=int, default=1)
+	args = parser.parse_args()
+
+	recording = rm.load_recording(args.recording) if args.recording else synthetic.hand_sequence(args.frames)
+	events, times = run_gestures(recording, args.repeat)
+	p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1e3
+	print(f"{len(times)} frames: p50 {p50:.4f} ms, p95 {p95:.4f} ms, p99 {p99:.4f} ms, {len(times) / times.sum():.0f} frames/s")
+	print(', '.join(f"{name}: {count}" for name, count in sorted(events.items())))
+	sent, allowed, owners = run_roles(recording)
+	print(f"Roles, one user and an idle second source: {allowed}/{sent} track events let through, owners {owners}"
+	      + ("" if allowed == sent else " FAIL"))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+
+import numpy as np
+import HandwritingModule as hw
+from benchmarks import synthetic
+
+
+def run_recognizer(perLetter, noise, seed=0):
+	"""Recognize synthetic strokes of every letter; returns (template build seconds, per-stroke seconds, accuracy, confusions)."""
+	rng = np.random.default_rng(seed)
+	start = time.perf_counter()
+	recognizer = hw.LetterRecognizer()
+	build = time.perf_counter() - start
+	times, hits, confusions = [], 0, {}
+	for letter, strokes in hw.LETTER_STROKES.items():
+		for _ in range(perLetter):
+			points = synthetic.letter_stroke(strokes, rng, noise=noise)
+			start = time.perf_counter()
+			guess, _ = recognizer.recognize(points)
+			times.append(time.perf_counter() - start)
+			hits += guess == letter
+			if guess != letter:
+				confusions[letter + guess] = confusions.get(letter + guess, 0) + 1
+	return build, np.array(times), hits / len(times), confusions
+
+
+def run_writer(letters, seed=0):
+	"""Write `letters` with a synthetic pointing hand through AirWriter; returns (letters recognized, per-frame seconds)."""
+	rng = np.random.default_rng(seed)
+	recording = synthetic.writing_sequence([synthetic.letter_stroke(hw.LETTER_STROKES[letter], rng) for letter in letters])
+	w, h = recording.frameSize
+	scale = np.array([w, h, 1], np.float32)
+	index = hw.LetterIndex()
+	for trackId, letter in enumerate(hw.LETTER_STROKES):
+		index.add(trackId, f"../songs/{letter}song_John_Doe.mp3")
+	writer = hw.AirWriter(index)
+	written, times = '', np.zeros(len(recording.timestamps))
+	for i in range(len(times)):
+		start = time.perf_counter()
+		events = writer.update(recording.landmarks[i, :1] * scale, recording.timestamps[i])
+		times[i] = time.perf_counter() - start
+		written += ''.join(event.query for event in events)
+	return written, times
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Air handwriting: letter recognition accuracy and cost")
+	parser.add_argument('--strokes', type=int, default=100, help="synthetic strokes per letter")
+	parser.add_argument('--noise', type=float, nargs='+', default=[0.01, 0.03, 0.05], help="jitter, in letter sizes")
+	parser.add_argument('--write', default='HELLOWORLD', help="letters written end to end through AirWriter")
+	args = parser.parse_args()
+
+	print(f"{'noise':>8}{'build ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'accuracy':>10}  most confused")
+	for noise in args.noise:
+		build, times, accuracy, confusions = run_recognizer(args.strokes, noise)
+		p50, p99 = np.percentile(times, [50, 99]) * 1e3
+		worst = ' '.join(f"{pair[0]}->{pair[1]}:{count}" for pair, count in sorted(confusions.items(), key=lambda c: -c[1])[:4])
+		print(f"{noise:>8.2f}{build * 1e3:>10.2f}{p50:>10.3f}{p99:>10.3f}{accuracy:>10.1%}  {worst}")
+
+	written, times = run_writer(args.write.upper())
+	p50, p99, worst = np.percentile(times, [50, 99, 100]) * 1e3
+	print(f"wrote {args.write.upper()}, recognized {written}: {len(times)} frames, p50 {p50:.3f} ms, p99 {p99:.3f} ms, "
+	      f"max {worst:.3f} ms (stroke ends)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+
+import cv2
+import numpy as np
+import LyricsModule as lyr
+import OverlayModule as ov
+
+WORDS = ['love', 'night', 'drive', 'rain', 'sunshine', 'heart', 'road', 'light', 'home', 'dream', 'fire', 'sky']
+
+
+def lrc_text(lines, seconds, seed=0):
+	"""An LRC file of `lines` lines spread over `seconds`, with a chorus under several time tags and some
+	enhanced word timings, like the files lyrics sites export."""
+	rng = random.Random(seed)
+	stamp = lambda t: f"{int(t // 60):02}:{t % 60:05.2f}"
+	out = ['[ti:Synthetic]', '[ar:John Doe]', '[offset:+100]']
+	chorus = []
+	for i in range(lines):
+		t = (i + rng.random() * 0.5) * seconds / lines
+		if i % 10 == 5:
+			chorus.append(stamp(t))  # Written once below with all its tags
+			continue
+		words = rng.sample(WORDS, rng.randint(3, 7))
+		if i % 7 == 0:
+			out.append(f"[{stamp(t)}]" + ' '.join(f"<{stamp(t + k * 0.3)}>{word}" for k, word in enumerate(words)))
+		else:
+			out.append(f"[{stamp(t)}]" + ' '.join(words).capitalize())
+	out.append(''.join(f"[{t}]" for t in chorus) + "Oh oh the chorus again")
+	return '\n'.join(out)
+
+
+def run_find(lyrics, seconds, fps=30, seeks=1000, seed=0):
+	"""Microseconds per frame to find the current line while playing (from the last one), after a seek (binary
+	search alone), and for a linear scan over the times as reference."""
+	frames = np.arange(0, seconds, 1 / fps).tolist()
+	start = time.perf_counter()
+	index = -1
+	for position in frames:
+		index = lyrics.find(position, index)
+	playing = (time.perf_counter() - start) / len(frames)
+
+	rng = random.Random(seed)
+	targets = [rng.uniform(0, seconds) for _ in range(seeks)]
+	start = time.perf_counter()
+	for position in targets:
+		lyrics.find(position, -1)
+	seek = (time.perf_counter() - start) / seeks
+
+	times = lyrics.times
+	start = time.perf_counter()
+	for position in frames[::10]:
+		next((i for i in range(len(times) - 1, -1, -1) if times[i] <= position), -1)
+	linear = (time.perf_counter() - start) / len(frames[::10])
+	return playing * 1e6, seek * 1e6, linear * 1e6
+
+
+def run_draw(lyrics, seconds, fps=30, size=(1080, 720)):
+	"""Microseconds per frame (median) for LyricsOverlay.draw and for putText of the same lines every frame."""
+	w, h = size
+	img = np.zeros((h, w, 3), np.uint8)
+	overlay = ov.LyricsOverlay()
+	frames = np.arange(0, seconds, 1 / fps).tolist()
+	drawn, direct = [], []
+	index = -1
+	for position in frames:
+		start = time.perf_counter()
+		overlay.draw(img, lyrics, position)
+		drawn.append(time.perf_counter() - start)
+
+		start = time.perf_counter()
+		index = lyrics.find(position, index)
+		for i in range(max(index - 1, 0), min(index + 2, len(lyrics))):
+			scale, thickness = (1.5, 2) if i == index else (1.2, 1)
+			line = lyrics.lines[i]
+			width = cv2.getTextSize(line, cv2.FONT_HERSHEY_PLAIN, scale, thickness)[0][0]
+			cv2.putText(img, line, ((w - width) // 2, 590 + (i - index) * 28), cv2.FONT_HERSHEY_PLAIN, scale,
+			            (255, 255, 255), thickness, lineType=cv2.LINE_AA)
+		direct.append(time.perf_counter() - start)
+	return np.median(drawn) * 1e6, np.percentile(drawn, 99) * 1e6, np.median(direct) * 1e6
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Synced lyrics: LRC parsing, current line lookup and overlay cost")
+	parser.add_argument('--lines', type=int, nargs='+', default=[100, 1000])
+	parser.add_argument('--seconds', type=float, default=240.0, help="track length the lines are spread over")
+	args = parser.parse_args()
+
+	print(f"{'lines':>7}{'parse ms':>10}{'play us':>9}{'seek us':>9}{'linear us':>11}"
+	      f"{'draw us':>9}{'p99 us':>9}{'putText us':>12}")
+	for lines in args.lines:
+		text = lrc_text(lines, args.seconds)
+		start = time.perf_counter()
+		lyrics = lyr.parse_lrc(text)
+		parse = time.perf_counter() - start
+		playing, seek, linear = run_find(lyrics, args.seconds)
+		draw, p99, direct = run_draw(lyrics, args.seconds)
+		print(f"{len(lyrics):>7}{parse * 1e3:>10.2f}{playing:>9.2f}{seek:>9.2f}{linear:>11.1f}"
+		      f"{draw:>9.1f}{p99:>9.1f}{direct:>12.1f}")
+
+
+if __name__ == "__main__":
+	main()
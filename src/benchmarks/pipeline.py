@@ -0,0 +1,84 @@
+import cv2
+import time
+import InferenceModule as inf
+import GestureModule as gm
+import OverlayModule as ov
+
+
+class TimedBackend(inf.LocalBackend):
+	"""LocalBackend that reports BGR->RGB conversion and hands.process as separate stages."""
+
+	def __init__(self, hands, maxHands, timer):
+		super().__init__(hands, maxHands)
+		self.timer = timer
+		self.inner = 0.0  # Conversion + inference time since the caller last reset it
+
+	def submit(self, img, tag=None):
+		start = time.perf_counter()
+		imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+		converted = time.perf_counter()
+		self.results = self.hands.process(imgRGB)
+		processed = time.perf_counter()
+		self.timer.add('convert', converted - start)
+		self.timer.add('process', processed - converted)
+		self.inner += processed - start
+		result = inf.empty_result(self.maxHands, tag)
+		count = inf.read_results(self.results, result.landmarks, result.handedness, result.scores)
+		self.pending.append(result._replace(count=count, elapsed=processed - start))
+
+##################################################
+
+def evaluate_gestures(engine, detector, t):
+	"""The per-frame gesture recognition main() does before applying volume and song changes."""
+	return engine.update(detector.landmarks, t)
+
+##################################################
+
+def run_pipeline(source, detector, timer, frames, library=None, songPath=None, audio=None, display=False, heatmap=None):
+	"""Drive capture -> inference -> gestures -> overlay -> display/encode -> mixer for `frames` frames."""
+	songName = "Benchmark by Synthetic Input"
+	engine = gm.GestureEngine()
+	hud = ov.HudOverlay()
+	for i in range(frames):
+		frameStart = time.perf_counter()
+		with timer.stage('capture'):
+			success, img = source.read()
+		if not success:
+			break
+
+		timed = isinstance(detector.backend, TimedBackend)
+		if timed:
+			detector.backend.inner = 0.0
+		start = time.perf_counter()
+		detector.findHands(img, draw=False, timestamp=i / 30)
+		# Whatever findHands spent outside conversion and inference is the landmark array work
+		timer.add('landmarks', time.perf_counter() - start - (detector.backend.inner if timed else 0.0))
+
+		with timer.stage('findPos'):
+			detector.findPos(img, draw=False)
+		with timer.stage('gestures'):
+			evaluate_gestures(engine, detector, i / 30)
+
+		with timer.stage('metadata'):
+			songLength = library.get(songPath).length if library is not None and songPath else 180.0
+		with timer.stage('mixer'):
+			if audio is not None:
+				audio.setVolume((i % 100) / 100)
+				songPlayTime = audio.state.position()
+			else:
+				songPlayTime = i / 30
+		if heatmap is not None:
+			with timer.stage('heatmap'):
+				heatmap.add(detector.landmarks, i / 30, detector.frameSize)
+				heatmap.draw(img, i / 30)
+		with timer.stage('overlay'):
+			hud.draw(img, songName, songPlayTime, songLength)
+
+		if display:
+			with timer.stage('imshow'):
+				cv2.imshow("Benchmark", img)
+				cv2.waitKey(1)
+		else:
+			with timer.stage('encode'):
+				cv2.imencode('.jpg', img)
+		timer.add('frame', time.perf_counter() - frameStart)
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+
+import numpy as np
+import SearchModule as srch
+
+
+def synthetic_library(tracks, words=20000, seed=0):
+	"""Track_Artist_Name paths with title and artist words drawn from a Zipf-like vocabulary, like real libraries."""
+	rng = random.Random(seed)
+	letters = 'abcdefghijklmnopqrstuvwxyz'
+	vocabulary = [''.join(rng.choice(letters) for _ in range(rng.randint(3, 9))).capitalize() for _ in range(words)]
+	weights = [1 / (rank + 1) for rank in range(words)]
+	artists = [rng.choices(vocabulary, weights, k=2) for _ in range(max(1, tracks // 10))]
+	paths = []
+	for _ in range(tracks):
+		title = rng.choices(vocabulary, weights, k=rng.randint(1, 4))
+		paths.append(f"../songs/{''.join(title)}_{'_'.join(rng.choice(artists))}.mp3")
+	return paths, rng
+
+
+def misspell(text, rng):
+	"""Drop, swap or double one letter, like a misheard word."""
+	i = rng.randrange(len(text) - 1)
+	edit = rng.randrange(3)
+	if edit == 0:
+		return text[:i] + text[i + 1:]
+	if edit == 1:
+		return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+	return text[:i] + text[i] + text[i:]
+
+
+def run_search(tracks, queries, repeat=1):
+	"""Index a synthetic library and look up misspelled track names; returns (build seconds, per-query seconds, hit rate).
+	With `repeat`, each query's time is the best of that many runs, which leaves out scheduler noise."""
+	paths, rng = synthetic_library(tracks)
+	start = time.perf_counter()
+	index = srch.SearchIndex()
+	for trackId, path in enumerate(paths):
+		index.add(trackId, path)
+	build = time.perf_counter() - start
+
+	times = np.zeros(queries)
+	hits = 0
+	for q in range(queries):
+		trackId = rng.randrange(tracks)
+		query = misspell(srch.track_text(paths[trackId]), rng)
+		times[q] = np.inf
+		for _ in range(repeat):
+			start = time.perf_counter()
+			matches = index.search(query, limit=5)
+			times[q] = min(times[q], time.perf_counter() - start)
+		hits += any(srch.track_text(paths[match]) == srch.track_text(paths[trackId]) for match, _ in matches)
+	return build, times, hits / queries
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Fuzzy song search: index build time and lookup latency")
+	parser.add_argument('--tracks', type=int, nargs='+', default=[1000, 10000, 100000])
+	parser.add_argument('--queries', type=int, default=1000)
+	parser.add_argument('--repeat', type=int, default=1, help="time each query as the best of this many runs")
+	args = parser.parse_args()
+
+	print(f"{'tracks':>8}{'build s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'top5 hit':>10}")
+	for tracks in args.tracks:
+		build, times, hitRate = run_search(tracks, args.queries, args.repeat)
+		p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1e3
+		print(f"{tracks:>8}{build:>10.2f}{p50:>10.3f}{p95:>10.3f}{p99:>10.3f}{hitRate:>10.1%}")
+
+
+if __name__ == "__main__":
+	main()
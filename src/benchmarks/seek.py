@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')  # No sound card needed
+
+import numpy as np
+import GestureModule as gm
+import SeekModule as sk
+from benchmarks import synthetic
+
+
+def long_track(song, minutes, folder):
+	"""An MP3 of about `minutes` minutes made by repeating the audio frames of `song` (its tags left out)."""
+	with open(song, 'rb') as f:
+		data = f.read()
+	table = sk.FrameTable(*sk.scan_frames(data))
+	first = 1 if table.starts[1] == 0 else 0  # Skip a Xing/Info frame
+	frames = data[table.offsets[first]:]
+	repeats = max(int(minutes * 60 / table.duration), 1)
+	path = os.path.join(folder, f"Long_{repeats}x_{os.path.basename(song)}")
+	with open(path, 'wb') as f:
+		f.write(frames * repeats)
+	return path
+
+
+def run_index(paths, lookups, seed=0):
+	"""Frame index cost: (build ms, cached load ms) per track, locate() microseconds per lookup and
+	milliseconds per 2 s window decoded with PlayerModule.decode_span()."""
+	import pygame
+	import PlayerModule as pm
+	rng = random.Random(seed)
+	pygame.mixer.init(frequency=44100, buffer=512)
+	with tempfile.TemporaryDirectory() as cache:
+		build, load = [], []
+		for path in paths:
+			start = time.perf_counter()
+			table = sk.FrameIndex('', cache).get(path)
+			build.append(time.perf_counter() - start)
+			start = time.perf_counter()
+			sk.FrameIndex('', cache).get(path)  # A new session: from the cache file
+			load.append(time.perf_counter() - start)
+		targets = [rng.uniform(0, table.duration - 2) for _ in range(lookups)]
+		start = time.perf_counter()
+		for seconds in targets:
+			table.locate(seconds)
+		locate = (time.perf_counter() - start) / lookups
+		start = time.perf_counter()
+		for seconds in targets[:20]:
+			pm.decode_span(paths[-1], table, seconds, seconds + 2)
+		window = (time.perf_counter() - start) / 20
+	pygame.mixer.quit()
+	return np.mean(build) * 1e3, np.mean(load) * 1e3, locate * 1e6, window * 1e3
+
+
+def run_player(longPath, songs, seeks, seed=0):
+	"""Seeks through an AudioController on the SDL dummy driver: in the decoded long track, and right after
+	switching to another long track, while it is still decoding. Returns the controller's 'seek' latency
+	summary, how far the published position was from the target (beyond the time since the seek was issued) at
+	most, and the seconds from a skip-and-seek until the new track plays (at the target)."""
+	import pygame
+	import AudioModule as am
+	import PlayerModule as pm
+	import PlaylistModule as plm
+	rng = random.Random(seed)
+	pygame.mixer.init(frequency=44100, buffer=512)
+	playlist = plm.Playlist()
+	longId = playlist.add(longPath)
+	ids = [playlist.add(path) for path in songs]
+	with tempfile.TemporaryDirectory() as folder:
+		lengths = sk.FrameIndex('', os.path.join(folder, 'lengths'))  # The player's index builds its own tables
+		audio = am.AudioController(pm.Player(playlist, budgetMB=1, preloadAround=0, frames=sk.FrameIndex('', folder)),
+		                           outputLatency=512 / 44100).start()
+
+		def wait(done):
+			while not (audio.state.serial == audio.serial and done(audio.state)):
+				time.sleep(0.001)
+
+		def off(target, issued):
+			position, elapsed = audio.state.position(), time.perf_counter() - issued
+			return max(target - position, position - target - elapsed, 0.0)
+
+		audio.play(longId)
+		wait(lambda state: state.pending is None)
+		errors = []
+		for _ in range(seeks):
+			target = rng.uniform(0, audio.state.length)
+			issued = time.perf_counter()
+			audio.seek(target)
+			wait(lambda state: True)
+			errors.append(off(target, issued))
+		starts = []
+		for i in range(seeks):
+			trackId = ids[i % len(ids)]  # In turn, with no room to keep the others decoded
+			target = rng.uniform(0, lengths.get(playlist.path(trackId)).duration)
+			issued = time.perf_counter()
+			audio.play(trackId)
+			audio.seek(target)
+			wait(lambda state: state.pending is None)  # Playing windows decoded around the target
+			starts.append(time.perf_counter() - issued)
+			errors.append(off(target, issued))
+		audio.close()
+	pygame.mixer.quit()
+	return audio.latency.summary()['seek'], max(errors), np.median(starts)
+
+
+def run_swipes(speeds):
+	"""Seek seconds GestureEngine emits for synthetic three-finger swipes at the given speeds."""
+	recording = synthetic.swipe_sequence(speeds)
+	w, h = recording.frameSize
+	scale = np.array([w, h, 1], np.float32)
+	engine = gm.GestureEngine()
+	seeks = []
+	for i in range(len(recording.timestamps)):
+		seeks += [event.seconds for event in engine.update(recording.landmarks[i, :1] * scale, recording.timestamps[i])
+		          if isinstance(event, gm.Seek)]
+	return seeks
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Seeking: MP3 frame index cost, seek latency and swipe mapping")
+	parser.add_argument('--songs', metavar='DIR', required=True, help="folder with at least one MP3")
+	parser.add_argument('--minutes', type=float, default=4.0, help="length of the long track built from the first song")
+	parser.add_argument('--seeks', type=int, default=10)
+	parser.add_argument('--speeds', type=float, nargs='+', default=[2, 4, 6, 10, -10, 20],
+	                    help="swipe speeds in hand sizes per second, negative: left")
+	args = parser.parse_args()
+
+	songs = sorted(os.path.join(args.songs, name) for name in os.listdir(args.songs) if name.endswith('.mp3'))
+	with tempfile.TemporaryDirectory() as folder:
+		path = long_track(songs[0], args.minutes, folder)
+		for label, paths in (('songs', songs), (f'{args.minutes:g} min', [path])):
+			build, load, locate, window = run_index(paths, 10000)
+			print(f"frame index ({label}): build {build:.2f} ms, cached {load:.2f} ms per track, locate {locate:.1f} us, "
+			      f"2 s window decode {window:.1f} ms")
+		latency, error, start = run_player(path, [long_track(song, args.minutes, folder) for song in songs[-2:]],
+		                                   args.seeks)
+		print(f"seek latency ({args.minutes:g} min track): p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms "
+		      f"(with the mixer buffer); position off by {error * 1e3:.1f} ms at most; skip and seek playing after "
+		      f"{start:.2f} s")
+	seeks = run_swipes(args.speeds)
+	print(f"swipes at {args.speeds} hand sizes/s -> seeks of {[round(s, 1) for s in seeks]} s")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+
+import RecommendModule as rec
+
+
+def run_shuffle(tracks, ops, seed=0):
+	"""Time Recommender picks and weight updates on a library of `tracks` tracks; returns microseconds per op."""
+	rng = random.Random(seed)
+	with tempfile.TemporaryDirectory() as folder:
+		recommender = rec.Recommender(folder, seed=seed)
+		for trackId in range(tracks):
+			recommender.add(trackId, f"{folder}/Track{trackId}_John_Doe.mp3")
+		ids = [rng.randrange(tracks) for _ in range(ops)]
+
+		start = time.perf_counter()
+		for trackId in ids:
+			if trackId & 1:
+				recommender.played(trackId)
+			else:
+				recommender.skipped(trackId)
+		update = (time.perf_counter() - start) / ops
+
+		start = time.perf_counter()
+		current = None
+		for _ in range(ops):
+			current = recommender.pick(exclude=current)
+		pick = (time.perf_counter() - start) / ops
+
+		# Reference: a linear weighted pick, what random.choices does without cumulative weights
+		weights = list(recommender.weights.values)
+		population = range(tracks)
+		start = time.perf_counter()
+		for _ in range(min(ops, 200)):
+			rng.choices(population, weights)
+		linear = (time.perf_counter() - start) / min(ops, 200)
+	return update * 1e6, pick * 1e6, linear * 1e6
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Weighted shuffle cost per pick and per play/skip update")
+	parser.add_argument('--tracks', type=int, nargs='+', default=[1000, 10000, 100000])
+	parser.add_argument('--ops', type=int, default=20000)
+	args = parser.parse_args()
+
+	print(f"{'tracks':>8}{'update us':>12}{'pick us':>12}{'linear us':>12}")
+	for tracks in args.tracks:
+		update, pick, linear = run_shuffle(tracks, args.ops)
+		print(f"{tracks:>8}{update:>12.2f}{pick:>12.2f}{linear:>12.1f}")
+
+
+if __name__ == "__main__":
+	main()
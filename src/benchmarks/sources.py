@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+
+import SourcePoolModule as sp
+
+
+def run_sources(specs, landmarksOnly=False):
+	"""Pull every frame of the given sources through a SourcePool; returns (frames, wall seconds)."""
+	pool = sp.SourcePool(specs, landmarksOnly=landmarksOnly).start()
+	pool.read()  # Worker start-up (imports, MediaPipe load) is not part of the throughput
+	start = time.perf_counter()
+	while not pool.finished:
+		pool.read()
+	wall = time.perf_counter() - start
+	pool.close()
+	return sum(pool.received) - 1, wall
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Hand tracking throughput with 1..N sources in worker processes")
+	parser.add_argument('sources', nargs='+', metavar='SRC',
+	                    help="video files or recording folders; the list is cycled up to --max copies")
+	parser.add_argument('--max', type=int, default=os.cpu_count(), help="largest number of sources to run")
+	parser.add_argument('--landmarks', action='store_true', help="recorded landmarks instead of MediaPipe")
+	args = parser.parse_args()
+
+	print(f"{os.cpu_count()} cores")
+	print(f"{'sources':>8}{'frames':>10}{'FPS':>10}{'speed-up':>10}")
+	single = None
+	for n in range(1, args.max + 1):
+		specs = [args.sources[i % len(args.sources)] for i in range(n)]
+		frames, wall = run_sources(specs, args.landmarks)
+		fps = frames / wall
+		single = single or fps
+		print(f"{n:>8}{frames:>10}{fps:>10.1f}{fps / single:>10.2f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,120 @@
+import numpy as np
+import RecordModule as rm
+import InferenceModule as inf
+
+
+# Open right hand, palm to the camera, normalized coordinates with the wrist near the bottom
+OPEN_HAND = np.array([[0.50, 0.80, 0.0], [0.45, 0.75, 0.0], [0.42, 0.70, 0.0], [0.40, 0.65, 0.0], [0.38, 0.60, 0.0],
+                      [0.47, 0.60, 0.0], [0.47, 0.52, 0.0], [0.47, 0.47, 0.0], [0.47, 0.42, 0.0],
+                      [0.50, 0.60, 0.0], [0.50, 0.50, 0.0], [0.50, 0.45, 0.0], [0.50, 0.40, 0.0],
+                      [0.53, 0.60, 0.0], [0.53, 0.52, 0.0], [0.53, 0.47, 0.0], [0.53, 0.43, 0.0],
+                      [0.56, 0.62, 0.0], [0.56, 0.56, 0.0], [0.56, 0.52, 0.0], [0.56, 0.49, 0.02]], np.float32)
+
+
+def rotate(hand, degrees, center=None):
+	"""Rotate a (21, 3) hand in the image plane around its wrist (or `center`)."""
+	center = hand[0, :2] if center is None else np.asarray(center, np.float32)
+	a = np.radians(degrees)
+	rot = np.array([[np.cos(a), -np.sin(a)], [np.sin(a), np.cos(a)]], np.float32)
+	out = hand.copy()
+	out[:, :2] = (hand[:, :2] - center) @ rot.T + center
+	return out
+
+
+def hand_sequence(n, maxHands=2, fps=30, seed=0):
+	"""Synthetic landmark stream: one hand rocking +-60 degrees (song changes) while pinching (volume),
+	with a second hand joining for a while; returns a Recording usable with RecordModule.ReplayBackend."""
+	rng = np.random.default_rng(seed)
+	landmarks = np.zeros((n, maxHands, inf.NUM_LANDMARKS, 3), np.float32)
+	counts = np.ones(n, np.int8)
+	for i in range(n):
+		hand = OPEN_HAND.copy()
+		hand[4, :2] += (hand[8, :2] - hand[4, :2]) * (0.5 + 0.5 * np.sin(i / 15))  # Thumb towards index tip
+		landmarks[i, 0] = rotate(hand, 60 * np.sin(i / 40))
+		if maxHands > 1 and (i // 150) % 3 == 2:  # Every third 150-frame block shows two hands
+			landmarks[i, 1] = landmarks[i, 0] + [0.3, 0, 0]
+			landmarks[i, 0] -= [0.2, 0, 0]
+			counts[i] = 2
+	landmarks[:, :, :, :2] += rng.normal(0, 0.002, landmarks[:, :, :, :2].shape)  # Landmark jitter
+	handedness = np.tile(np.array([inf.RIGHT, inf.LEFT][:maxHands], np.int8), (n, 1))
+	scores = np.full((n, maxHands), 0.95, np.float32)
+	return rm.Recording(np.arange(n) / fps, np.arange(n), counts, landmarks, handedness, scores, (1080, 720), None)
+
+
+def circle_sequence(n, turnsPerSecond=1.0, radius=0.04, fps=30, jitter=0.002, seed=0):
+	"""Synthetic landmark stream: one open hand whose index fingertip draws circles, clockwise on screen for
+	positive `turnsPerSecond`; 0 keeps the fingertip still so only the jitter moves it."""
+	rng = np.random.default_rng(seed)
+	landmarks = np.zeros((n, 1, inf.NUM_LANDMARKS, 3), np.float32)
+	for i in range(n):
+		a = 2 * np.pi * turnsPerSecond * i / fps
+		hand = OPEN_HAND.copy()
+		hand[8, :2] += radius * np.array([np.cos(a) - 1, np.sin(a)], np.float32)  # Image y points down: clockwise
+		hand[7, :2] += (hand[8, :2] - OPEN_HAND[8, :2]) / 2
+		landmarks[i, 0] = hand
+	landmarks[:, :, :, :2] += rng.normal(0, jitter, landmarks[:, :, :, :2].shape)
+	handedness = np.full((n, 1), inf.RIGHT, np.int8)
+	scores = np.full((n, 1), 0.95, np.float32)
+	return rm.Recording(np.arange(n) / fps, np.arange(n), np.ones(n, np.int8), landmarks, handedness, scores, (1080, 720), None)
+
+
+def letter_stroke(strokes, rng, points=60, size=200, noise=0.03, tilt=10):
+	"""A hand-written looking version of one of `strokes` (HandwritingModule.LETTER_STROKES values): pixel points
+	drawn at an uneven pace, scaled, stretched and tilted a little, with jitter of `noise` letter sizes."""
+	stroke = np.asarray(strokes[rng.integers(len(strokes))], np.float64)
+	along = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(stroke, axis=0), axis=1))))
+	pace = np.cumsum(rng.uniform(0.3, 1.7, points))  # Faster and slower parts
+	targets = (pace - pace[0]) / (pace[-1] - pace[0]) * along[-1]
+	curve = np.stack([np.interp(targets, along, stroke[:, 0]), np.interp(targets, along, stroke[:, 1])], axis=1)
+	curve *= [rng.uniform(0.8, 1.2), 1.0]  # Narrower or wider letters
+	a = np.radians(rng.uniform(-tilt, tilt))
+	curve = curve @ np.array([[np.cos(a), -np.sin(a)], [np.sin(a), np.cos(a)]]).T
+	curve += rng.normal(0, noise, curve.shape)
+	return (curve * size * rng.uniform(0.7, 1.3) + [540, 360]).astype(np.float32)
+
+
+def writing_sequence(strokes, fps=30, seed=0):
+	"""Synthetic landmark stream of a hand pointing with its index finger to write each stroke (pixel points from
+	letter_stroke), opening between letters; returns a Recording usable with RecordModule.ReplayBackend."""
+	pointing = OPEN_HAND.copy()
+	pointing[[12, 16, 20], 1] = pointing[[10, 14, 18], 1] + 0.03  # Middle, ring and pinky tips below their joints
+	w, h = 1080, 720
+	frames = []
+	for stroke in strokes:
+		tip = stroke / [w, h]
+		frames += [pointing + np.append(point - pointing[8, :2], 0) for point in tip]
+		frames += [OPEN_HAND + np.append(tip[-1] - OPEN_HAND[8, :2], 0)] * (fps // 2)  # Half a second open
+	n = len(frames)
+	landmarks = np.asarray(frames, np.float32)[:, None]
+	handedness = np.full((n, 1), inf.RIGHT, np.int8)
+	scores = np.full((n, 1), 0.95, np.float32)
+	return rm.Recording(np.arange(n) / fps, np.arange(n), np.ones(n, np.int8), landmarks, handedness, scores, (w, h), None)
+
+
+def swipe_sequence(speeds, handSize=0.25, fps=30, pause=1.0):
+	"""Synthetic landmark stream of a hand with three fingers up swiping right at each of `speeds` (hand sizes per
+	second, negative: left) across half the frame, moving back slowly and resting `pause` seconds in between;
+	returns a Recording."""
+	three = OPEN_HAND.copy()
+	three[20, 1] = three[18, 1] + 0.03  # Pinky tip below its joint
+	three[:, :2] = (three[:, :2] - three[9, :2]) * handSize / np.linalg.norm(OPEN_HAND[0, :2] - OPEN_HAND[12, :2])
+	w, h = 1080, 720
+
+	def move(start, end, speed):
+		steps = max(int(abs(end - start) * w / (handSize * h) / abs(speed) * fps), 1)  # Hand size is vertical, in pixels
+		return [three + [start + (end - start) * (k + 1) / steps, 0.5, 0] for k in range(steps)]
+
+	x = 0.5
+	frames = [three + [x, 0.5, 0]] * int(pause * fps)
+	for speed in speeds:
+		start, end = (0.25, 0.75) if speed > 0 else (0.75, 0.25)
+		frames += move(x, start, 1.0)  # Back into position slowly, which must not seek
+		frames += [three + [start, 0.5, 0]] * int(pause * fps)
+		frames += move(start, end, speed)
+		x = end
+	frames += [three + [x, 0.5, 0]] * int(pause * fps)
+	n = len(frames)
+	landmarks = np.asarray(frames, np.float32)[:, None]
+	handedness = np.full((n, 1), inf.RIGHT, np.int8)
+	scores = np.full((n, 1), 0.95, np.float32)
+	return rm.Recording(np.arange(n) / fps, np.arange(n), np.ones(n, np.int8), landmarks, handedness, scores, (w, h), None)
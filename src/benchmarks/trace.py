@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Modules live in src/
+
+import numpy as np
+import TraceModule as trace
+
+
+def run_frames(tracer, frames, fps=30, actionEvery=15, seed=0):
+	"""Microseconds (median, p99) per Tracer.frame() and per Tracer.action(), on stamps spaced like a camera's
+	frames, with a gesture action every `actionEvery` frames."""
+	rng = random.Random(seed)
+	framed, acted = [], []
+	t = 0.0
+	for frameId in range(frames):
+		t += 1 / fps
+		capture, read = t, t + rng.uniform(0.001, 0.02)
+		hands = read + rng.uniform(0.01, 0.03)
+		gestures = hands + 0.0005
+		tilt = rng.uniform(0.2, 0.6) if frameId % (actionEvery * 2) == 0 else None
+		start = time.perf_counter()
+		tracer.frame(frameId, capture, read, hands, gestures, tilt)
+		framed.append(time.perf_counter() - start)
+		if frameId % actionEvery == 0:
+			kind = 'play' if tilt is not None else 'volume'
+			start = time.perf_counter()
+			tracer.action(frameId, kind, gestures + rng.uniform(0.002, 0.03))
+			acted.append(time.perf_counter() - start)
+	return (np.median(framed) * 1e6, np.percentile(framed, 99) * 1e6,
+	        np.median(acted) * 1e6, np.percentile(acted, 99) * 1e6)
+
+
+def run_export(tracer, repeats=50):
+	"""Milliseconds per Prometheus page and per summary(), what a scrape or a JSONL line costs."""
+	start = time.perf_counter()
+	for _ in range(repeats):
+		page = tracer.prometheus()
+	prometheus = (time.perf_counter() - start) / repeats
+	start = time.perf_counter()
+	for _ in range(repeats):
+		tracer.summary()
+	summary = (time.perf_counter() - start) / repeats
+	return prometheus * 1e3, summary * 1e3, len(page)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Latency tracing: per-frame and per-action cost, export cost")
+	parser.add_argument('--frames', type=int, default=30000)
+	parser.add_argument('--capacity', type=int, default=256)
+	args = parser.parse_args()
+
+	tracer = trace.Tracer(args.capacity)
+	frame, frameP99, action, actionP99 = run_frames(tracer, args.frames)
+	prometheus, summary, size = run_export(tracer)
+	print(f"{'frames':>7}{'frame us':>10}{'p99 us':>8}{'action us':>11}{'p99 us':>8}"
+	      f"{'scrape ms':>11}{'bytes':>7}{'summary ms':>12}")
+	print(f"{args.frames:>7}{frame:>10.2f}{frameP99:>8.2f}{action:>11.2f}{actionP99:>8.2f}"
+	      f"{prometheus:>11.2f}{size:>7}{summary:>12.2f}")
+	print(tracer.report())
+
+
+if __name__ == "__main__":
+	main()
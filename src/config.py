@@ -0,0 +1,127 @@
+# Runtime settings shared by main.py and the helper modules
+
+##################################################
+# Capture
+
+# 'latest' always processes the newest camera frame and drops stale ones,
+# 'every' processes every captured frame in order (useful for recorded video)
+captureMode = 'latest'
+captureRingSize = 3  # Preallocated frame buffers between the capture thread and the main loop
+
+##################################################
+# Hand inference
+
+# 'local' runs MediaPipe in the main loop, 'process' runs it in a worker process fed through shared memory
+inferenceBackend = 'local'
+# Frames in flight with the 'process' backend: 1 = lowest latency, 2+ = inference overlaps rendering
+# at the cost of one frame of landmark latency per extra slot
+pipelineDepth = 1
+
+# Run inference on a crop around the tracked hands (downscaled to roiSize pixels) instead of the full frame
+roiTracking = False
+roiSize = 320
+# Frame rate the latency governor tries to hold by switching modelComplexity 1 <-> 0 (None = fixed model)
+targetFps = None
+
+# Run MediaPipe only every N frames (or every inferenceInterval seconds when set); landmarks in between are
+# predicted by a One Euro filter, which also smooths them. landmarkSmoothing filters even at full rate.
+inferenceEvery = 1
+inferenceInterval = None
+landmarkSmoothing = False
+
+##################################################
+# Gestures
+
+# One hand: thumb-index distance (percent of hand size) below which the music is muted / above which it is full
+pinchMuteDistance = 10
+pinchMaxDistance = 75
+pinchOffset = 5  # Distance mapped to volume 0 inside the pinch range
+# Two hands: distance between the index finger bases, same scale
+spreadMuteDistance = 10
+spreadMaxDistance = 400
+# Tilt (degrees from horizontal) that changes the song; the gesture re-arms once the hand leaves the range
+songChangeAngle = 45
+volumeEpsilon = 0.0  # Smallest volume change that emits a VolumeSet event
+
+# One-hand volume: 'distance' maps the thumb-index distance, 'circle' turns it with index fingertip circles
+volumeMode = 'distance'
+circleBuffer = 32  # Fingertip positions the circle's center and radius are estimated from
+circleDeadZone = 2.0  # Degrees per frame below which fingertip motion is treated as jitter
+circleMinRadius = 8  # Smallest circle (percent of hand size) that counts
+circleVolumePerTurn = 0.25  # Volume change per full turn at circleSpeedRef
+circleSpeedRef = 1.0  # Turns per second; faster circles scale the change up, slower ones down (to a quarter)
+circleSpeedMax = 3.0  # Largest speed scale
+
+# Three-finger swipes seek: a swipe of swipeMinDistance hand sizes (wrist to middle fingertip) within swipeWindow
+# seconds at swipeMinSpeed hand sizes per second or more jumps swipeSecondsPerSpeed seconds per unit of speed
+swipeWindow = 0.3
+swipeMinDistance = 1.0
+swipeMinSpeed = 4.0
+swipeSecondsPerSpeed = 2.5
+swipeMaxSeek = 60.0  # Seconds
+swipeCooldown = 0.6  # Seconds after a swipe during which the hand can move back without seeking
+seekEndMargin = 1.0  # Seconds before the end of the track that a swipe past the end lands on
+
+##################################################
+# Playback
+
+# Decoded audio kept in memory for instant skips (the current track and preloadAround tracks either side
+# are always kept); a 4-minute stereo track is about 40 MB
+preloadBudgetMB = 256
+preloadAround = 1
+crossfade = 0.0  # Seconds of crossfade at natural track ends; 0 = gapless
+mixerBuffer = 512  # Samples per SDL audio buffer; also the output latency added to the command latency metric
+volumeRamp = 0.05  # Seconds a full-scale volume change is spread over to avoid zipper noise (0 = instant)
+audioVolumeEpsilon = 0.005  # Volume changes smaller than this are not sent to the mixer
+shuffle = False  # Random order without repeats until every track has played
+historySize = 200  # Tracks remembered for 'previous song'
+# Pick upcoming tracks at random, weighted by how often each was played to the end vs skipped early
+weightedShuffle = False
+quickSkipSeconds = 30  # Changing song before this counts as a skip for the weighted shuffle
+
+# Equalizer playback (--eq): tracks are filtered in blocks of eqBlock frames (23 ms at 1024) and the
+# gestures set bass/mid/treble by hand height instead ('e' switches between the two while running)
+equalizer = False
+eqBlock = 1024
+eqTaps = 2048  # Length the filters' impulse response is truncated to
+eqRangeDb = 12.0  # Largest boost or cut
+eqSpan = 0.6  # Central part of the frame height that maps to -eqRangeDb .. +eqRangeDb
+eqEpsilon = 0.5  # dB change below which no new setting is sent
+
+##################################################
+# Several sources (--source)
+
+# 'source': each camera is one user (one or two hands); 'hand': every hand is a user of its own (one-hand gestures)
+gestureUsers = 'source'
+roleReleaseSeconds = 2.0  # A user's control roles are freed after this long out of view
+
+##################################################
+# Air handwriting (--write, 'w' toggles it): point with the index finger to write a song's first letter
+
+strokeCapacity = 256  # Fingertip points kept per stroke; longer strokes are thinned to half
+strokePoints = 32  # Points a stroke is resampled to for matching
+strokeEndSeconds = 0.3  # Time out of the pointing pose that ends a stroke
+strokeMinLength = 1.5  # Shortest stroke (in hand sizes, wrist to middle knuckle) that is recognized
+strokeMaxDistance = 0.08  # Largest template distance (in stroke sizes) accepted as a letter; scribbles score 0.08-0.09
+
+##################################################
+# Hand position heatmap (--heatmap, 'h' toggles it)
+
+heatmap = False
+heatmapCell = 16  # Pixels per heatmap cell
+heatmapHalfLife = 30.0  # Seconds after which a landmark hit counts half
+heatmapRefresh = 0.5  # Seconds between colormap updates; the overlay is blended every frame
+heatmapOpacity = 0.5
+
+##################################################
+# Synced lyrics ('l' toggles them): songs/Title_Artist.lrc next to songs/Title_Artist.mp3
+
+lyrics = True
+lyricsContext = 1  # Lines shown before and after the current one
+lyricsCache = 8  # Tracks whose parsed lyrics are kept
+
+##################################################
+# Latency tracing (--metrics-port, --metrics-jsonl)
+
+traceCapacity = 256  # Frames whose stamps are kept until the mixer commands they caused are applied
+metricsInterval = 10.0  # Seconds between --metrics-jsonl lines
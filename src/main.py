@@ -37,449 +37,605 @@
 # Handwriting Recognition for Song Search:
 # Users could write the first letter of a song in the air, and the system searches for matching songs.
 
+import time
+IMPORT_START = time.perf_counter()  # Start of the import phase in the startup breakdown
+
 import os
 import cv2
-import time
-import collections
-import pygame
-import HandTrackingModule as htm
-import math
-from mutagen.mp3 import MP3
+import argparse
 import numpy as np
-from RealtimeSTT import AudioToTextRecorder
+import threading
+import functools
+import HandTrackingModule as htm
+import GestureModule as gm
+import OverlayModule as ov
+import LibraryIndexModule as lib
+import PlaylistModule as plm
+import SeekModule as sk
+import RecommendModule as rec
+import SearchModule as srch
+import HandwritingModule as hw
+import LyricsModule as lyr
+import SourcePoolModule as sp
+import InferenceModule as inf
+import CaptureModule as cm
+import RecordModule as rm
+import ProfilerModule as prof
+import TraceModule as trace
+import AudioModule as am
+import config
 
 
 ####################################################################################################
 
-def calculate_fps(pTime, cTime):
-	cTime = time.time()
-	fps = round(1 / (cTime - pTime), 3) if cTime != pTime else 0
-	fps_values.append(fps)
-	avg_fps = sum(fps_values) / len(fps_values)
-	pTime = cTime
-	return avg_fps, pTime
-
-##################################################
-
-def get_angle_from_tangent(opposite, adjacent):
-	if adjacent == 0:
-		if opposite > 0:
-			return 90.0
-		elif opposite < 0:
-			return -90.0
-		else:
-			return 0
-	
-	angle_radians = math.atan(opposite / adjacent)
-	angle_degrees = math.degrees(angle_radians)
-	return angle_degrees
-
-##################################################
-
-def change_song(direction=1):
-	"""Change song and return its name."""
-	global current_song_index, paused
-	
-	pygame.mixer.music.stop()
-	current_song_index = (current_song_index + direction) % len(songs)
-	pygame.mixer.music.load(songs[current_song_index])
-	pygame.mixer.music.play()
-	paused = False
-	
-	# Extract clean song name
-	return songs[current_song_index].split('/')[-1].replace('.mp3', '')
-
-
-
-##################################################
-
 def format_song_title(words_list):
 	if not words_list:
 		return ""
 	
-	title = words_list[0]  # First element is the song title
-	artist_section = words_list[1:]  # The rest is the artist and features
-	
-	if 'Ft' in artist_section:
-		ft_index = artist_section.index('Ft')
-		main_artist = " ".join(artist_section[:ft_index])
-		features = " ".join(artist_section[ft_index + 1:])
+	title, main_artist, features = lib.split_song_name(words_list)
+	if features:
 		return f"{title} by {main_artist} Ft. {features}"
 	else:
-		main_artist = " ".join(artist_section)
 		return f"{title} by {main_artist}"
 	
-##################################################
-
-def sec_to_min(seconds):
-	"""Convert seconds to minutes and seconds."""
-	minutes = int(seconds // 60)
-	seconds = int(seconds % 60)
-	return f"{minutes}:{seconds:02}"
-
-
-def process_text(text):
-    print(text)
-
 ####################################################################################################
 
-pygame.mixer.init(frequency=44100)
-folderPath = '../songs'
-songs = [os.path.join(folderPath, song).replace("\\", "/")
-         for song in os.listdir(folderPath) if song.lower().endswith('.mp3')]
+# color = (255,255,255)
+color = (53,0,0)
+seccolor = (255,255,255)
+triggeredColor = (0, 255, 0)
 
-current_song_index = 0
-paused = False
 
-current_song = change_song()
+def draw_hand_label(img, label, hand, z, shift, thickness):
+	"""Draw 'L'/'R' next to the pinky base, larger the closer the hand is to the camera."""
+	font_size = max(0.3, min(3.0, 0.5 + (1 / (z + 0.2) * 0.05)))
+	pos = (hand[17][0] + int(shift * font_size), hand[17][1] - int(20 * font_size))
+	cv2.putText(img, label, pos, cv2.FONT_HERSHEY_SIMPLEX, font_size, color,
+	            max(1, int(font_size * thickness)),  # Thickness scales with size
+	            lineType=cv2.LINE_AA)
 
 ##################################################
 
-# Video Capture Setup
-wCam, hCam = 1080, 720
-cap = cv2.VideoCapture(0)
-cap.set(3, wCam)
-cap.set(4, hCam)
+def draw_volume(img, volume, angleVolume, midX, midY):
+	if abs(angleVolume) > 45:
+		cv2.putText(img, f"{volume * 100:.0f}", (midX + 20, midY + 10), cv2.FONT_HERSHEY_PLAIN, 1,
+		            color, 1, lineType=cv2.LINE_AA)
+		cv2.putText(img, "VOLUME", (midX + 20, midY - 30), cv2.FONT_HERSHEY_PLAIN, 1, color, 1,
+		            lineType=cv2.LINE_AA)
+	elif abs(angleVolume) < 45:
+		cv2.putText(img, "VOLUME", (midX - 8, midY - 50), cv2.FONT_HERSHEY_PLAIN, 1, color, 1,
+		            lineType=cv2.LINE_AA)
+		cv2.putText(img, f"{volume * 100:.0f}", (midX - 10, midY - 20), cv2.FONT_HERSHEY_PLAIN, 1,
+		            color, 1, lineType=cv2.LINE_AA)
 
-##################################################
 
-# color = (255,255,255)
-color = (53,0,0)
-seccolor = (255,255,255)
-pTime = 0
-cTime = 0
-dist = 0
-Dist2hR = 0
-Dist2hL = 0
-midXdist = 0
-midYdist = 0
-angle = 0
-angleR = 0
-angleP = 0
-fps_values = collections.deque(maxlen=30)
-detector = htm.handDetector(minDetConf=0.8, minTrackConf=0.8)
-changeSongF = False
-changeSongB = False
-hand = ''
-ColorAngle1hP = color
-ColorAngle1hN = color
-changeSongN1H = False
-changeSongP1H = False
+####################################################################################################
 
+class App():
+	"""The hand-controlled player.
 
-####################################################################################################
+	Camera, mixer, song library, hand detector and voice input are each created on first use, so importing
+	this module starts nothing (inference worker processes and tests re-import it) and heavy packages
+	(pygame, mediapipe, mutagen, RealtimeSTT) are only loaded by the subsystems that need them. The library
+	scan streams into the playlist on a background thread, so playback starts with the first track found.
+	Each creation is timed, and the breakdown is printed once the first frame is done.
+	"""
 
-def main():
-	global pTime, cTime, dist, midXdist, midYdist, angle, angleR, angleP, fps_values, current_song, changeSongF, changeSongB, hand, ColorAngle1hP, ColorAngle1hN, changeSongN1H, changeSongP1H, paused
-	# print("Wait until it says 'speak now'")
-	# recorder = AudioToTextRecorder(wake_words="jarvis")
-	
-	while True:
-		# recorder.text(process_text)
-		success, img = cap.read()
-		img = detector.findHands(img, draw=False)  # Draw hands on the image
-		fingers = detector.numFingers(img, detector.findPos(img, draw=False), draw=False)  # Get the number of fingers
-		numHands = detector.numHands(numHands=False)
-		lmList = detector.findPos(img, draw=False)
+	def __init__(self, args):
+		self.args = args
+		self.headless = args.headless
+		self.folderPath = '../songs'
+		self.startup = prof.StartupTimer(IMPORT_START)
+		self.startup.add('imports', time.perf_counter() - IMPORT_START)
 		
-		################################################################################################
+		self.current_song_index = None  # Playlist track id
+		self.current_song = ''
+		self.paused = False
+		self.fpsCounter = prof.FpsCounter(30)  # Average FPS over the last 30 frames
+		self.tracer = trace.Tracer(config.traceCapacity)  # Motion-to-action latency of gesture commands
+		self.engine = gm.GestureEngine()  # Volume, pause and song-change gestures with their hysteresis state
+		self.hud = ov.HudOverlay(color, seccolor, barType=1)  # Title and progress bar, static parts cached per song
+		self.captions = ov.TextSprites(color)  # 'ROTATE - NEXT/PREV SONG', rendered once
+		self.showHeatmap = args.heatmap or config.heatmap  # Toggled with 'h'
+		self.showLyrics = config.lyrics  # Synced lyrics from .lrc files next to the songs; toggled with 'l'
+		self.lyricsOverlay = ov.LyricsOverlay(color, seccolor, context=config.lyricsContext)
+		self.writing = args.write  # Air handwriting instead of the gestures; toggled with 'w'
+		self.equalizer = args.eq or config.equalizer  # Tracks play through EqualizerModule.EqPlayer
+		self.eqControl = self.equalizer  # EQ gestures instead of volume and song changes; toggled with 'e'
+		self.eqGestures = gm.EqGestures()
+	
+	##################################################
+	# Subsystems, created on first use
+	
+	@functools.cached_property
+	def playlist(self):
+		with self.startup.phase('scan'):  # Only until the first track is found
+			playlist = plm.Playlist(shuffle=config.shuffle, historySize=config.historySize,
+			                        recommender=self.recommender, weighted=config.weightedShuffle)
+			firstTrack = threading.Event()
+			playlist.scan(self.folderPath, firstTrack=firstTrack)  # Keeps adding tracks while we play
+			firstTrack.wait()
+			return playlist
+	
+	@functools.cached_property
+	def recommender(self):
+		return rec.Recommender(self.folderPath)  # Play/skip counts from earlier sessions
+	
+	@functools.cached_property
+	def library(self):
+		with self.startup.phase('library'):
+			library = lib.LibraryIndex(self.folderPath)  # Cached track lengths; new or changed files are read on get()
+			playlist = self.playlist
+			
+			def revalidate():
+				playlist.scanned.wait()
+				library.scan(list(playlist.paths))  # Re-read changed files, forget deleted ones
+			
+			threading.Thread(target=revalidate, name='LibraryScan', daemon=True).start()
+			return library
+	
+	@functools.cached_property
+	def frames(self):
+		return sk.FrameIndex(self.folderPath)  # MP3 frame offsets per track, built when it is first decoded
+	
+	@functools.cached_property
+	def audio(self):
+		with self.startup.phase('audio'):
+			import pygame
+			import PlayerModule as pm
+			pygame.mixer.init(frequency=44100, buffer=config.mixerBuffer)
+			if self.equalizer:
+				import EqualizerModule as eqm
+				player = eqm.EqPlayer(self.playlist, block=config.eqBlock, taps=config.eqTaps,
+				                      budgetMB=config.preloadBudgetMB, preloadAround=config.preloadAround,
+				                      onTrackEnd=self.recommender.played, frames=self.frames)
+			else:
+				player = pm.Player(self.playlist, crossfade=config.crossfade, budgetMB=config.preloadBudgetMB,
+				                   preloadAround=config.preloadAround, onTrackEnd=self.recommender.played, frames=self.frames)
+			# Every mixer call happens on the audio thread; the video loop only queues commands and reads snapshots
+			return am.AudioController(player, epsilon=config.audioVolumeEpsilon, ramp=config.volumeRamp,
+			                          outputLatency=config.mixerBuffer / 44100, tracer=self.tracer).start()
+	
+	@functools.cached_property
+	def recording(self):
+		with self.startup.phase('recording'):
+			return rm.load_recording(self.args.replay)
+	
+	@functools.cached_property
+	def cap(self):
+		with self.startup.phase('camera'):
+			if self.args.replay:
+				source = rm.RecordingSource(self.recording, useVideo=not self.args.landmarks, realtime=self.args.realtime)
+				return cm.FrameGrabber(source, cm.CAPTURE_EVERY, config.captureRingSize).start()  # Every recorded frame, in order
+			
+			wCam, hCam = 1080, 720
+			cap = cv2.VideoCapture(0)
+			cap.set(3, wCam)
+			cap.set(4, hCam)
+			if config.captureMode == cm.CAPTURE_LATEST:
+				cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Don't let stale frames queue up in the driver
+			return cm.FrameGrabber(cap, config.captureMode, config.captureRingSize).start()  # Camera reads run on their own thread
+	
+	@functools.cached_property
+	def detector(self):
+		with self.startup.phase('detector'):
+			if self.args.replay and self.args.landmarks:
+				return htm.handDetector(backend=rm.ReplayBackend(self.recording))  # Recorded landmarks, no MediaPipe
+			return htm.handDetector(minDetConf=0.8, minTrackConf=0.8, backend=config.inferenceBackend,
+			                        pipelineDepth=config.pipelineDepth, roi=config.roiTracking, roiSize=config.roiSize,
+			                        targetFps=config.targetFps, inferEvery=config.inferenceEvery,
+			                        inferInterval=config.inferenceInterval, smooth=config.landmarkSmoothing)
+	
+	@functools.cached_property
+	def sources(self):
+		with self.startup.phase('sources'):
+			return sp.SourcePool(self.args.source, landmarksOnly=self.args.landmarks, realtime=self.args.realtime).start()
+	
+	@functools.cached_property
+	def heatmap(self):
+		return ov.Heatmap(cell=config.heatmapCell, halfLife=config.heatmapHalfLife, refresh=config.heatmapRefresh,
+		                  opacity=config.heatmapOpacity)
+	
+	@functools.cached_property
+	def lyrics(self):
+		return lyr.LyricsLoader(config.lyricsCache).start()  # .lrc files are parsed on its thread
+	
+	@functools.cached_property
+	def recorder(self):
+		return rm.Recorder(self.args.record) if self.args.record else None
+	
+	@functools.cached_property
+	def metricsServer(self):
+		"""Prometheus text endpoint for the tracer's histograms (started by run()), or None without --metrics-port."""
+		if not self.args.metrics_port:
+			return None
+		return trace.MetricsServer(self.tracer, self.args.metrics_port)
+	
+	@functools.cached_property
+	def metricsDump(self):
+		"""Periodic JSONL latency summaries (started by run()), or None without --metrics-jsonl."""
+		if not self.args.metrics_jsonl:
+			return None
+		return trace.JsonlDump(self.tracer, self.args.metrics_jsonl, config.metricsInterval)
+	
+	@functools.cached_property
+	def search(self):
+		with self.startup.phase('search'):
+			index = srch.SearchIndex()
+			self.playlist.subscribe(index.add)  # Tracks the scan finds later are indexed as they arrive
+			return index
+	
+	@functools.cached_property
+	def handwriting(self):
+		with self.startup.phase('handwriting'):
+			index = hw.LetterIndex()
+			self.playlist.subscribe(index.add)
+			return hw.AirWriter(index)  # Letter templates are normalized here, once
+	
+	@functools.cached_property
+	def voice(self):
+		"""Voice and typed commands, or None when none of --voice, --voice-wav and --say was given."""
+		args = self.args
+		if not (args.voice or args.voice_wav or args.say):
+			return None
+		with self.startup.phase('voice'):
+			recorder = None
+			if args.voice or args.voice_wav:
+				from RealtimeSTT import AudioToTextRecorder
+				if args.voice_wav:
+					recorder = AudioToTextRecorder(use_microphone=False, spinner=False)  # Fed from the file instead
+				else:
+					print("Wait until it says 'speak now'")
+					recorder = AudioToTextRecorder(wake_words=srch.WAKE_WORD)
+			voice = srch.VoiceCommands(self.search, recorder).start()
+			if args.voice_wav:
+				voice.feedWav(args.voice_wav)
+			for text in args.say:
+				voice.submit(text)
+			return voice
+	
+	##################################################
+	
+	def changeSong(self, direction=1):
+		"""Change song (direction 0 replays the current one) and return its name."""
+		playlist = self.playlist
+		if direction != 0:
+			self.leaveTrack()
+		if direction > 0:
+			trackId = playlist.next()
+		elif direction < 0:
+			trackId = playlist.prev()
+		else:
+			trackId = playlist.current
+		if trackId is None:
+			return ''  # No songs found
+		self.current_song_index = trackId
+		self.audio.play(trackId)  # The audio thread swaps in the preloaded track, or starts it once decoded
+		self.paused = False
 		
-
+		return self.trackName(trackId)
+	
+	def playTrack(self, trackId):
+		"""Play a track picked by id (e.g. a voice search) and return its name."""
+		self.leaveTrack()
+		self.current_song_index = self.playlist.jump(trackId)
+		self.audio.play(trackId)
+		self.paused = False
+		return self.trackName(trackId)
+	
+	def leaveTrack(self):
+		"""Count the current track as skipped if it is left soon after it started."""
+		if self.current_song_index is None:
+			return
+		state = self.audio.state
+		if state.index == self.current_song_index and 0 < state.length and state.position() < config.quickSkipSeconds:
+			self.recommender.skipped(self.current_song_index)  # Comes up less often in the weighted shuffle
+	
+	def trackName(self, trackId):
+		"""Clean song name of a playlist track."""
+		return self.playlist.path(trackId).split('/')[-1].replace('.mp3', '')
+	
+	##################################################
+	
+	def drawGestures(self, img):
+		"""Overlay for the gesture state GestureEngine.update left behind for this frame."""
+		engine, detector, captions = self.engine, self.detector, self.captions
+		if engine.numHands == 0:
+			return
+		lm = detector.landmarks
+		boxes = detector.boundingBoxes().tolist()  # xMin, yMin, xMax, yMax per hand
+		midX, midY = engine.mid
 		
-		if len(lmList) != 0:
-			if numHands == 1:  # If only one hand is detected
-				detector.drawLines(img, [[4, 8]], color)  # For drawing the connection between thumb and index fingers
-				dist, midXdist, midYdist = detector.findDistance(lmList, lmList, img, 4,
-				                                        8)  # Distance between thumb and index fingers
-			# print('dist', dist, midXdist, midYdist)
-			elif numHands == 2:  # If two hands are detected
-				lmList1, lmList2 = lmList[:21], lmList[21:]  # Split the landmarks into two hands
-				dist, midXdist, midYdist = detector.findDistance(lmList1, lmList2, img, 5, 5) # Distance between the index fingers of both hands
+		if engine.numHands == 1:
+			detector.drawLines(img, [[4, 8]], color)  # For drawing the connection between thumb and index fingers
+			hand1h = detector.pixels[0].tolist()  # [x, y] per landmark
+			if engine.hand == 'LEFT':
+				draw_hand_label(img, "L", hand1h, float(lm[0, 19, 2]), 40, 2)
+				labelP, labelN = 'ROTATE - PREV SONG', 'ROTATE - NEXT SONG'
+			else:
+				draw_hand_label(img, "R", hand1h, float(lm[0, 19, 2]), -40, 1.5)
+				labelP, labelN = 'ROTATE - NEXT SONG', 'ROTATE - PREV SONG'
+			ColorAngle1hP = triggeredColor if engine.triggeredP else color
+			ColorAngle1hN = triggeredColor if engine.triggeredN else color
 			
-			############################################################################################
-			# Handle volume control (1 hand)
-			if dist is not None and numHands == 1:
-				if sum(fingers) == 0 and paused == False:
-					pygame.mixer.music.pause()
-					paused = True
-				elif sum(fingers) == 5 and paused == True:
-					pygame.mixer.music.unpause()
-					paused = False
-
-				dist = float(dist * 100)  # Scale the distance for volume control
-				# print('dist', dist)
-				if dist < 10:
-					volume = 0  # Mute the music if distance is less than 5
-					pygame.mixer.music.set_volume(volume)
-				elif dist > 75:
-					volume = 1
-					pygame.mixer.music.set_volume(volume)
-				else:
-					# Normalize the volume for distances between 5 and 75
-					volume = (dist - 5) / (75 - 5)  # Normalize to the range 0-1
-					pygame.mixer.music.set_volume(volume)
-				
-				if lmList[17][1] > lmList[3][1]:
-					hand = 'LEFT'
-				else:
-					hand = 'RIGHT'
-				
-				angle = get_angle_from_tangent(lmList[12][2] - lmList[0][2], lmList[12][1] - lmList[0][1])
-				angleVolume = get_angle_from_tangent(lmList[8][2] - lmList[4][2], lmList[8][1] - lmList[4][1])
-				angleP = abs(angle)
-				angleN = angle
-				if angleN > 0:
-					angleP = 180 - angleP
-				if angleN < 0:
-					angleN = 180 + angleN
-				if hand == 'LEFT':
-					if 0 < angleP < 45:
-						if changeSongP1H:
-							ColorAngle1hP = (0, 255, 0)
-							changeSongP1H = False
-							current_song = change_song(-1)
-					else:
-						changeSongP1H = True  # Reset only when angle exits range
-						ColorAngle1hP = color
-					
-					if 0 < angleN < 45:
-						if changeSongN1H:
-							ColorAngle1hN = (0, 255, 0)
-							changeSongN1H = False
-							current_song = change_song(1)
-					else:
-						changeSongN1H = True  # Reset only when angle exits range
-						ColorAngle1hN = color
-				elif hand == 'RIGHT':
-					if 0 < angleP < 45:
-						if changeSongP1H:
-							ColorAngle1hP = (0, 255, 0)
-							changeSongP1H = False
-							current_song = change_song(1)
-					else:
-						changeSongP1H = True  # Reset only when angle exits range
-						ColorAngle1hP = color
-					
-					if 0 < angleN < 45:
-						if changeSongN1H:
-							ColorAngle1hN = (0, 255, 0)
-							changeSongN1H = False
-							current_song = change_song(-1)
-					else:
-						changeSongN1H = True  # Reset only when angle exits range
-						ColorAngle1hN = color
-				
-				if hand == 'LEFT':
-					left_z1h = lmList[19][3]  # Left pinky tip depth
-					# Left hand scaling parameters (dramatic effect)
-					base_sizeL1h = 0.5  # Minimum base size
-					max_sizeL1h = 3.0  # Very large maximum size
-					min_sizeL1h = 0.3  # Smallest allowed size
-					z_scaleL1h = 0.05  # Aggressive scaling factor
-					font_sizeL1h = max(min_sizeL1h, min(max_sizeL1h, base_sizeL1h + (1 / (left_z1h + 0.2) * z_scaleL1h)))
-					l_pos = (lmList[17][1] + int(40 * font_sizeL1h), lmList[17][2] - int(20 * font_sizeL1h))
-					cv2.putText(img, "L", l_pos, cv2.FONT_HERSHEY_SIMPLEX,
-					            font_sizeL1h, color,  # Blue color
-					            max(1, int(font_sizeL1h * 2)),  # Thickness scales with size
-					            lineType=cv2.LINE_AA)
-					yMin = min(lmList, key=lambda x: x[2] if len(x) > 2 else float('-inf'))
-					xMin = min(lmList, key=lambda x: x[1] if len(x) > 1 else float('-inf'))
-					xMax = max(lmList, key=lambda x: x[1] if len(x) > 1 else float('inf'))
-					yMin = yMin[2] + 20
-					xMin = xMin[1]
-					xMax = xMax[1]
-					cv2.ellipse(img, (xMax, yMin), (50, 50), 270, 0, 90, color, 1, cv2.LINE_AA)
-					cv2.ellipse(img, (xMin, yMin), (50, 50), 180, 0, 90, color, 1, cv2.LINE_AA)
-					cv2.putText(img, 'ROTATE - PREV SONG', (xMax + 50, yMin - 50),
-					            cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
-					cv2.putText(img, f'{int(angleP)}', (xMax + 60, yMin - 20),
-					            cv2.FONT_HERSHEY_PLAIN, 1, ColorAngle1hP, 1, lineType=cv2.LINE_AA)
-					cv2.putText(img, 'ROTATE - NEXT SONG', (xMin - 200, yMin - 50),
-					            cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
-					cv2.putText(img, f'{int(angleN)}', (xMin - 80, yMin - 20),
-					            cv2.FONT_HERSHEY_PLAIN, 1, ColorAngle1hN, 1, lineType=cv2.LINE_AA)
-				elif hand == 'RIGHT':
-					right_z1h = lmList[19][3]
-					# Right hand scaling parameters (subtle effect)
-					base_sizeR1h = 0.5  # Medium base size
-					max_sizeR1h = 3.0  # Moderate maximum size
-					min_sizeR1h = 0.3  # Minimum size
-					z_scale1h = 0.05  # Gentle scaling factor
-					font_sizeR1h = max(min_sizeR1h, min(max_sizeR1h, base_sizeR1h + (1 / (right_z1h + 0.2) * z_scale1h)))
-					yMin = min(lmList, key=lambda x: x[2] if len(x) > 2 else float('-inf'))
-					xMin = min(lmList, key=lambda x: x[1] if len(x) > 1 else float('-inf'))
-					xMax = max(lmList, key=lambda x: x[1] if len(x) > 1 else float('inf'))
-					yMin = yMin[2] + 20
-					xMin = xMin[1]
-					xMax = xMax[1]
-					r_pos = (lmList[17][1] - int(40 * font_sizeR1h), lmList[17][2] - int(20 * font_sizeR1h))
-					cv2.putText(img, "R", r_pos, cv2.FONT_HERSHEY_SIMPLEX,
-					            font_sizeR1h, color,  # Green color
-					            max(1, int(font_sizeR1h * 1.5)), lineType=cv2.LINE_AA)
-					cv2.ellipse(img, (xMax, yMin), (50, 50), 270, 0, 90, color, 1, cv2.LINE_AA)
-					cv2.ellipse(img, (xMin, yMin), (50, 50), 180, 0, 90, color, 1, cv2.LINE_AA)
-					cv2.putText(img, 'ROTATE - NEXT SONG', (xMax + 50, yMin - 50),
-					            cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
-					cv2.putText(img, f'{int(angleP)}', (xMax + 60, yMin - 20),
-					            cv2.FONT_HERSHEY_PLAIN, 1, ColorAngle1hP, 1, lineType=cv2.LINE_AA)
-					cv2.putText(img, 'ROTATE - PREV SONG', (xMin - 200, yMin - 50),
-					            cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
-					cv2.putText(img, f'{int(angleN)}', (xMin - 80, yMin - 20),
-					            cv2.FONT_HERSHEY_PLAIN, 1, ColorAngle1hN, 1, lineType=cv2.LINE_AA)
-				
-				if abs(angleVolume) > 45:
-					cv2.putText(img, f"{volume * 100:.0f}", (midXdist + 20, midYdist + 10), cv2.FONT_HERSHEY_PLAIN, 1,
-					            color, 1, lineType=cv2.LINE_AA)
-					cv2.putText(img, f"VOLUME", (midXdist + 20, midYdist - 30), cv2.FONT_HERSHEY_PLAIN, 1, color, 1,
-					            lineType=cv2.LINE_AA)
-				elif abs(angleVolume) < 45:
-					cv2.putText(img, f"VOLUME", (midXdist - 8, midYdist - 50), cv2.FONT_HERSHEY_PLAIN, 1, color, 1,
-					            lineType=cv2.LINE_AA)
-					cv2.putText(img, f"{volume * 100:.0f}", (midXdist - 10, midYdist - 20), cv2.FONT_HERSHEY_PLAIN, 1,
-					            color, 1, lineType=cv2.LINE_AA)
+			xMin, yMin, xMax, _ = boxes[0]
+			yMin = yMin + 20
+			cv2.ellipse(img, (xMax, yMin), (50, 50), 270, 0, 90, color, 1, cv2.LINE_AA)
+			cv2.ellipse(img, (xMin, yMin), (50, 50), 180, 0, 90, color, 1, cv2.LINE_AA)
+			captions.draw(img, labelP, (xMax + 50, yMin - 50))
+			cv2.putText(img, f'{int(engine.angleP)}', (xMax + 60, yMin - 20),
+			            cv2.FONT_HERSHEY_PLAIN, 1, ColorAngle1hP, 1, lineType=cv2.LINE_AA)
+			captions.draw(img, labelN, (xMin - 200, yMin - 50))
+			cv2.putText(img, f'{int(engine.angleN)}', (xMin - 80, yMin - 20),
+			            cv2.FONT_HERSHEY_PLAIN, 1, ColorAngle1hN, 1, lineType=cv2.LINE_AA)
+			draw_volume(img, engine.volume, engine.angleVolume, midX, midY)
+		
+		elif engine.numHands == 2:
+			left, right = engine.left, engine.right
+			draw_volume(img, engine.volume, engine.angleVolume, midX, midY)
+			draw_hand_label(img, "L", detector.pixels[left].tolist(), float(lm[left, 19, 2]), 40, 2)
+			draw_hand_label(img, "R", detector.pixels[right].tolist(), float(lm[right, 19, 2]), -40, 1.5)
+			
+			ColorRAngle = color if engine.angleR > engine.songChangeAngle else triggeredColor
+			ColorLAngle = color if engine.angleL > engine.songChangeAngle else triggeredColor
+			yMinL = boxes[left][1] + 20
+			yMinR = boxes[right][1] + 20
+			xMinR = boxes[right][0]
+			xMaxL = boxes[left][2]
+			
+			cv2.ellipse(img, (xMaxL, yMinL), (50,50), 270, 0, 90, color, 1, cv2.LINE_AA)
+			captions.draw(img, 'ROTATE - PREV SONG', (xMaxL + 50, yMinL - 50))
+			cv2.putText(img, f'{int(engine.angleL)}', (xMaxL + 60, yMinL - 20 ), cv2.FONT_HERSHEY_PLAIN, 1, ColorLAngle, 1, lineType=cv2.LINE_AA)
+			
+			cv2.ellipse(img, (xMinR, yMinR), (50,50), 180, 0, 90, color, 1, cv2.LINE_AA)
+			captions.draw(img, 'ROTATE - NEXT SONG', (xMinR - 200, yMinR - 50))
+			cv2.putText(img, f'{int(engine.angleR)}', (xMinR - 80, yMinR - 20 ), cv2.FONT_HERSHEY_PLAIN, 1, ColorRAngle, 1, lineType=cv2.LINE_AA)
+	
+	def drawWriting(self, img):
+		"""The stroke being written and the last recognized letter."""
+		writer = self.handwriting
+		if writer.writing:
+			cv2.polylines(img, [writer.stroke.points.astype(np.int32)], False, triggeredColor, 3, cv2.LINE_AA)
+		label = 'WRITE A LETTER' if writer.letter is None else f'LETTER {writer.letter}'
+		cv2.putText(img, label, (10, 60), cv2.FONT_HERSHEY_PLAIN, 1.5, color, 2, lineType=cv2.LINE_AA)
+	
+	def drawEq(self, img):
+		"""Equalizer settings, the band under the hand highlighted."""
+		gestures = self.eqGestures
+		for i, (band, value) in enumerate(gestures.values.items()):
+			text = f'{band.upper()} {value:+.2f}' if band == 'balance' else f'{band.upper()} {value:+.1f} dB'
+			cv2.putText(img, text, (10, 60 + 25 * i), cv2.FONT_HERSHEY_PLAIN, 1.5,
+			            triggeredColor if band == gestures.band else color, 2, lineType=cv2.LINE_AA)
+	
+	##################################################
+	
+	def run(self):
+		self.current_song = self.changeSong(0)
+		cap, detector, engine, recorder, voice = self.cap, self.detector, self.engine, self.recorder, self.voice
+		tracer = self.tracer
+		for exporter in (self.metricsServer, self.metricsDump):
+			if exporter is not None:
+				exporter.start()  # Until close()
+		titleSong, songTitle = None, ''
+		lyricsTrack, lyricsPath = None, None
+		firstFrame = True
+		
+		while True:
+			success, img = cap.read()
+			if not success:
+				break  # Camera closed or end of video
+			readAt = time.perf_counter()
+			img = detector.findHands(img, draw=False, timestamp=cap.timestamp)  # Draw hands on the image
+			handsAt = time.perf_counter()
+			if recorder is not None:
+				recorder.add(img, detector, cap.timestamp, cap.frameId)
+			if self.showHeatmap or self.args.heatmap_out:
+				self.heatmap.add(detector.landmarks, cap.timestamp, detector.frameSize)
 			
 			############################################################################################
 			
-			elif dist is not None and numHands == 2:
-				dist = float(dist * 100)  # Normalize the distance for volume control
-				# For two hands, control volume with the distance between the index fingers
-				if dist < 10:
-					volume = 0
-					pygame.mixer.music.set_volume(volume)
-				elif dist > 400:
-					volume = 1
-					pygame.mixer.music.set_volume(volume)
-				else:
-					volume = (dist - 10) / (400 - 10)
-					pygame.mixer.music.set_volume(volume)
-				
-	
-				if lmList[17][1] < lmList[17 + 21][1]:
-					left_hand = lmList2
-					right_hand = lmList1
-					left_label = "LEFT (Prev Song)"
-					right_label = "RIGHT (Next Song)"
+			tilt = None
+			if self.writing:
+				events = self.handwriting.update(detector.landmarks, cap.timestamp)  # A letter plays its first song
+			elif self.eqControl:
+				events = self.eqGestures.update(detector.landmarks, cap.timestamp, detector.frameSize)
+			else:
+				events = engine.update(detector.landmarks, cap.timestamp, self.paused)
+				tilt = engine.tiltTime
+			tracer.frame(cap.frameId, cap.grabTime, readAt, handsAt, time.perf_counter(), tilt)
+			tracer.current = cap.frameId  # Mixer commands from these events are traced back to this frame
+			self.handleEvents(events)
+			tracer.current = None
+			if voice is not None:
+				self.handleEvents(voice.poll())  # Transcribed on their own thread; never waits here
+			state = self.syncTrack()
+			
+			avg_fps = self.fpsCounter.tick()
+			if state.length or self.current_song_index is None:
+				songLength = state.length
+			else:
+				songLength = self.library.get(self.playlist.path(self.current_song_index)).length  # Library length while decoding
+			songPlayTime = state.position()
+			
+			if not self.headless:  # Headless kiosks are driven by audio alone, so skip all overlay work
+				if self.showHeatmap:
+					self.heatmap.draw(img, cap.timestamp)  # Under the gesture overlay
+				if self.writing:
+					self.drawWriting(img)
+				elif self.eqControl:
+					self.drawEq(img)
 				else:
-					left_hand = lmList1
-					right_hand = lmList2
-					left_label = "LEFT (Prev Song)"
-					right_label = "RIGHT (Next Song)"
-	
-				# Calculate the angle between the index and thumb fingers of both hands
-				angleR = abs(get_angle_from_tangent(right_hand[12][2] - right_hand[0][2], right_hand[12][1] - right_hand[0][1]))
-				angleL = abs(get_angle_from_tangent(left_hand[12][2] - left_hand[0][2], left_hand[12][1] - left_hand[0][1]))
-				angleVolume2h = get_angle_from_tangent(right_hand[8][2] - left_hand[8][2], right_hand[8][1] - left_hand[4][1])
-	
-				if angleR < 45 and changeSongF:
-					changeSongF = False
-					current_song = change_song(1)
-				if angleL < 45 and changeSongB:
-					changeSongB = False
-					current_song = change_song(-1)
-				if abs(angleVolume2h) > 45:
-					cv2.putText(img, f"{volume * 100:.0f}", (midXdist + 20, midYdist + 10), cv2.FONT_HERSHEY_PLAIN, 1,
-					            color, 1, lineType=cv2.LINE_AA)
-					cv2.putText(img, f"VOLUME", (midXdist + 20, midYdist - 30), cv2.FONT_HERSHEY_PLAIN, 1, color, 1,
-					            lineType=cv2.LINE_AA)
-				elif abs(angleVolume2h) < 45:
-					cv2.putText(img, f"VOLUME", (midXdist - 8, midYdist - 50), cv2.FONT_HERSHEY_PLAIN, 1, color, 1,
-					            lineType=cv2.LINE_AA)
-					cv2.putText(img, f"{volume * 100:.0f}", (midXdist - 10, midYdist - 20), cv2.FONT_HERSHEY_PLAIN, 1,
-					            color, 1, lineType=cv2.LINE_AA)
-				
-				# Get Z-coordinates (depth) for both hands
-				left_z = left_hand[19][3]  # Left pinky tip depth
-				right_z = right_hand[19][3]  # Right pinky tip depth
-				
-				# Left hand scaling parameters
-				base_sizeL = 0.5
-				max_sizeL = 3.0
-				min_sizeL = 0.3
-				z_scaleL = 0.05
-				
-				# Right hand scaling parameters
-				base_sizeR = 0.5
-				max_sizeR = 3.0
-				min_sizeR = 0.3
-				z_scaleR = 0.05
-				
-				# Calculate font sizes with non-linear scaling
-				font_sizeL = max(min_sizeL, min(max_sizeL, base_sizeL + (1 / (left_z + 0.2) * z_scaleL)))
-				font_sizeR = max(min_sizeR, min(max_sizeR, base_sizeR + (1 / (right_z + 0.2) * z_scaleR)))
-	
-				# Enhanced left hand label (dramatic)
-				l_pos = (left_hand[17][1] + int(40 * font_sizeL), left_hand[17][2] - int(20 * font_sizeL))
-				cv2.putText(img, "L", l_pos, cv2.FONT_HERSHEY_SIMPLEX,
-				         font_sizeL, color,  # Blue color
-				max(1, int(font_sizeL * 2)),  # Thickness scales with size
-				lineType = cv2.LINE_AA)
-				
-				# Enhanced right hand label (subtle)
-				r_pos = (right_hand[17][1] - int(40 * font_sizeR), right_hand[17][2] - int(20 * font_sizeR))
-				cv2.putText(img, "R", r_pos, cv2.FONT_HERSHEY_SIMPLEX,
-				         font_sizeR, color,  # Green color
-				max(1, int(font_sizeR * 1.5)), lineType = cv2.LINE_AA)  # Thickness scales with size
-				
-				Dist2hR, midXR, midYR = detector.findDistance(right_hand, right_hand, img, 4, 8)
-				Dist2hL, midXR, midYR = detector.findDistance(left_hand, left_hand, img, 4, 8)
-				
-				ColorRAngle = color if angleR > 45 else (0, 255, 0)
-				ColorLAngle = color if angleL > 45 else (0, 255, 0)
-				yMinL = min(left_hand, key=lambda x: x[2] if len(x) > 2 else float('-inf'))[2] + 20
-				yMinR = min(right_hand, key=lambda x: x[2] if len(x) > 2 else float('-inf'))[2] + 20
-				xMinR = min(right_hand, key=lambda x: x[1] if len(x) > 1 else float('-inf'))[1]
-				xMaxL = max(left_hand, key=lambda x: x[1] if len(x) > 1 else float('inf'))[1]
-				
-				cv2.ellipse(img, (xMaxL, yMinL), (50,50), 270, 0, 90, color, 1, cv2.LINE_AA)
-				cv2.putText(img, 'ROTATE - PREV SONG', (xMaxL + 50, yMinL - 50), cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
-				cv2.putText(img, f'{int(angleL)}', (xMaxL + 60, yMinL - 20 ), cv2.FONT_HERSHEY_PLAIN, 1, ColorLAngle, 1, lineType=cv2.LINE_AA)
-	
-				cv2.ellipse(img, (xMinR, yMinR), (50,50), 180, 0, 90, color, 1, cv2.LINE_AA)
-				cv2.putText(img, 'ROTATE - NEXT SONG', (xMinR - 200, yMinR - 50), cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
-				cv2.putText(img, f'{int(angleR)}', (xMinR - 80, yMinR - 20 ), cv2.FONT_HERSHEY_PLAIN, 1, ColorRAngle, 1, lineType=cv2.LINE_AA)
-	
-				# Check angles for song change
-				if angleR > 45:
-					changeSongF = True
-				if angleL > 45:
-					changeSongB = True
-		
-		avg_fps, pTime = calculate_fps(pTime, cTime)
+					self.drawGestures(img)
+				cv2.putText(img, f"FPS: {avg_fps:.1f}  DROPPED: {cap.dropped}", (10, 30), cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
+				if self.current_song != titleSong:  # Format the title once per song
+					titleSong, songTitle = self.current_song, format_song_title(self.current_song.split('_'))
+				self.hud.draw(img, songTitle, songPlayTime, songLength)
+				if self.showLyrics and self.current_song_index is not None:
+					if self.current_song_index != lyricsTrack:  # Parsed in the background; nothing shows until then
+						lyricsTrack, lyricsPath = self.current_song_index, self.playlist.path(self.current_song_index)
+						self.lyrics.want(lyricsPath)
+					self.lyricsOverlay.draw(img, self.lyrics.get(lyricsPath), songPlayTime)
+			
+				cv2.imshow("Image", img)
+				key = cv2.waitKey(1) & 0xFF
+				if key == ord('q'):
+					break  # Quit when 'q' is pressed
+				elif key == ord('h'):
+					self.showHeatmap = not self.showHeatmap
+				elif key == ord('l'):
+					self.showLyrics = not self.showLyrics
+				elif key == ord('w'):
+					self.writing = not self.writing
+				elif key == ord('e') and self.equalizer:
+					self.eqControl = not self.eqControl
+			
+			if firstFrame:
+				firstFrame = False
+				self.startup.mark('first frame')
+				print(self.startup.report())
 		
-		songName = current_song.split('_')
-		songName = format_song_title(songName)
+		self.close()
+	
+	def runSources(self):
+		"""Gesture control from several video sources (--source), e.g. one camera per kiosk user.
 		
-		cv2.putText(img, f"FPS: {avg_fps:.1f}", (10, 30), cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
-		cv2.putText(img, f"{songName}",((img.shape[1] - cv2.getTextSize(f"{songName}", cv2.FONT_HERSHEY_PLAIN, 2, 1)[0][0]) // 2, 500),cv2.FONT_HERSHEY_PLAIN, 2, color, 1, lineType=cv2.LINE_AA)
+		Capture and hand tracking run in one worker process per source; each user (a source, or a hand with
+		gestureUsers = 'hand') gets its own GestureEngine, and a RoleArbiter decides whose gestures control
+		the volume and whose the track. There is no window in this mode.
+		"""
+		self.current_song = self.changeSong(0)
+		pool, voice = self.sources, self.voice
+		arbiter = gm.RoleArbiter(releaseAfter=config.roleReleaseSeconds)
+		engines = {}
+		firstFrame = True
+		start = time.perf_counter()
 		
-		songPlaying = MP3('../songs/' + current_song + '.mp3')
-		songLength = songPlaying.info.length
-		songPlayTime = pygame.mixer.music.get_pos() / 1000
-	
-		songBarType = 1
-	
-		if songBarType == 1:
-			songBarY = 520
-			songPlayLength = np.interp(songPlayTime, [0, songLength], [100, img.shape[1]-100])
-			cv2.line(img, (100, songBarY), (img.shape[1]-100, songBarY), color, 2, lineType=cv2.LINE_AA)
-			cv2.line(img, (100, songBarY), (int(songPlayLength), songBarY), seccolor, 2, lineType=cv2.LINE_AA)
-			cv2.putText(img, f"{sec_to_min(songLength)}", (img.shape[1] - 90, songBarY+4), cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
-			cv2.putText(img, f"{sec_to_min(songPlayTime)}", (55, songBarY+4), cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
-		elif songBarType == 2:
-			songBarY = 538
-			songPlayLength = np.interp(songPlayTime, [0, songLength], [0, img.shape[1]])
-			cv2.line(img, (0, songBarY), (img.shape[1], songBarY), color, 5, lineType=cv2.LINE_AA)
-			cv2.line(img, (0, songBarY), (int(songPlayLength), songBarY), seccolor, 5, lineType=cv2.LINE_AA)
-			cv2.putText(img, f"{sec_to_min(songPlayTime)} / {sec_to_min(songLength)}", (img.shape[1]//2 - 50, songBarY-15), cv2.FONT_HERSHEY_PLAIN, 1, color, 1, lineType=cv2.LINE_AA)
+		while not pool.finished:
+			frame = pool.read(timeout=0.1)
+			events = voice.poll() if voice is not None else []
+			if frame is not None:
+				now = time.perf_counter()  # Recorded sources carry unrelated clocks, so roles expire on arrival time
+				for user, landmarks in self.users(frame):
+					engine = engines.get(user)
+					if engine is None:
+						engine = engines[user] = gm.GestureEngine()
+					events += arbiter.filter(user, engine.update(landmarks, frame.t, self.paused), now, len(landmarks) > 0)
+			self.handleEvents(events)
+			self.syncTrack()
 			
-		if sec_to_min(songPlayTime) == sec_to_min(songLength):
-			current_song = change_song(1)
-			songName = current_song.split('_')
-			songName = format_song_title(songName)
-	
-		cv2.imshow("Image", img)
-		if cv2.waitKey(1) & 0xFF == ord('q'):
-			break  # Quit when 'q' is pressed
+			if firstFrame and frame is not None:
+				firstFrame = False
+				self.startup.mark('first frame')
+				print(self.startup.report())
+		
+		wall = time.perf_counter() - start
+		print(f"Sources: {sum(pool.received)} frames in {wall:.2f} s ({sum(pool.received) / wall:.1f} FPS), "
+		      f"per source {pool.received}")
+		self.close()
+	
+	def users(self, frame):
+		"""(user key, landmarks) pairs of a SourceFrame: the whole source, or each hand by handedness."""
+		if config.gestureUsers == 'hand':
+			for i in range(len(frame.landmarks)):
+				yield (frame.source, 'L' if frame.handedness[i] == inf.LEFT else 'R'), frame.landmarks[i:i + 1]
+		else:
+			yield frame.source, frame.landmarks
+	
+	##################################################
+	
+	def handleEvents(self, events):
+		"""Apply gesture and voice events to the player."""
+		audio = self.audio
+		for event in events:
+			if isinstance(event, gm.VolumeSet):
+				audio.setVolume(event.volume)
+			elif isinstance(event, gm.Pause):
+				audio.pause()
+				self.paused = True
+			elif isinstance(event, gm.Resume):
+				audio.resume()
+				self.paused = False
+			elif isinstance(event, gm.NextTrack):
+				self.current_song = self.changeSong(1)
+			elif isinstance(event, gm.PrevTrack):
+				self.current_song = self.changeSong(-1)
+			elif isinstance(event, srch.PlayTrack):
+				self.current_song = self.playTrack(event.trackId)
+			elif isinstance(event, gm.Seek):
+				state = audio.state  # The audio thread moves the playback clock, so the progress bar follows
+				target = state.position() + event.seconds
+				if state.length > 0:
+					target = min(target, state.length - config.seekEndMargin)  # Past the end: just before it
+				audio.seek(max(target, 0.0))
+			elif isinstance(event, gm.EqSet):
+				audio.setEq(event.band, event.value)
+	
+	def syncTrack(self):
+		"""Follow the player when it moved on to the next track by itself; returns its state."""
+		audio = self.audio
+		state = audio.state
+		if state.serial == audio.serial and state.index is not None and state.index != self.current_song_index:
+			self.current_song_index = state.index
+			self.current_song = self.trackName(self.current_song_index)
+		return state
+	
+	def close(self):
+		"""Shut down whatever was actually created."""
+		if 'cap' in self.__dict__:
+			self.cap.release()
+		for name in ('voice', 'sources', 'detector', 'audio', 'lyrics', 'recorder', 'metricsDump', 'metricsServer'):
+			subsystem = self.__dict__.get(name)
+			if subsystem is not None:
+				subsystem.close()
+		for name in ('library', 'recommender'):
+			if name in self.__dict__:
+				self.__dict__[name].save()  # Lengths read and plays/skips counted during this session
+		if self.args.heatmap_out and 'heatmap' in self.__dict__:
+			self.heatmap.export(self.args.heatmap_out)
+		report = self.tracer.report()
+		if report:
+			print(report)
+
+
+####################################################################################################
+
+def main():
+	parser = argparse.ArgumentParser(description="Hand-controlled music player")
+	parser.add_argument('--record', metavar='DIR', help="save camera frames and landmarks to DIR")
+	parser.add_argument('--replay', metavar='DIR', help="play back a recording instead of using the camera")
+	parser.add_argument('--landmarks', action='store_true',
+	                    help="with --replay, feed the recorded landmarks to the gestures instead of running MediaPipe")
+	parser.add_argument('--realtime', action='store_true',
+	                    help="with --replay, keep the recorded pace instead of running as fast as possible")
+	parser.add_argument('--headless', action='store_true',
+	                    help="no window and no overlay drawing (audio-only kiosks); replays also get a dummy SDL audio driver")
+	parser.add_argument('--heatmap', action='store_true', help="show where hands have been (toggle with 'h')")
+	parser.add_argument('--heatmap-out', metavar='FILE',
+	                    help="save the hand position heatmap to FILE (.npz) and a .png next to it on exit")
+	parser.add_argument('--write', action='store_true',
+	                    help="air handwriting: point with the index finger and write a song's first letter (toggle with 'w')")
+	parser.add_argument('--eq', action='store_true',
+	                    help="play through the equalizer; hand height sets bass/mid/treble (toggle with 'e')")
+	parser.add_argument('--source', metavar='SRC', action='append', default=[],
+	                    help="camera index, video file or recording folder; repeat for several users (one worker process each)")
+	parser.add_argument('--metrics-port', type=int, metavar='PORT',
+	                    help="serve motion-to-action latency histograms at http://127.0.0.1:PORT/metrics (Prometheus text)")
+	parser.add_argument('--metrics-jsonl', metavar='FILE',
+	                    help="append motion-to-action latency summaries to FILE every metricsInterval seconds")
+	parser.add_argument('--voice', action='store_true', help="listen for voice commands (wake word 'jarvis')")
+	parser.add_argument('--voice-wav', metavar='FILE', help="take voice commands from a 16-bit mono WAV file instead of the mic")
+	parser.add_argument('--say', metavar='TEXT', action='append', default=[],
+	                    help="typed command, e.g. 'play sunshine by john doe' (repeatable)")
+	args = parser.parse_args()
+	if args.headless and args.replay:
+		os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+	
+	app = App(args)
+	if args.source:
+		app.runSources()
+	else:
+		app.run()
+	return app
 
 
 if __name__ == "__main__":